@@ -1,11 +1,26 @@
-import time
-import random
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-from urllib.parse import urlparse, urljoin
 import os
-from llm_utils import analyze_company_content, generate_linkedin_searches
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from llm_utils import (
+    analyze_company_content, analyze_companies_batch, generate_linkedin_searches_batch, llm_failure_count,
+    linkedin_search_templates, LLM_BATCH_ENABLED, HOMEPAGE_TOKENS, CAREERS_TOKENS
+)
+from fetcher import HEADERS, fetch_page
+from cache_store import ResultCache, SEARCH_CACHE_TTL
+from url_utils import registrable_domain
+from page_document import PageDocument, SiteDocument
+from keyword_matcher import KeywordMatcher, get_matcher
+from rate_limiter import call_with_retries
+from prompt_budget import select_blocks
+from careers_resolver import find_careers_page, resolve_careers_page
+from crawl_frontier import rank_frontier, fetch_pages, page_byte_budget
+from search_prefilter import prefilter_results
+from metrics import timed, count, record_error
 
 # --- Constants ---
 HIGH_INTENT_QUERIES = [
@@ -35,90 +50,288 @@ HIGH_INTENT_QUERIES = [
     '"digital consulting firm" "United States"'
 ]
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
+# Validation keyword lists
+PARTNER_KEYWORDS = ["partner", "ecosystem", "implementation", "alliance", "joint venture"]
+OUTCOME_KEYWORDS = ["business outcome", "value", "transformation", "roi", "strategic", "roadmap", "advisory"]
+HIRING_KEYWORDS = ["staff augmentation", "hiring engineers", "100+ engineers", "dedicated team", "outstaffing"]
+CONSULTING_ROLES = ["consultant", "strategist", "engagement manager", "client partner", "solution architect", "delivery lead"]
+ENGINEERING_ROLES = ["software engineer", "full stack developer", "backend developer", "frontend developer", "qa engineer"]
+
+# Compiled once: each page is scanned in a single pass for all of its keyword groups
+HOMEPAGE_MATCHER = KeywordMatcher({
+    "partner": PARTNER_KEYWORDS,
+    "outcome": OUTCOME_KEYWORDS,
+    "hiring": HIRING_KEYWORDS,
+})
+CAREERS_MATCHER = KeywordMatcher({
+    "consulting": CONSULTING_ROLES,
+    "engineering": ENGINEERING_ROLES,
+})
+# Ranks page blocks for the LLM prompt by how much checklist language they carry
+PROMPT_MATCHER = KeywordMatcher({
+    "partner": PARTNER_KEYWORDS,
+    "outcome": OUTCOME_KEYWORDS,
+    "hiring": HIRING_KEYWORDS,
+    "consulting": CONSULTING_ROLES,
+    "engineering": ENGINEERING_ROLES,
+})
+
+# Validation cascade: companies whose keyword score is at or below the reject
+# threshold, or at or above the accept threshold, are decided without the LLM
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "1") != "0"
+CASCADE_REJECT_SCORE = float(os.getenv("CASCADE_REJECT_SCORE", "0"))
+CASCADE_ACCEPT_SCORE = float(os.getenv("CASCADE_ACCEPT_SCORE", "6"))
+
+# Search API endpoint (overridable, e.g. to point at a local stand-in)
+SERPER_URL = os.getenv("SERPER_URL", "https://serper.dev/search")
+SERPER_PAGE_SIZE = int(os.getenv("SERPER_PAGE_SIZE", "10"))  # Results per page; larger counts are paged
+SERPER_BATCH_LIMIT = 100  # Searches per bulk request
+# Runs search the next SEARCH_BATCH_SIZE queries in one bulk request
+SEARCH_BATCH_ENABLED = os.getenv("SEARCH_BATCH_ENABLED", "1") != "0"
+SEARCH_BATCH_SIZE = int(os.getenv("SEARCH_BATCH_SIZE", "25"))
+
+# Validation concurrency (per-host politeness is enforced by the fetcher)
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", "8"))
+
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "1") != "0"
+
+_search_cache = None
+_search_cache_configured = False
+_search_cache_lock = threading.Lock()
+
+_tier_counts = Counter()
+_tier_lock = threading.Lock()
+
+# --- Search Cache ---
+
+def configure_search_cache(path=None, ttl=None, enabled=True):
+    """
+    Replaces the cache used by search_companies.
+
+    Args:
+        path: SQLite file (defaults to CACHE_DIR/search.sqlite)
+        ttl: Seconds a cached result set stays valid (defaults to SEARCH_CACHE_TTL)
+        enabled: Set to False to always call the search API
+    """
+    global _search_cache, _search_cache_configured
+    with _search_cache_lock:
+        _search_cache = ResultCache("search", path, SEARCH_CACHE_TTL if ttl is None else ttl) if enabled else None
+        _search_cache_configured = True
+    return _search_cache
+
+def get_search_cache():
+    """Get the shared search cache, or None if caching is disabled."""
+    if not _search_cache_configured:
+        configure_search_cache(enabled=SEARCH_CACHE_ENABLED)
+    return _search_cache
+
+def search_cache_key(query, max_results):
+    # Whitespace differences don't change what the search API returns
+    return f"{' '.join(query.split())}|{max_results}"
+
+def search_is_cached(query, max_results):
+    """Whether a search would be answered from the search cache (and cost no credits)."""
+    cache = get_search_cache()
+    return cache is not None and cache.contains(search_cache_key(query, max_results))
+
+def search_cache_stats():
+    """Returns hit/miss/entry counts for the search cache."""
+    cache = get_search_cache()
+    return cache.stats() if cache else {"hits": 0, "misses": 0, "entries": 0, "bytes": 0}
 
 # --- Core Functions ---
 
+def _search_entries(query, max_results):
+    """Serper request entries for one query: a single entry, or one per results page."""
+    if max_results <= SERPER_PAGE_SIZE:
+        return [{"q": query, "num": max_results}]
+    pages = -(-max_results // SERPER_PAGE_SIZE)
+    return [{"q": query, "num": SERPER_PAGE_SIZE, "page": page} for page in range(1, pages + 1)]
+
+def search_credits(max_results):
+    """Serper credits a fresh search costs (one per results page)."""
+    return len(_search_entries("", max_results))
+
+def _organic_results(data):
+    # Convert Serper format to match the expected format
+    return [
+        {
+            "title": item.get("title", "Unknown"),
+            "href": item.get("link", ""),
+            "body": item.get("snippet", "")
+        }
+        for item in data.get("organic", [])
+    ]
+
+def _serper_search(queries, max_results, api_key):
+    """
+    Sends queries to Serper, several per request using its bulk payload
+    (a JSON list of searches answered by a list of results, in order).
+
+    Returns:
+        Dict of {query: list of results, or the exception the query failed with}
+    """
+    headers = {
+        "X-API-KEY": api_key,
+        "Content-Type": "application/json"
+    }
+    entries = [(query, entry) for query in queries for entry in _search_entries(query, max_results)]
+    pages = {query: [] for query in queries}
+    failures = {}
+
+    for start in range(0, len(entries), SERPER_BATCH_LIMIT):
+        chunk = entries[start:start + SERPER_BATCH_LIMIT]
+        # A lone search is sent in the plain (non-bulk) form
+        payload = chunk[0][1] if len(chunk) == 1 else [entry for _, entry in chunk]
+
+        def post():
+            response = requests.post(SERPER_URL, json=payload, headers=headers, timeout=10)
+            response.raise_for_status()
+            return response
+
+        try:
+            # Throttled by the shared Serper token bucket; 429/5xx are retried with backoff
+            data = call_with_retries("serper", post).json()
+            if isinstance(data, dict):
+                data = [data]
+            if not isinstance(data, list) or len(data) != len(chunk):
+                raise ValueError(f"Expected {len(chunk)} search results, got {len(data)}")
+        except Exception as e:
+            print(f"Search error: {e}")
+            record_error("search")
+            for query, _ in chunk:
+                failures[query] = e
+            continue
+
+        for (query, _), item in zip(chunk, data):
+            # A malformed item fails only the query it belongs to
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError(f"Malformed search result: {item!r:.100}")
+                error = (item.get("message") or item.get("error")) if "organic" not in item else None
+                if error:
+                    raise RuntimeError(error)
+                pages[query].extend(_organic_results(item))
+            except Exception as e:
+                print(f"Search error for '{query}': {e}")
+                record_error("search")
+                failures[query] = e
+
+    results = {}
+    for query in queries:
+        if query in failures:
+            results[query] = failures[query]
+            continue
+        # Pages can overlap when the ranking shifts between requests
+        seen = set()
+        unique = []
+        for r in pages[query]:
+            if r["href"] not in seen:
+                seen.add(r["href"])
+                unique.append(r)
+        results[query] = unique[:max_results]
+    return results
+
+@timed("search")
 def search_companies(query, max_results=10):
     """
     Searches for companies using Serper API.
+    Results are cached per (query, max_results); cache misses go through the shared Serper rate limiter.
+    More than SERPER_PAGE_SIZE results are collected from several result pages.
     """
     print(f"Searching for: {query}".encode('utf-8', errors='replace').decode('utf-8'))
     
+    cache = get_search_cache()
+    cache_key = search_cache_key(query, max_results)
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            count("cache_requests", cache="search", result="hit")
+            return cached
+        count("cache_requests", cache="search", result="miss")
+
     SERP_API_KEY = os.getenv("SERP_API_KEY")
     if not SERP_API_KEY:
         print("Warning: SERP_API_KEY environment variable not set. Please set it to use Serper API.")
         return []
     
-    results = []
-    try:
-        url = "https://serper.dev/search"
-        headers = {
-            "X-API-KEY": SERP_API_KEY,
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "q": query,
-            "num": max_results
-        }
-        
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        organic_results = data.get("organic", [])
-        
-        # Convert Serper format to match the expected format
-        for item in organic_results:
-            results.append({
-                "title": item.get("title", "Unknown"),
-                "href": item.get("link", ""),
-                "body": item.get("snippet", "")
-            })
-            
-    except Exception as e:
-        print(f"Search error: {e}")
-    
-    # Add a small random delay to avoid hitting rate limits
-    time.sleep(random.uniform(1, 2))
+    results = _serper_search([query], max_results, SERP_API_KEY)[query]
+    if isinstance(results, Exception):
+        return []
+    if cache:
+        cache.put(cache_key, results)
     return results
 
-def get_page_content(url):
+@timed("search_batch")
+def search_companies_batch(queries, max_results=10):
     """
-    Fetches the content of a URL.
+    Searches several queries at once, sending up to SERPER_BATCH_LIMIT searches
+    (queries or result pages) per Serper request. Cached queries are not sent.
+
+    Args:
+        queries: Search queries
+        max_results: Results wanted per query
+
+    Returns:
+        Dict of {query: list of results, or the exception that query failed with},
+        in query order; one failing query doesn't affect the others
     """
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        return response.text
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return None
+    queries = list(dict.fromkeys(queries))
+    print(f"Searching for {len(queries)} queries in one batch")
+
+    cache = get_search_cache()
+    results = {}
+    pending = []
+    for query in queries:
+        cached = cache.get(search_cache_key(query, max_results)) if cache else None
+        if cached is not None:
+            count("cache_requests", cache="search", result="hit")
+            results[query] = cached
+        else:
+            if cache:
+                count("cache_requests", cache="search", result="miss")
+            pending.append(query)
 
-def find_careers_page(soup, base_url):
+    if pending:
+        SERP_API_KEY = os.getenv("SERP_API_KEY")
+        if not SERP_API_KEY:
+            print("Warning: SERP_API_KEY environment variable not set. Please set it to use Serper API.")
+            results.update({query: [] for query in pending})
+        else:
+            fetched = _serper_search(pending, max_results, SERP_API_KEY)
+            for query, found in fetched.items():
+                results[query] = found
+                if cache and not isinstance(found, Exception):
+                    cache.put(search_cache_key(query, max_results), found)
+    return {query: results[query] for query in queries}
+
+@timed("fetch")
+def get_page_content(url, max_bytes=None):
     """
-    Attempts to find the Careers page URL from the homepage soup.
+    Fetches the content of a URL through the shared pooled fetcher.
     """
-    for a in soup.find_all('a', href=True):
-        text = a.get_text(strip=True).lower()
-        if 'career' in text or 'job' in text or 'join us' in text or 'work with us' in text or 'hiring' in text:
-             return urljoin(base_url, a['href'])
-    return None
+    return fetch_page(url, max_bytes=max_bytes)
 
 def analyze_text_for_keywords(text, positive_keywords, negative_keywords):
     """
     Checks for presence of positive and negative keywords in text.
+    Keywords match whole words (plurals allowed) in a single pass over the text.
     """
-    text_lower = text.lower()
-    positive_matches = [kw for kw in positive_keywords if kw.lower() in text_lower]
-    negative_matches = [kw for kw in negative_keywords if kw.lower() in text_lower]
-    return positive_matches, negative_matches
+    scan = get_matcher({"positive": positive_keywords, "negative": negative_keywords}).scan(text)
+    return scan.keywords("positive"), scan.keywords("negative")
 
-def validate_company(name, url):
+@timed("collect_signals")
+def collect_signals(name, url):
     """
-    Validates a company based on the strict checklist.
+    Fetches a company's pages and runs the keyword checks (every step before the LLM).
+
+    Besides the homepage and careers page, the most promising internal pages
+    (partners, services, case studies...) are fetched concurrently and merged
+    with the homepage for the keyword checks.
+    
+    Returns:
+        Dict of signals for finalize_company, or None if the site can't be fetched
+        or the rules already reject it (e.g. body shops)
     """
     print(f"Validating: {name} ({url})".encode('utf-8', errors='replace').decode('utf-8'))
     
@@ -127,86 +340,174 @@ def validate_company(name, url):
 
     homepage_content = get_page_content(url)
     if not homepage_content:
+        record_tier("fetch_failed")
         return None
 
-    soup = BeautifulSoup(homepage_content, 'html.parser')
-    text_content = soup.get_text(separator=' ', strip=True)
+    doc = PageDocument(homepage_content, url)
+    careers_url = resolve_careers_page(doc.soup, url)
+    extra_urls = rank_frontier(doc, exclude=(url, careers_url))
 
-    # 1. Partner/Ecosystem/Implementation check
-    partner_keywords = ["partner", "ecosystem", "implementation", "alliance", "joint venture"]
-    p_matches, _ = analyze_text_for_keywords(text_content, partner_keywords, [])
-    
-    # 2. Outcome vs Hiring language
-    outcome_keywords = ["business outcome", "value", "transformation", "roi", "strategic", "roadmap", "advisory"]
-    hiring_keywords = ["staff augmentation", "hiring engineers", "100+ engineers", "dedicated team", "outstaffing"]
-    
-    o_matches, h_matches = analyze_text_for_keywords(text_content, outcome_keywords, hiring_keywords)
+    # Careers page and extra pages in one bounded, concurrent wait
+    jobs = {}
+    if careers_url:
+        jobs[careers_url] = lambda: get_page_content(careers_url)
+    page_bytes = page_byte_budget(len(extra_urls))
+    for extra_url in extra_urls:
+        jobs[extra_url] = lambda extra_url=extra_url: get_page_content(extra_url, max_bytes=page_bytes)
+    pages = fetch_pages(jobs) if jobs else {}
+
+    site = SiteDocument([doc] + [PageDocument(pages[u], u) for u in extra_urls if u in pages])
+    count("pages_crawled", len(site.pages) - 1)
+
+    # 1-2. Partner/Ecosystem/Implementation check and Outcome vs Hiring language, in one pass
+    scan = HOMEPAGE_MATCHER.scan(site.text)
+    p_matches = scan.keywords("partner")
+    o_matches = scan.keywords("outcome")
+    h_matches = scan.keywords("hiring")
     
     # Evidence snippet
     evidence = []
     if o_matches:
-        evidence.append(f"Focus on: {', '.join(list(set(o_matches))[:3])}")
+        evidence.append(f"Focus on: {', '.join(o_matches[:3])}")
     if p_matches:
-        evidence.append(f"Partnership keywords: {', '.join(list(set(p_matches))[:3])}")
+        evidence.append(f"Partnership keywords: {', '.join(p_matches[:3])}")
+        evidence.append(f'Context: "{scan.snippet(scan.for_group("partner")[0])}"')
     
     # 3. Careers Page Check
-    careers_url = find_careers_page(soup, url)
     careers_status = "N/A"
     
     c_matches = []
     e_matches = []
+    careers_doc = None
 
     if careers_url:
-        careers_content = get_page_content(careers_url)
+        careers_content = pages.get(careers_url)
         if careers_content:
-            c_soup = BeautifulSoup(careers_content, 'html.parser')
-            c_text = c_soup.get_text(separator=' ', strip=True).lower()
-            
-            consulting_roles = ["consultant", "strategist", "engagement manager", "client partner", "solution architect", "delivery lead"]
-            engineering_roles = ["software engineer", "full stack developer", "backend developer", "frontend developer", "qa engineer"]
-            
-            c_matches, e_matches = analyze_text_for_keywords(c_text, consulting_roles, engineering_roles)
+            careers_doc = PageDocument(careers_content, careers_url)
+            careers_scan = CAREERS_MATCHER.scan(careers_doc.text)
+            c_matches = careers_scan.keywords("consulting")
+            e_matches = careers_scan.keywords("engineering")
             
             # Heuristic: If engineering roles massively outnumber consulting roles AND they handle "hiring", it's likely a body shop.
             # However, many consulting firms DO hire engineers.
             # The prompt says: "❌ If they are hiring many engineers / developers → SKIP unless they clearly position themselves as consulting‑first."
             
-            if len(e_matches) > len(c_matches) * 2 and "consulting" not in text_content.lower():
+            if len(e_matches) > len(c_matches) * 2 and "consulting" not in site.lower_text:
+                 record_tier("body_shop")
                  return None # Skip body shops
             
             if c_matches:
-                 careers_status = f"Hiring: {', '.join(list(set(c_matches))[:3])}"
+                 careers_status = f"Hiring: {', '.join(c_matches[:3])}"
                  evidence.append(careers_status)
             else:
                  careers_status = "No explicit consulting roles found"
 
-    # 4. LLM Analysis (if available)
-    llm_analysis = None
-    careers_text = None
-    if careers_url and careers_content:
-        careers_text = BeautifulSoup(careers_content, 'html.parser').get_text(separator=' ', strip=True)
+    return {
+        "name": name,
+        "url": url,
+        "homepage_doc": doc,
+        "site_doc": site,
+        "careers_doc": careers_doc,
+        "p_matches": p_matches,
+        "o_matches": o_matches,
+        "h_matches": h_matches,
+        "c_matches": c_matches,
+        "e_matches": e_matches,
+        "positions_as_consulting": "consulting" in site.lower_text or "strategy" in site.lower_text,
+        "careers_status": careers_status,
+        "evidence": evidence,
+    }
+
+def record_tier(tier):
+    with _tier_lock:
+        _tier_counts[tier] += 1
+    count("validation_tiers", tier=tier)
+
+def cascade_stats():
+    """
+    Returns how many companies each validation tier resolved:
+    fetch_failed, body_shop, rules_reject, rules_accept and llm.
+    """
+    with _tier_lock:
+        return dict(_tier_counts)
+
+def reset_cascade_stats():
+    with _tier_lock:
+        _tier_counts.clear()
+
+def rule_score(signals):
+    """
+    Cheap keyword score for the validation cascade: positive for partner,
+    outcome and consulting signals, negative for staffing language.
+    """
+    score = min(len(signals["p_matches"]), 3) + min(len(signals["o_matches"]), 3)
+    if signals["c_matches"]:
+        score += 2
+    if signals["positions_as_consulting"]:
+        score += 1
+    score -= 2 * len(signals["h_matches"])
+    score -= max(0, len(signals["e_matches"]) - len(signals["c_matches"]))
+    return score
+
+def cascade_tier(signals):
+    """
+    Decides which tier resolves a company: 'rules_reject', 'rules_accept', or
+    'llm' when the score falls inside the uncertainty band (or the cascade is off).
+    """
+    if not CASCADE_ENABLED:
+        return "llm"
+    score = rule_score(signals)
+    if score <= CASCADE_REJECT_SCORE:
+        return "rules_reject"
+    if score >= CASCADE_ACCEPT_SCORE:
+        return "rules_accept"
+    return "llm"
+
+def resolve_by_rules(signals):
+    """
+    Applies the cheap tiers of the cascade.
     
-    llm_analysis = analyze_company_content(name, url, text_content, careers_text)
+    Returns:
+        Tuple of (decided, result): decided is False when the company needs the LLM
+    """
+    tier = cascade_tier(signals)
+    record_tier(tier)
+    if tier == "rules_reject":
+        return True, None
+    if tier == "rules_accept":
+        return True, finalize_company(signals, None)
+    return False, None
+
+def finalize_company(signals, llm_analysis):
+    """
+    Combines keyword signals and the (optional) LLM analysis into a result record.
     
+    Returns:
+        Company dict, or None if the company is not a fit
+    """
+    name = signals["name"]
+    url = signals["url"]
+    evidence = list(signals["evidence"])
+
     # Final Decision Logic - combine keyword-based and LLM analysis
     is_fit = False
     reasons = []
     confidence = "medium"
 
     # Keyword-based validation (baseline)
-    if o_matches:
+    if signals["o_matches"]:
         is_fit = True
         reasons.append("Outcome-based language detected")
     
-    if p_matches:
+    if signals["p_matches"]:
         is_fit = True
         reasons.append("Partner/Ecosystem language detected")
 
-    if c_matches:
+    if signals["c_matches"]:
         is_fit = True
         reasons.append("Hiring consulting roles")
     
-    if "consulting" in text_content.lower() or "strategy" in text_content.lower():
+    if signals["positions_as_consulting"]:
         is_fit = True
         reasons.append("Positions as consulting/strategy firm")
     
@@ -242,15 +543,9 @@ def validate_company(name, url):
     if not is_fit:
         return None
 
-    # Generate better LinkedIn search strings using LLM
-    company_description = " | ".join(reasons[:2])  # Brief description for LLM
-    linkedin_searches = generate_linkedin_searches(name, company_description, llm_analysis)
-    
-    # Format LinkedIn searches for display
-    if isinstance(linkedin_searches, list) and len(linkedin_searches) > 0:
-        linkedin_search = " | ".join(linkedin_searches[:3])
-    else:
-        linkedin_search = f'site:linkedin.com/in/ "{name}" ("Client Partner" OR "Managing Director" OR "Practice Lead")'
+    # Template LinkedIn search strings for now; LLM-crafted ones are generated
+    # on demand for the rows users view or export (see enrich_linkedin_searches)
+    linkedin_search = " | ".join(linkedin_search_templates(name))
     
     return {
         "Company": name,
@@ -259,30 +554,405 @@ def validate_company(name, url):
         "Evidence": " | ".join(evidence) if evidence else "Outcomes mentioned",
         "LinkedIn Search Strings": linkedin_search,
         "Confidence": confidence,
-        "llm_analysis": llm_analysis  # Store for later use in summary
+        "llm_analysis": llm_analysis,  # Store for later use in summary
+        "linkedin_description": " | ".join(reasons[:2]),  # Brief description for LinkedIn generation
+        "linkedin_source": "template"
     }
 
-def process_query(query, num_results=5):
+def llm_page_content(signals):
+    """
+    Builds the page text sent to the LLM: boilerplate-free content blocks,
+    highest keyword density first, within the prompt token budgets.
+    Blocks from crawled pages compete with the homepage's for the homepage budget.
+    
+    Returns:
+        Tuple of (site text, careers text or None)
+    """
+    site = signals.get("site_doc") or signals["homepage_doc"]
+    text_content = select_blocks(site.content_blocks, HOMEPAGE_TOKENS, PROMPT_MATCHER)
+    careers_doc = signals.get("careers_doc")
+    careers_text = select_blocks(careers_doc.content_blocks, CAREERS_TOKENS, PROMPT_MATCHER) if careers_doc else None
+    return text_content, careers_text
+
+@timed("validate")
+def validate_company(name, url):
+    """
+    Validates a company based on the strict checklist.
+    """
+    signals = collect_signals(name, url)
+    if not signals:
+        return None
+
+    # Clear-cut companies are settled by the keyword score alone
+    decided, result = resolve_by_rules(signals)
+    if decided:
+        return result
+
+    # 4. LLM Analysis (if available)
+    text_content, careers_text = llm_page_content(signals)
+    llm_analysis = analyze_company_content(name, url, text_content, careers_text)
+    return finalize_company(signals, llm_analysis)
+
+class DomainRegistry:
+    """
+    Run-wide record of registrable domains that have been validated.
+
+    The first candidate for a domain owns its validation; every later
+    candidate (from the same or another query) shares the owner's
+    in-flight or completed outcome instead of fetching the site again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def claim(self, url):
+        """
+        Returns (future, is_owner) for the URL's registrable domain.
+        The owner must resolve the future with the validation outcome.
+        """
+        domain = registrable_domain(url)
+        with self._lock:
+            if domain in self._futures:
+                return self._futures[domain], False
+            future = Future()
+            self._futures[domain] = future
+            return future, True
+
+    def preload(self, url, outcome):
+        """Marks a domain as already validated (e.g. by an earlier attempt of a resumed run)."""
+        future, is_owner = self.claim(url)
+        if is_owner:
+            future.set_result(dict(outcome))
+
+    def seen_domains(self):
+        with self._lock:
+            return set(self._futures)
+
+    def __contains__(self, url):
+        with self._lock:
+            return registrable_domain(url) in self._futures
+
+def iter_validate_candidates(candidates, max_workers=None, registry=None, batch_llm=None):
+    """
+    Validates search hits concurrently, yielding each outcome as soon as it is settled.
+
+    Args:
+        candidates: List of search results ('title', 'href', 'body')
+        max_workers: Global worker count (defaults to VALIDATION_WORKERS)
+        registry: DomainRegistry shared across a run; each registrable domain is validated once
+        batch_llm: Analyze all fetched companies with batched LLM requests instead of one
+            request per company (defaults to LLM_BATCH_ENABLED)
+
+    Yields:
+        Dicts with 'index' (position in candidates), 'name', 'url', 'result', 'error',
+        'duplicate' and 'llm_failed' (the LLM request failed, so 'result' is keyword-only),
+        in completion order
+    """
+    if not candidates:
+        return
+
+    max_workers = max_workers or VALIDATION_WORKERS
+    registry = registry if registry is not None else DomainRegistry()
+    batch_llm = LLM_BATCH_ENABLED if batch_llm is None else batch_llm
+
+    outcomes = [
+        {"index": i, "name": c.get('title', 'Unknown'), "url": c.get('href', ''), "result": None, "error": None,
+         "duplicate": False, "llm_failed": False}
+        for i, c in enumerate(candidates)
+    ]
+    # Claim domains up front, in search order, so the first hit for a domain owns its validation
+    claims = [registry.claim(o["url"]) for o in outcomes]
+    owned = [(o, future) for o, (future, is_owner) in zip(outcomes, claims) if is_owner]
+
+    def attempt(outcome, step, *args):
+        # Errors are recorded on the candidate's outcome instead of aborting the batch
+        try:
+            return step(*args)
+        except Exception as e:
+            outcome["error"] = str(e)
+            print(f"Validation error for {outcome['url']}: {e}".encode('utf-8', errors='replace').decode('utf-8'))
+            return None
+
+    def settle(outcome, future):
+        # Publishes the owner's outcome to duplicates in this and other queries
+        future.set_result(dict(outcome))
+        return outcome
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(owned))))
+    try:
+        if not batch_llm:
+            def validate(outcome):
+                failures = llm_failure_count()
+                outcome["result"] = attempt(outcome, validate_company, outcome["name"], outcome["url"])
+                outcome["llm_failed"] = llm_failure_count() > failures
+                return outcome
+            pending = {executor.submit(validate, o): future for o, future in owned}
+            for done in as_completed(pending):
+                yield settle(done.result(), pending[done])
+        else:
+            pending = {
+                executor.submit(attempt, o, collect_signals, o["name"], o["url"]): (o, future)
+                for o, future in owned
+            }
+            # Rule-decided companies stream out while the rest wait for one batched analysis
+            ambiguous = []
+            for done in as_completed(pending):
+                outcome, future = pending[done]
+                sig = done.result()
+                if sig:
+                    decided, result = attempt(outcome, resolve_by_rules, sig) or (True, None)
+                    if not decided:
+                        ambiguous.append((outcome, future, sig))
+                        continue
+                    outcome["result"] = result
+                yield settle(outcome, future)
+
+            batch = []
+            for i, (_, _, sig) in enumerate(ambiguous):
+                text_content, careers_text = llm_page_content(sig)
+                batch.append({"id": str(i), "name": sig["name"], "url": sig["url"],
+                              "text_content": text_content, "careers_text": careers_text})
+            failed = set()
+            analyses = analyze_companies_batch(batch, failed=failed)
+            for i, (outcome, future, sig) in enumerate(ambiguous):
+                outcome["result"] = attempt(outcome, finalize_company, sig, analyses.get(str(i)))
+                outcome["llm_failed"] = str(i) in failed
+                yield settle(outcome, future)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        # Never leave duplicates waiting, even if the consumer stopped early or a step raised
+        for outcome, future in owned:
+            if not future.done():
+                outcome["error"] = outcome["error"] or "Validation did not finish"
+                future.set_result(dict(outcome))
+
+    for outcome, (future, is_owner) in zip(outcomes, claims):
+        if not is_owner:
+            shared = future.result()
+            outcome.update(result=shared["result"], error=shared["error"], llm_failed=shared["llm_failed"],
+                           duplicate=True)
+            yield outcome
+
+def validate_candidates(candidates, max_workers=None, registry=None, batch_llm=None):
+    """
+    Validates search hits concurrently (see iter_validate_candidates).
+
+    Returns:
+        List of outcome dicts in the same order as candidates
+    """
+    outcomes = iter_validate_candidates(candidates, max_workers=max_workers, registry=registry, batch_llm=batch_llm)
+    return sorted(outcomes, key=lambda o: o["index"])
+
+def search_candidates(query, num_results=5):
+    """Runs the search for a query and drops results that aren't company sites."""
+    return filter_candidates(search_companies(query, max_results=num_results))
+
+def filter_candidates(raw_results):
+    """Drops search results that aren't company sites, before anything is fetched."""
+    candidates, skipped = prefilter_results(raw_results)
+    count("prefilter_results", len(candidates), result="kept")
+    for reason in skipped.values():
+        count("prefilter_results", result="denied" if reason == "denied domain" else "low_score")
+    return candidates
+
+def process_query(query, num_results=5, max_workers=None, registry=None, batch_llm=None):
     """
     Runs the full process for a single query.
+    Pass the same DomainRegistry to every query of a run so that each domain
+    is validated and returned only once.
+    """
+    candidates = search_candidates(query, num_results)
+    outcomes = validate_candidates(candidates, max_workers=max_workers, registry=registry, batch_llm=batch_llm)
+    return [o["result"] for o in outcomes if o["result"] and not o["duplicate"]]
+
+def run_pipeline(queries, num_results=5, max_workers=None, registry=None, batch_llm=None, journal=None, run_id=None,
+                 batch_search=None, planner=None):
     """
-    raw_results = search_companies(query, max_results=num_results)
-    validated_companies = []
+    Streams a research run (search -> fetch -> validate -> analyze), query by query,
+    so callers can show each company as soon as it is validated.
     
-    for r in raw_results:
-        # DDG returns 'title', 'href', 'body'
-        name = r.get('title', 'Unknown')
-        url = r.get('href', '')
+    Args:
+        queries: Search queries, run in order
+        num_results, max_workers, batch_llm: As for process_query
+        registry: DomainRegistry for the run (a new one by default)
+        journal: Optional RunJournal recording completed work as it happens
+        run_id: Journaled run to resume; its recorded companies are replayed and
+            completed queries and validated domains are skipped
+        batch_search: Search the next SEARCH_BATCH_SIZE queries with one bulk request
+            instead of one request per query (defaults to SEARCH_BATCH_ENABLED)
+        planner: Optional QueryPlanner recording each finished query's yield
+            (searches answered by the search cache aren't recorded)
         
-        # Basic filter to avoid garbage sites
-        if "linkedin.com" in url or "clutch.co" in url or "upwork.com" in url:
-            continue
-            
-        company_data = validate_company(name, url)
-        if company_data:
-            validated_companies.append(company_data)
-            
-    return validated_companies
+    Yields:
+        Event dicts, with an 'event' key of:
+        - "run_started": 'run_id', 'resumed' (only with a journal)
+        - "query_started": 'query', 'index'
+        - "query_skipped": 'query', 'index' (already completed in a resumed run)
+        - "searched": 'query', 'candidates' (number of hits to validate)
+        - "validated": 'query', 'outcome' (every settled candidate, see iter_validate_candidates)
+        - "company": 'query', 'record', 'resumed' (each accepted company, once per domain)
+        - "query_failed": 'query', 'error'
+        - "query_done": 'query', 'index', 'companies' (accepted in this query)
+    """
+    queries = list(queries)
+    registry = registry if registry is not None else DomainRegistry()
+    batch_search = SEARCH_BATCH_ENABLED if batch_search is None else batch_search
+    resumed = journal is not None and run_id is not None
+    completed = set()
+    if journal is not None:
+        if resumed:
+            journal.set_status(run_id, "running")
+            completed = journal.completed_queries(run_id)
+        else:
+            run_id = journal.start_run({"queries": queries, "num_results": num_results, "batch_llm": batch_llm,
+                                        "batch_search": batch_search})
+
+    searched = {}
+    search_share = 0.0
+    cached = set()
+    status = "interrupted"
+    try:
+        if journal is not None:
+            yield {"event": "run_started", "run_id": run_id, "resumed": resumed}
+        if resumed:
+            for recorded in journal.outcomes(run_id):
+                registry.preload(recorded["url"], {**recorded, "error": None, "duplicate": False, "llm_failed": False})
+                if recorded["result"]:
+                    yield {"event": "company", "query": recorded["query"], "record": recorded["result"], "resumed": True}
+
+        for index, query in enumerate(queries):
+            if query in completed:
+                yield {"event": "query_skipped", "query": query, "index": index}
+                continue
+            yield {"event": "query_started", "query": query, "index": index}
+            started = time.monotonic()
+            found = 0
+            llm_failed = errored = 0
+            try:
+                if batch_search:
+                    if query not in searched:
+                        upcoming = [q for q in queries[index:] if q not in completed][:SEARCH_BATCH_SIZE]
+                        cached = {q for q in upcoming if search_is_cached(q, num_results)}
+                        batch_started = time.monotonic()
+                        searched = search_companies_batch(upcoming, num_results)
+                        search_share = (time.monotonic() - batch_started) / len(upcoming)
+                    # Each query of a batch is timed with an equal share of the bulk search
+                    started = time.monotonic() - search_share
+                    raw_results = searched.pop(query)
+                    if isinstance(raw_results, Exception):
+                        raise raw_results
+                    candidates = filter_candidates(raw_results)
+                else:
+                    cached = {query} if search_is_cached(query, num_results) else set()
+                    candidates = search_candidates(query, num_results)
+                yield {"event": "searched", "query": query, "candidates": len(candidates)}
+                for outcome in iter_validate_candidates(candidates, max_workers=max_workers, registry=registry, batch_llm=batch_llm):
+                    if outcome["llm_failed"] and not outcome["duplicate"]:
+                        # Keyword-only verdict: left out of the journal so a resume analyzes it again
+                        llm_failed += 1
+                    elif outcome["error"] and not outcome["duplicate"]:
+                        # Likely transient (fetch or validation error): also left for the resume
+                        errored += 1
+                    elif journal is not None and not outcome["duplicate"]:
+                        journal.record_outcome(run_id, query, outcome)
+                    yield {"event": "validated", "query": query, "outcome": outcome}
+                    if outcome["result"] and not outcome["duplicate"]:
+                        found += 1
+                        yield {"event": "company", "query": query, "record": outcome["result"], "resumed": False}
+                # An empty search may be a quota or network failure, so it is retried on resume,
+                # and so is a query whose candidates couldn't all be validated and analyzed
+                if llm_failed or errored:
+                    print(f"{llm_failed} LLM failure(s) and {errored} validation error(s) for '{query}'; "
+                          f"the query stays incomplete")
+                elif journal is not None and candidates:
+                    journal.complete_query(run_id, query, found)
+                # Cached hits say nothing new about the query's yield and cost no credits
+                if planner is not None and candidates and not (llm_failed or errored) and query not in cached:
+                    planner.record(query, [c.get("href") for c in candidates], found,
+                                   search_credits(num_results), time.monotonic() - started)
+            except Exception as e:
+                print(f"Error processing query '{query}': {e}")
+                yield {"event": "query_failed", "query": query, "error": str(e)}
+            yield {"event": "query_done", "query": query, "index": index, "companies": found}
+        status = "completed"
+    finally:
+        if journal is not None:
+            journal.set_status(run_id, status)
+
+def resume_run(journal, run_id, **kwargs):
+    """
+    Resumes a journaled run with its recorded settings (see run_pipeline).
+    Extra keyword arguments (e.g. max_workers) are passed through.
+    """
+    run = journal.get_run(run_id)
+    if run is None:
+        raise ValueError(f"Unknown run: {run_id}")
+    params = run["params"]
+    return run_pipeline(
+        params["queries"], num_results=params.get("num_results", 5), batch_llm=params.get("batch_llm"),
+        batch_search=params.get("batch_search"), journal=journal, run_id=run_id, **kwargs
+    )
+
+async def arun_pipeline(queries, **kwargs):
+    """
+    Async-iterator form of run_pipeline: the pipeline runs in a worker thread
+    and events are handed to the event loop as they arrive.
+    """
+    events = run_pipeline(queries, **kwargs)
+    done = object()
+    # One thread drives the generator, so closing it is queued behind an
+    # in-flight next() (e.g. when the consumer is cancelled) instead of
+    # raising "generator already executing" and skipping its cleanup
+    driver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline")
+    try:
+        while True:
+            event = await asyncio.wrap_future(driver.submit(next, events, done))
+            if event is done:
+                break
+            yield event
+    finally:
+        driver.submit(events.close)
+        driver.shutdown(wait=False)
+
+def enrich_linkedin_searches(companies):
+    """
+    Replaces template LinkedIn search strings with LLM-generated ones, in place,
+    using batched LLM requests of LLM_BATCH_SIZE companies each.
+    
+    Args:
+        companies: Company records from validate_company (e.g. the rows being viewed or exported)
+        
+    Returns:
+        The same list of records
+    """
+    pending = [c for c in companies if c.get("linkedin_source") != "llm"]
+    if not pending:
+        return companies
+
+    searches = generate_linkedin_searches_batch([
+        {"name": c["Company"], "description": c.get("linkedin_description", ""), "llm_analysis": c.get("llm_analysis")}
+        for c in pending
+    ])
+    for company, company_searches in zip(pending, searches):
+        if company_searches != linkedin_search_templates(company["Company"]):
+            company["LinkedIn Search Strings"] = " | ".join(company_searches[:3])
+            company["linkedin_source"] = "llm"
+    return companies
+
+# Rows enriched in the background as soon as a run finishes (what users see first)
+LINKEDIN_PREFETCH_ROWS = int(os.getenv("LINKEDIN_PREFETCH_ROWS", "10"))
+
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="linkedin")
+
+def enrich_linkedin_searches_async(companies):
+    """
+    Runs enrich_linkedin_searches in a background thread.
+    
+    Returns:
+        concurrent.futures.Future resolving to the enriched records
+    """
+    return _background.submit(enrich_linkedin_searches, companies)
 
 def generate_summary(df):
     """
@@ -1,12 +1,17 @@
 import streamlit as st
 import pandas as pd
-from agent_logic import process_query, HIGH_INTENT_QUERIES, generate_summary, validate_company, search_companies
-import time
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load .env before the modules that read their settings at import time
 load_dotenv()
 
+from agent_logic import run_pipeline, HIGH_INTENT_QUERIES, generate_summary, validate_company, search_companies, VALIDATION_WORKERS, search_cache_stats, DomainRegistry, LLM_BATCH_ENABLED, cascade_stats, reset_cascade_stats, enrich_linkedin_searches, enrich_linkedin_searches_async, LINKEDIN_PREFETCH_ROWS, resume_run, search_credits, search_is_cached
+from run_journal import get_run_journal
+from query_planner import get_query_planner
+from metrics import reset_metrics, metrics_report, prometheus_text, metrics_enabled
+import time
+import json
+
 # Page Config
 st.set_page_config(
     page_title="Company Research Agent",
@@ -31,94 +36,194 @@ selected_queries = st.sidebar.multiselect(
 )
 
 num_results = st.sidebar.slider("Max Results Per Query", min_value=1, max_value=20, value=5)
+max_workers = st.sidebar.slider("Parallel Validations", min_value=1, max_value=max(32, VALIDATION_WORKERS),
+                                value=max(1, VALIDATION_WORKERS))
+batch_llm = st.sidebar.checkbox("Batch LLM analysis", value=LLM_BATCH_ENABLED, help="Analyze several companies per LLM request")
+
+# Query yield is recorded across runs and used to order and prune the selection
+planner = get_query_planner()
+plan_queries = planner is not None and st.sidebar.checkbox(
+    "Prioritize by past yield", value=True,
+    help="Run the queries that found the most new partners per search credit first and skip saturated ones"
+)
+credit_budget = st.sidebar.number_input(
+    "Search credit budget (0 = no limit)", min_value=0, value=0, step=5, disabled=not plan_queries
+)
 
 run_btn = st.sidebar.button("Start Research", type="primary")
 
+def results_frame(companies):
+    df = pd.DataFrame(companies)
+    
+    # Reorder columns matches user request: Company | Website | Why It Fits | Evidence | LinkedIn Search Strings
+    cols = ["Company", "Website", "Why It Fits", "Evidence", "LinkedIn Search Strings"]
+    # Ensure all cols exist
+    for col in cols:
+        if col not in df.columns:
+            df[col] = "" # Should satisfy
+    
+    return df[cols]
+
+# Past runs can be resumed after a crash, quota error or rerun
+journal = get_run_journal()
+resume_id = None
+past_runs = journal.list_runs() if journal else []
+if past_runs:
+    st.sidebar.subheader("Past Runs")
+    run_labels = {
+        r["run_id"]: f"{r['run_id']} · {r['status']} · {r['queries_done']}/{len(r['params']['queries'])} queries · {r['companies']} partners"
+        for r in past_runs
+    }
+    chosen_run = st.sidebar.selectbox("Run", list(run_labels), format_func=run_labels.get)
+    if st.sidebar.button("Resume Run", help="Continue the run, skipping queries and companies it already finished"):
+        resume_id = chosen_run
+
 # Main Area
-if run_btn:
-    if not selected_queries:
+if run_btn or resume_id:
+    if run_btn and not selected_queries:
         st.warning("Please select at least one query.")
     else:
-        results_container = st.container()
         status_text = st.empty()
         progress_bar = st.progress(0)
+        throughput_text = st.empty()
+        live_table = st.empty()
         
         all_companies = []
-        total_queries = len(selected_queries)
+        # Shared across queries so a firm returned by several queries is validated once
+        registry = DomainRegistry()
+        reset_cascade_stats()
+        reset_metrics()
         
-        for i, query in enumerate(selected_queries):
-            status_text.text(f"Running Query {i+1}/{total_queries}: {query}")
-            
-            # Run search and validation
-            # We need to adapt the logic slightly to be more stream-friendly if possible,
-            # but for now, we'll just run the function.
-            
-            # To provide better feedback, let's break down the process_query inside app.py or modify agent_logic
-            # But adhering to the plan, we use the imported logic.
-            # However, `process_query` in agent_logic does it all.
-            # Let's import the components to show progress if we want, or just call process_query.
-            
-            try:
-                # Direct call for simplicity
-                companies = process_query(query, num_results=num_results)
-                
-                # Check for duplicates before adding
-                existing_urls = {c['Website'] for c in all_companies}
-                for c in companies:
-                    if c['Website'] not in existing_urls:
-                        all_companies.append(c)
-                        existing_urls.add(c['Website'])
-                        
-            except Exception as e:
-                st.error(f"Error processing query '{query}': {e}")
-            
-            progress_bar.progress((i + 1) / total_queries)
-            
+        if resume_id:
+            queries = journal.get_run(resume_id)["params"]["queries"]
+            events = resume_run(journal, resume_id, max_workers=max_workers, registry=registry, planner=planner)
+        else:
+            queries = selected_queries
+            if plan_queries:
+                queries, skipped = planner.plan(
+                    selected_queries, credits_per_query=search_credits(num_results),
+                    credit_budget=credit_budget or None,
+                    cached=[q for q in selected_queries if search_is_cached(q, num_results)]
+                )
+                if skipped:
+                    st.info("Skipped queries:\n" + "\n".join(f"- {q}: {reason}" for q, reason in skipped.items()))
+            events = run_pipeline(queries, num_results=num_results, max_workers=max_workers, registry=registry, batch_llm=batch_llm, journal=journal, planner=planner)
+        total_queries = max(len(queries), 1)
+        
+        started = time.monotonic()
+        validated = 0
+        query_index, query_candidates, query_validated = 0, 0, 0
+        
+        # Rows are shown as soon as each company is validated
+        for event in events:
+            kind = event["event"]
+            if kind == "run_started":
+                st.caption(f"Run id: {event['run_id']}" + (" (resumed)" if event["resumed"] else ""))
+            elif kind == "query_started":
+                query_index, query_candidates, query_validated = event["index"], 0, 0
+                status_text.text(f"Running Query {query_index+1}/{total_queries}: {event['query']}")
+            elif kind == "searched":
+                query_candidates = event["candidates"]
+            elif kind == "validated":
+                validated += 1
+                query_validated += 1
+                elapsed = max(time.monotonic() - started, 1e-6)
+                throughput_text.caption(
+                    f"{validated} candidates validated, {len(all_companies)} partners found "
+                    f"({validated / elapsed * 60:.1f} companies/min)"
+                )
+                if query_candidates:
+                    progress_bar.progress((query_index + query_validated / query_candidates) / total_queries)
+            elif kind == "company":
+                # The registry already returns each domain once per run
+                all_companies.append(event["record"])
+                live_table.dataframe(results_frame(all_companies), use_container_width=True)
+            elif kind == "query_failed":
+                st.error(f"Error processing query '{event['query']}': {event['error']}")
+            elif kind in ("query_done", "query_skipped"):
+                progress_bar.progress((event["index"] + 1) / total_queries)
+        
+        live_table.empty()
         status_text.text("Research Complete!")
+        cache_stats = search_cache_stats()
+        st.caption(f"Search cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['entries']} cached queries)")
+        tiers = cascade_stats()
+        st.caption(
+            f"Validation tiers: {tiers.get('rules_accept', 0)} accepted by rules, "
+            f"{tiers.get('rules_reject', 0) + tiers.get('body_shop', 0)} rejected by rules, "
+            f"{tiers.get('llm', 0)} sent to the LLM, {tiers.get('fetch_failed', 0)} unreachable"
+        )
+        st.session_state["metrics"] = metrics_report() if metrics_enabled() else None
+        st.session_state["metrics_prom"] = prometheus_text() if metrics_enabled() else None
         
-        # Display Results
-        if all_companies:
-            df = pd.DataFrame(all_companies)
-            
-            # Reorder columns matches user request: Company | Website | Why It Fits | Evidence | LinkedIn Search Strings
-            cols = ["Company", "Website", "Why It Fits", "Evidence", "LinkedIn Search Strings"]
-            # Ensure all cols exist
-            for col in cols:
-                if col not in df.columns:
-                    df[col] = "" # Should satisfy
-            
-            df = df[cols]
-            
-            st.subheader(" Identified Partners")
-            st.dataframe(df, use_container_width=True)
-            
-            st.subheader("Analysis & Summary")
-            summary = generate_summary(df)
-            st.markdown(summary)
-            
-            # Download
-            csv = df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                "Download Results (CSV)",
-                csv,
-                "partner_shortlist.csv",
-                "text/csv",
-                key='download-csv'
-            )
-            
-            # Markdown Table Export
-            md_table = df.to_markdown(index=False)
-            st.download_button(
-                "Download Results (Markdown)",
-                md_table,
-                "partner_shortlist.md",
-                "text/markdown",
-                key='download-md'
-            )
-            
-        else:
+        # Keep results across reruns so on-demand LinkedIn enrichment can update them
+        st.session_state["companies"] = all_companies
+        st.session_state["summary"] = None
+        st.session_state["linkedin_job"] = (
+            enrich_linkedin_searches_async(all_companies[:LINKEDIN_PREFETCH_ROWS]) if all_companies else None
+        )
+        
+        if not all_companies:
             st.info("No companies found that matched the strict validation criteria. Try increasing the number of results or selecting more queries.")
 
+# Display Results
+all_companies = st.session_state.get("companies")
+if all_companies:
+    st.subheader(" Identified Partners")
+    linkedin_job = st.session_state.get("linkedin_job")
+    if linkedin_job is not None and not linkedin_job.done():
+        st.caption(f"Generating AI LinkedIn search strings for the top {LINKEDIN_PREFETCH_ROWS} rows in the background; templates are shown until then.")
+        st.button("Refresh LinkedIn strings")
+    
+    df = results_frame(all_companies)
+    
+    st.dataframe(df, use_container_width=True)
+    
+    if any(c.get("linkedin_source") != "llm" for c in all_companies):
+        if st.button("Generate AI LinkedIn strings for all rows", help="Replace template search strings before exporting"):
+            with st.spinner("Generating LinkedIn search strings..."):
+                enrich_linkedin_searches(all_companies)
+            st.rerun()
+    
+    st.subheader("Analysis & Summary")
+    if st.session_state.get("summary") is None:
+        st.session_state["summary"] = generate_summary(df)
+    st.markdown(st.session_state["summary"])
+    
+    # Download
+    csv = df.to_csv(index=False).encode('utf-8')
+    st.download_button(
+        "Download Results (CSV)",
+        csv,
+        "partner_shortlist.csv",
+        "text/csv",
+        key='download-csv'
+    )
+    
+    # Markdown Table Export
+    md_table = df.to_markdown(index=False)
+    st.download_button(
+        "Download Results (Markdown)",
+        md_table,
+        "partner_shortlist.md",
+        "text/markdown",
+        key='download-md'
+    )
+
+# Where the last run spent its time
+run_metrics = st.session_state.get("metrics")
+if run_metrics:
+    with st.expander("Run Metrics"):
+        if run_metrics["spans"]:
+            spans = pd.DataFrame.from_dict(run_metrics["spans"], orient="index")
+            spans.index.name = "stage"
+            st.dataframe(spans.round(1), use_container_width=True)
+        if run_metrics["counters"]:
+            counters = pd.DataFrame(list(run_metrics["counters"].items()), columns=["counter", "value"])
+            st.dataframe(counters, use_container_width=True, hide_index=True)
+        st.download_button("Download Run Report (JSON)", json.dumps(run_metrics, indent=2), "run_metrics.json", "application/json", key="download-metrics-json")
+        st.download_button("Download Metrics (Prometheus)", st.session_state["metrics_prom"], "run_metrics.prom", "text/plain", key="download-metrics-prom")
+
 with st.expander("Usage Guide"):
     st.markdown("""
     1. **Select Queries**: Choose from the pre-defined high-intent search queries.
@@ -0,0 +1,455 @@
+"""
+Offline end-to-end benchmark.
+
+Starts one local HTTP server that stands in for everything the agent talks to:
+a synthetic corpus of company sites (reached through it as an HTTP proxy, so
+each firm keeps its own hostname such as http://firm7.test/), the Serper
+search API and an OpenAI-compatible chat completions API. Latency and error
+rate are configurable. The benchmark then drives validate_company (through
+the concurrent validate_candidates path) and process_query end to end and
+reports per-stage throughput, p50/p95 latency and peak memory.
+
+Examples:
+    python benchmark.py --sites 200 --queries 20 --site-latency 0.05
+    python benchmark.py --json report.json
+    python benchmark.py --baseline report.json --tolerance 0.25   # exit code 1 on regression
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import urlparse
+
+import agent_logic
+import llm_utils
+from agent_logic import DomainRegistry, configure_search_cache, process_query, validate_candidates
+from fetcher import configure_page_cache, get_session
+from llm_utils import configure_llm_cache, configure_llm_client
+from rate_limiter import RATE_LIMITS, configure_limiter
+
+# Site profiles, assigned round-robin: what the keyword checks will find on each site
+PROFILES = ["strong", "ambiguous", "none", "body_shop"]
+
+PROFILE_COPY = {
+    "strong": [
+        "A strategy consulting firm and trusted implementation partner in the SaaS ecosystem.",
+        "We deliver business outcomes, ROI and digital transformation through advisory work.",
+        "Our alliance with leading cloud platforms makes us a certified partner for enterprise programs.",
+    ],
+    "ambiguous": [
+        "We create value for our partners and help teams move faster.",
+        "Our people bring experience across many industries.",
+    ],
+    "none": [
+        "Welcome to our website. We make things that people like.",
+        "Read our latest news and updates below.",
+    ],
+    "body_shop": [
+        "Hire dedicated developers and engineers on demand.",
+        "Staff augmentation with vetted talent in every timezone.",
+    ],
+}
+
+CAREERS_COPY = {
+    "strong": ["Open roles: Management Consultant, Strategy Consultant, Business Analyst."],
+    "ambiguous": ["Open roles: Project Manager, Solutions Architect."],
+    "none": ["No open positions right now."],
+    "body_shop": ["Open roles: Software Engineer, Backend Developer, Frontend Developer, QA Engineer, DevOps Engineer, Data Engineer."],
+}
+
+FILLER = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt "
+    "ut labore et dolore magna aliqua. "
+)
+
+class SyntheticCorpus:
+    """
+    Deterministic set of company sites.
+
+    Args:
+        sites: Number of firms (firm0.test ... firmN.test)
+        page_kb: Approximate homepage size in KB (padded with filler paragraphs)
+        seed: Seed for query -> result selection
+    """
+
+    def __init__(self, sites=100, page_kb=30, seed=0):
+        self.sites = sites
+        self.page_kb = page_kb
+        self.seed = seed
+
+    def host(self, i):
+        return f"firm{i}.test"
+
+    def profile(self, i):
+        return PROFILES[i % len(PROFILES)]
+
+    def site_index(self, host):
+        match = re.fullmatch(r"firm(\d+)\.test", host or "")
+        if not match or int(match.group(1)) >= self.sites:
+            return None
+        return int(match.group(1))
+
+    def page(self, i, path):
+        """HTML for a path on site i, or None for unknown paths."""
+        profile = self.profile(i)
+        name = f"Firm {i}"
+        nav = '<nav><a href="/">Home</a> <a href="/about">About</a> <a href="/careers">Careers</a></nav>'
+        footer = f"<footer>Copyright {name}. Privacy policy. Cookie settings.</footer>"
+        if path in ("", "/"):
+            body = "".join(f"<p>{line}</p>" for line in PROFILE_COPY[profile])
+            filler_paragraphs = max(0, self.page_kb * 1024 // len(FILLER))
+            body += "".join(f"<p>{FILLER}</p>" for _ in range(filler_paragraphs))
+            return f"<html><head><title>{name}</title></head><body>{nav}<main><h1>{name}</h1>{body}</main>{footer}</body></html>"
+        if path.rstrip("/") == "/careers":
+            body = "".join(f"<p>{line}</p>" for line in CAREERS_COPY[profile])
+            return f"<html><head><title>{name} Careers</title></head><body>{nav}<main><h1>Careers</h1>{body}</main>{footer}</body></html>"
+        if path.rstrip("/") == "/about":
+            body = f"<p>{name} was founded in 2012 and has offices in three cities.</p>"
+            return f"<html><head><title>About {name}</title></head><body>{nav}<main><h1>About</h1>{body}</main>{footer}</body></html>"
+        return None
+
+    def search(self, query, num, page=1):
+        """Serper-style organic results: num consecutive firms starting at a query-dependent offset."""
+        start = random.Random(f"{self.seed}:{query}").randrange(self.sites) + (page - 1) * num
+        return [
+            {
+                "title": f"Firm {(start + k) % self.sites}",
+                "link": f"http://{self.host((start + k) % self.sites)}/",
+                "snippet": f"Firm {(start + k) % self.sites} consulting and delivery",
+            }
+            for k in range(min(num, self.sites))
+        ]
+
+def fake_analysis(profile_hint):
+    ready = profile_hint != "none"
+    return {
+        "is_partner_ready": ready,
+        "confidence": "medium",
+        "key_signals": ["partner language"] if ready else [],
+        "red_flags": [],
+        "positioning": "consulting-first" if ready else "unclear",
+        "partner_evidence": "Mentions partners",
+        "outcome_focus": "Some outcome language",
+        "reasoning": "Synthetic benchmark answer.",
+    }
+
+def fake_completion(messages):
+    """Content for the stand-in chat completions endpoint, shaped like the real prompts expect."""
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    prompt = next((m["content"] for m in messages if m["role"] == "user"), "")
+    if "LinkedIn" in system:
+        ids = re.findall(r"^id: (\d+)$", prompt, re.MULTILINE)
+        searches = ['site:linkedin.com/in/ "Firm" "Client Partner"', 'site:linkedin.com/in/ "Firm" "Practice Lead"']
+        return json.dumps({i: searches for i in ids} if ids else searches)
+    batch_ids = re.findall(r"=== Company id: (\S+) ===", prompt)
+    if batch_ids:
+        return json.dumps([{"id": i, **fake_analysis("ambiguous")} for i in batch_ids])
+    return json.dumps(fake_analysis("ambiguous"))
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, corpus, site_latency=0.0, search_latency=0.0, llm_latency=0.0, error_rate=0.0, seed=0):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.corpus = corpus
+        self.site_latency = site_latency
+        self.search_latency = search_latency
+        self.llm_latency = llm_latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def should_fail(self):
+        with self._random_lock:
+            return self._random.random() < self.error_rate
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        # Proxied site requests carry the absolute URL in the request line
+        target = urlparse(self.path)
+        host = target.hostname or (self.headers.get("Host") or "").split(":")[0]
+        index = self.server.corpus.site_index(host)
+        time.sleep(self.server.site_latency)
+        if index is None:
+            self._send(404, "unknown host", "text/plain")
+            return
+        if self.server.should_fail():
+            self._send(500, "synthetic error", "text/plain")
+            return
+        html = self.server.corpus.page(index, target.path)
+        if html is None:
+            self._send(404, "<html><body>Not found</body></html>", "text/html; charset=utf-8")
+        else:
+            self._send(200, html, "text/html; charset=utf-8")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        payload = self._read_json()
+        if path == "/search":
+            time.sleep(self.server.search_latency)
+            # A list payload is a bulk request, answered by a list of results
+            searches = payload if isinstance(payload, list) else [payload]
+            answers = [
+                {"organic": self.server.corpus.search(s.get("q", ""), int(s.get("num", 10)), int(s.get("page", 1)))}
+                for s in searches
+            ]
+            self._send(200, json.dumps(answers if isinstance(payload, list) else answers[0]), "application/json")
+        elif path.endswith("/chat/completions"):
+            time.sleep(self.server.llm_latency)
+            content = fake_completion(payload.get("messages", []))
+            self._send(200, json.dumps({
+                "id": "bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "bench"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }), "application/json")
+        else:
+            self._send(404, "{}", "application/json")
+
+@contextmanager
+def stand_in_services(server, respect_rate_limits=False):
+    """Runs the server and points the agent's search, LLM and page fetching at it."""
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    session = get_session()
+    previous_proxies = dict(session.proxies)
+    previous_serper = agent_logic.SERPER_URL
+    previous_llm = (llm_utils.OPENROUTER_BASE_URL, llm_utils.OPENROUTER_API_KEY)
+    try:
+        session.proxies = {"http": server.base_url}
+        agent_logic.SERPER_URL = f"{server.base_url}/search"
+        configure_llm_client(f"{server.base_url}/v1", "benchmark")
+        if not respect_rate_limits:
+            for provider in RATE_LIMITS:
+                configure_limiter(provider, 0, 1)
+        with patch.dict("os.environ", {"SERP_API_KEY": "benchmark"}):
+            yield server
+    finally:
+        session.proxies = previous_proxies
+        agent_logic.SERPER_URL = previous_serper
+        configure_llm_client(*previous_llm)
+        for provider, (rate, burst) in RATE_LIMITS.items():
+            configure_limiter(provider, rate, burst)
+        server.shutdown()
+        server.server_close()
+
+class StageTimer:
+    """Collects call durations per (phase, stage)."""
+
+    def __init__(self):
+        self.samples = {}
+        self.phase = None
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, ok=True):
+        with self._lock:
+            entry = self.samples.setdefault(self.phase, {}).setdefault(stage, {"durations": [], "errors": 0})
+            entry["durations"].append(seconds)
+            if not ok:
+                entry["errors"] += 1
+
+    def wrap(self, stage, func, ok=lambda result: result is not None):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                self.record(stage, time.perf_counter() - start, ok=False)
+                raise
+            self.record(stage, time.perf_counter() - start, ok=ok(result))
+            return result
+        return timed
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize_stage(entry, elapsed):
+    durations = entry["durations"]
+    return {
+        "count": len(durations),
+        "errors": entry["errors"],
+        "per_sec": len(durations) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(durations, 50) * 1000,
+        "p95_ms": percentile(durations, 95) * 1000,
+        "mean_ms": sum(durations) / len(durations) * 1000 if durations else 0.0,
+    }
+
+def run_benchmark(sites=100, queries=10, num_results=10, workers=8, page_kb=30, site_latency=0.02,
+                  search_latency=0.05, llm_latency=0.2, error_rate=0.0, batch_llm=False, seed=0,
+                  respect_rate_limits=False, trace_memory=False):
+    """
+    Runs both benchmark phases against the local stand-in services.
+
+    Returns:
+        Report dict: 'config', 'phases' ({phase: {'elapsed_s', 'stages': {stage: stats}}})
+        and 'memory' (max RSS, plus the tracemalloc peak with trace_memory, in MB)
+    """
+    config = {k: v for k, v in locals().items()}
+    corpus = SyntheticCorpus(sites, page_kb, seed)
+    server = StandInServer(corpus, site_latency, search_latency, llm_latency, error_rate, seed)
+    timer = StageTimer()
+    phases = {}
+
+    # Measure real work, not cache hits
+    configure_page_cache(enabled=False)
+    configure_search_cache(enabled=False)
+    configure_llm_cache(enabled=False)
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with stand_in_services(server, respect_rate_limits), \
+             patch.object(agent_logic, "get_page_content", timer.wrap("fetch", agent_logic.get_page_content)), \
+             patch.object(agent_logic, "search_companies", timer.wrap("search", agent_logic.search_companies, ok=bool)), \
+             patch.object(agent_logic, "validate_company", timer.wrap("validate_company", agent_logic.validate_company, ok=lambda r: True)), \
+             patch.object(llm_utils, "call_llm", timer.wrap("llm", llm_utils.call_llm)):
+
+            # Phase 1: every site through the concurrent validation path
+            timer.phase = "validate"
+            candidates = [{"title": f"Firm {i}", "href": f"http://{corpus.host(i)}/"} for i in range(sites)]
+            start = time.perf_counter()
+            validate_candidates(candidates, max_workers=workers, batch_llm=batch_llm)
+            phases["validate"] = time.perf_counter() - start
+
+            # Phase 2: full queries (search -> fetch -> validate -> analyze)
+            timer.phase = "pipeline"
+            process = timer.wrap("process_query", process_query, ok=lambda r: True)
+            start = time.perf_counter()
+            for q in range(queries):
+                process(f"benchmark query {q}", num_results=num_results, max_workers=workers,
+                        registry=DomainRegistry(), batch_llm=batch_llm)
+            phases["pipeline"] = time.perf_counter() - start
+    finally:
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        "config": config,
+        "phases": {
+            phase: {
+                "elapsed_s": elapsed,
+                "stages": {stage: summarize_stage(entry, elapsed) for stage, entry in timer.samples.get(phase, {}).items()},
+            }
+            for phase, elapsed in phases.items()
+        },
+        "memory": {
+            "peak_traced_mb": traced_peak / (1024 * 1024),
+            # ru_maxrss is in KB on Linux
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+    }
+
+def format_report(report):
+    lines = []
+    for phase, data in report["phases"].items():
+        lines.append(f"{phase} ({data['elapsed_s']:.2f}s)")
+        lines.append(f"  {'stage':<18}{'count':>7}{'errors':>8}{'per sec':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for stage, s in data["stages"].items():
+            lines.append(
+                f"  {stage:<18}{s['count']:>7}{s['errors']:>8}{s['per_sec']:>10.1f}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}"
+            )
+    memory = report["memory"]
+    lines.append(f"memory: peak traced {memory['peak_traced_mb']:.1f} MB, max RSS {memory['max_rss_mb']:.1f} MB")
+    return "\n".join(lines)
+
+def compare_reports(report, baseline, tolerance=0.2):
+    """
+    Lists stages that regressed against a baseline report: throughput down or
+    p95 latency up by more than tolerance (a fraction).
+    """
+    regressions = []
+    for phase, data in baseline.get("phases", {}).items():
+        current = report["phases"].get(phase, {}).get("stages", {})
+        for stage, base in data.get("stages", {}).items():
+            now = current.get(stage)
+            if now is None:
+                continue
+            if base["per_sec"] > 0 and now["per_sec"] < base["per_sec"] * (1 - tolerance):
+                regressions.append(f"{phase}/{stage}: {now['per_sec']:.1f}/s vs {base['per_sec']:.1f}/s baseline")
+            if base["p95_ms"] > 0 and now["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{phase}/{stage}: p95 {now['p95_ms']:.1f} ms vs {base['p95_ms']:.1f} ms baseline")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with local stand-in services")
+    parser.add_argument("--sites", type=int, default=100, help="Synthetic company sites (default: 100)")
+    parser.add_argument("--queries", type=int, default=10, help="Queries run through process_query (default: 10)")
+    parser.add_argument("--num-results", type=int, default=10, help="Search results per query (default: 10)")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel validations (default: 8)")
+    parser.add_argument("--page-kb", type=int, default=30, help="Approximate homepage size in KB (default: 30)")
+    parser.add_argument("--site-latency", type=float, default=0.02, help="Seconds per site request (default: 0.02)")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="Seconds per search request (default: 0.05)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per LLM request (default: 0.2)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of site requests answered with 500")
+    parser.add_argument("--batch-llm", action="store_true", help="Use batched LLM analysis")
+    parser.add_argument("--respect-rate-limits", action="store_true", help="Keep the configured API rate limits")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also report the tracemalloc peak (slows the run down considerably)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Compare against an earlier --json report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression fraction (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        sites=args.sites, queries=args.queries, num_results=args.num_results, workers=args.workers,
+        page_kb=args.page_kb, site_latency=args.site_latency, search_latency=args.search_latency,
+        llm_latency=args.llm_latency, error_rate=args.error_rate, batch_llm=args.batch_llm, seed=args.seed,
+        respect_rate_limits=args.respect_rate_limits, trace_memory=args.trace_memory,
+    )
+    print(format_report(report), file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
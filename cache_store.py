@@ -0,0 +1,206 @@
+"""
+Persistent SQLite-backed caches.
+
+Entries live under CACHE_DIR so repeat runs of the same queries can reuse
+earlier downloads instead of fetching everything again.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from url_utils import normalize_url
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", str(24 * 3600)))  # Seconds before a page is revalidated
+PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # Seconds before an unconfirmed page is purged
+PURGE_EVERY = 100  # Writes between purges of expired entries
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+CachedPage = namedtuple("CachedPage", ["url", "body", "etag", "last_modified", "fetched_at"])
+
+def connect(path):
+    """Opens a SQLite database shared between worker threads."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+class PageCache:
+    """
+    On-disk cache of fetched pages keyed by normalized URL.
+
+    Each entry keeps the body, the ETag / Last-Modified validators and the
+    time it was last confirmed, so stale entries can be revalidated with a
+    conditional request instead of a full download. Entries not confirmed for
+    max_age seconds are purged.
+    """
+
+    def __init__(self, path=None, ttl=None, max_age=None):
+        self.path = path or os.path.join(CACHE_DIR, "pages.sqlite")
+        self.ttl = PAGE_CACHE_TTL if ttl is None else ttl
+        self.max_age = PAGE_CACHE_MAX_AGE if max_age is None else max(max_age, self.ttl)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        with self._lock:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_fetched ON pages (fetched_at)")
+            self._purge()
+            self._conn.commit()
+
+    def get(self, url):
+        """Returns the CachedPage for url (fresh or stale), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, body, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (normalize_url(url),),
+            ).fetchone()
+        return CachedPage(*row) if row else None
+
+    def is_fresh(self, entry):
+        return time.time() - entry.fetched_at < self.ttl
+
+    def put(self, url, body, etag=None, last_modified=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(url), body, etag, last_modified, time.time()),
+            )
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self._purge()
+            self._conn.commit()
+
+    def _purge(self):
+        self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.max_age,))
+
+    def touch(self, url):
+        """Marks an entry as freshly validated (after a 304 Not Modified)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ? WHERE url = ?",
+                (time.time(), normalize_url(url)),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+
+class ResultCache:
+    """
+    Persistent key/value cache for JSON-serializable results.
+
+    Entries expire after ttl seconds. When max_bytes is set, the least
+    recently used entries are evicted once the stored values exceed it.
+    Tracks hit/miss counts so callers can report how much work was saved.
+    """
+
+    def __init__(self, name, path=None, ttl=None, max_bytes=None):
+        self.name = name
+        self.path = path or os.path.join(CACHE_DIR, f"{name}.sqlite")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        with self._lock:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL DEFAULT 0,
+                    size INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created_at)")
+            self._conn.commit()
+            # Running total of stored bytes, so puts don't have to sum the table
+            self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key):
+        """Returns the cached value for key, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row and (self.ttl is None or time.time() - row[1] < self.ttl):
+                self.hits += 1
+                if self.max_bytes:
+                    self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+                return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def contains(self, key):
+        """Whether get(key) would hit, without counting a hit or miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT created_at FROM entries WHERE key = ?", (key,)).fetchone()
+        return bool(row) and (self.ttl is None or time.time() - row[0] < self.ttl)
+
+    def put(self, key, value):
+        data = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, data, now, now, len(data)),
+            )
+            self._total += len(data) - (old[0] if old else 0)
+            if self.ttl is not None:
+                self._purge_expired()
+            self._evict()
+            self._conn.commit()
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl
+        self._total -= self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE created_at < ?", (cutoff,)
+        ).fetchone()[0]
+        self._conn.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,))
+
+    def _evict(self):
+        if not self.max_bytes or self._total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at ASC"
+        ).fetchall():
+            if self._total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._total -= size
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._total = 0
@@ -0,0 +1,272 @@
+"""
+Careers page discovery.
+
+Homepage links are ranked by how much their URL and link text look like a
+careers page, and a confident match is used without any extra requests.
+Otherwise the common careers paths are probed with HEAD requests while the
+site's sitemap.xml is read, all within one bounded wait. Probe and sitemap
+results (including misses) are memoized per registrable domain, so each site
+is only probed once per process.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from urllib.parse import urljoin, urlparse
+from fetcher import fetch_page, probe_url
+from url_utils import registrable_domain
+from metrics import span, count
+
+# Paths probed when the homepage has no convincing careers link, in order of preference
+CAREERS_PATHS = ("/careers", "/jobs", "/join-us")
+CAREERS_PROBE_ENABLED = os.getenv("CAREERS_PROBE_ENABLED", "1") != "0"
+CAREERS_PROBE_TIMEOUT = float(os.getenv("CAREERS_PROBE_TIMEOUT", "6"))  # Seconds for all probes together
+CAREERS_PROBE_WORKERS = 16
+SITEMAP_MAX_BYTES = 512 * 1024
+SITEMAP_MAX_CHILDREN = 2  # Child sitemaps followed from a sitemap index
+SITEMAP_CONTENT_TYPES = ("application/xml", "text/xml", "text/plain")
+
+# Link scoring
+CAREERS_SEGMENTS = {"careers", "career", "jobs", "job", "join-us", "joinus", "join", "work-with-us",
+                    "hiring", "vacancies", "openings", "open-positions", "opportunities"}
+CAREERS_LABELS = {"careers", "career", "jobs", "join us", "join our team", "work with us", "we're hiring",
+                  "we are hiring", "open positions", "open roles", "vacancies", "career opportunities"}
+CAREERS_TEXT_TERMS = ("career", "job", "hiring", "join us", "work with us", "vacanc")
+NON_CAREERS_SEGMENTS = {"blog", "news", "article", "articles", "post", "posts", "press", "insights",
+                        "case-studies", "tag", "category", "events", "podcast"}
+# Hosted job boards count as part of the company's own site
+JOB_BOARD_DOMAINS = {"greenhouse.io", "lever.co", "workable.com", "ashbyhq.com", "bamboohr.com",
+                     "recruitee.com", "smartrecruiters.com", "breezy.hr", "teamtailor.com",
+                     "personio.de", "myworkdayjobs.com", "jobvite.com"}
+CONFIDENT_SCORE = 4  # Links scoring at least this are used without probing
+
+_LOC_PATTERN = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
+
+_executor = ThreadPoolExecutor(max_workers=CAREERS_PROBE_WORKERS, thread_name_prefix="careers-probe")
+
+def score_path(path):
+    """Scores a URL path by how much it looks like a careers page."""
+    segments = [s for s in path.lower().split("/") if s]
+    if not segments:
+        return 0
+    if NON_CAREERS_SEGMENTS.intersection(segments):
+        return -4
+    score = 0
+    if CAREERS_SEGMENTS.intersection(segments):
+        score += 4
+    elif "career" in path.lower() or "job" in path.lower():
+        score += 2
+    if len(segments) > 3:
+        score -= 1
+    return score
+
+def score_text(text):
+    """Scores link text by how much it looks like a careers link."""
+    text = " ".join(text.lower().split()).strip(" !.")
+    if text in CAREERS_LABELS:
+        return 3
+    return 1 if any(term in text for term in CAREERS_TEXT_TERMS) else 0
+
+def score_link(url, text, base_url):
+    """
+    Scores a homepage link as a careers page candidate.
+
+    Args:
+        url: Absolute link URL
+        text: Link text
+        base_url: Homepage URL
+
+    Returns:
+        Score (higher is more likely the careers page); links to unrelated sites score low
+    """
+    parsed = urlparse(url)
+    score = score_path(parsed.path) + score_text(text)
+    domain = registrable_domain(url)
+    if domain in JOB_BOARD_DOMAINS:
+        score += 1
+    elif domain != registrable_domain(base_url):
+        score -= 3
+    return score
+
+def rank_careers_links(soup, base_url):
+    """
+    Ranks the homepage's links as careers page candidates.
+
+    Returns:
+        List of (score, url) with a positive score, best first
+    """
+    scored = {}
+    for a in soup.find_all('a', href=True):
+        url = urljoin(base_url, a['href']).split("#")[0]
+        if urlparse(url).scheme not in ("http", "https"):
+            continue
+        score = score_link(url, a.get_text(" ", strip=True), base_url)
+        if score > 0 and score > scored.get(url, 0):
+            scored[url] = score
+    return sorted(((score, url) for url, score in scored.items()), key=lambda item: -item[0])
+
+def find_careers_page(soup, base_url):
+    """
+    Attempts to find the Careers page URL from the homepage soup.
+    Returns the best-ranked link, or None if no link looks like a careers page.
+    """
+    ranked = rank_careers_links(soup, base_url)
+    return ranked[0][1] if ranked else None
+
+def _origin(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme or 'http'}://{parsed.netloc}"
+
+def _probe_careers_path(origin, path, stop=None):
+    if stop is not None and stop.is_set():
+        return None
+    final_url = probe_url(origin + path)
+    # Sites without the page often redirect to the homepage instead of returning 404
+    if final_url and urlparse(final_url).path.strip("/"):
+        return final_url
+    return None
+
+def sitemap_urls(origin, stop=None):
+    """
+    Reads page URLs from a site's sitemap.xml, following a few child
+    sitemaps when it is a sitemap index.
+
+    Args:
+        origin: Site origin, e.g. 'https://acme.com'
+        stop: Optional threading.Event; once set, no further sitemaps are fetched
+    """
+    if stop is not None and stop.is_set():
+        return []
+    body = fetch_page(origin + "/sitemap.xml", max_bytes=SITEMAP_MAX_BYTES, content_types=SITEMAP_CONTENT_TYPES)
+    if not body:
+        return []
+    locs = _LOC_PATTERN.findall(body)
+    if "<sitemapindex" not in body.lower():
+        return locs
+    children = sorted(locs, key=lambda loc: not re.search(r"page|career|job", loc, re.IGNORECASE))
+    urls = []
+    for child in children[:SITEMAP_MAX_CHILDREN]:
+        if stop is not None and stop.is_set():
+            break
+        child_body = fetch_page(child, max_bytes=SITEMAP_MAX_BYTES, content_types=SITEMAP_CONTENT_TYPES)
+        if child_body:
+            urls.extend(_LOC_PATTERN.findall(child_body))
+    return urls
+
+def _careers_from_sitemap(origin, stop=None):
+    domain = registrable_domain(origin)
+    best = None
+    for url in sitemap_urls(origin, stop):
+        if registrable_domain(url) != domain:
+            continue
+        path = urlparse(url).path
+        score = score_path(path)
+        if score >= CONFIDENT_SCORE and (best is None or (-score, len(path)) < best[0]):
+            best = ((-score, len(path)), url)
+    return best[1] if best else None
+
+class CareersResolver:
+    """
+    Resolves a company's careers page, probing the site only when its homepage
+    links are not convincing. Probe results are memoized per registrable domain.
+    """
+
+    def __init__(self, probe=CAREERS_PROBE_ENABLED, timeout=CAREERS_PROBE_TIMEOUT):
+        self.probe = probe
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._memo = {}
+
+    def resolve(self, soup, base_url):
+        """
+        Args:
+            soup: Parsed homepage
+            base_url: Homepage URL
+
+        Returns:
+            Careers page URL, or None if none was found
+        """
+        ranked = rank_careers_links(soup, base_url)
+        if ranked and ranked[0][0] >= CONFIDENT_SCORE:
+            count("careers_resolved", source="link")
+            return ranked[0][1]
+        fallback = ranked[0][1] if ranked else None
+        if not self.probe:
+            return fallback
+
+        domain = registrable_domain(base_url)
+        with self._lock:
+            memoized = domain in self._memo
+            discovered = self._memo.get(domain)
+        if not memoized:
+            discovered, complete = self.discover(base_url)
+            if discovered or complete:
+                with self._lock:
+                    self._memo[domain] = discovered
+        if discovered:
+            count("careers_resolved", source="memo" if memoized else "probe")
+            return discovered
+        count("careers_resolved", source="weak_link" if fallback else "none")
+        return fallback
+
+    def discover(self, base_url):
+        """
+        Probes the common careers paths and reads the sitemap concurrently.
+
+        Hits are taken in preference order (CAREERS_PATHS, then the sitemap):
+        the lookup returns as soon as a hit has no unfinished, more preferred
+        lookup ahead of it. The remaining lookups are then cancelled, so they
+        don't hold the host's throttle slots or the probe workers.
+
+        Returns:
+            Tuple of (careers URL or None, whether the lookup finished in time)
+        """
+        origin = _origin(base_url)
+        stop = threading.Event()
+        futures = [_executor.submit(_probe_careers_path, origin, path, stop) for path in CAREERS_PATHS]
+        futures.append(_executor.submit(_careers_from_sitemap, origin, stop))
+        try:
+            with span("careers_probe"):
+                try:
+                    for _ in as_completed(futures, timeout=self.timeout):
+                        found = _first_preferred(futures)
+                        if found is not _PENDING:
+                            return found, True
+                except FutureTimeout:
+                    # Settle for the best hit that did arrive
+                    hits = [f.result() for f in futures if f.done() and not f.exception() and f.result()]
+                    return (hits[0], True) if hits else (None, False)
+            return None, True
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+
+    def forget(self, base_url=None):
+        """Drops the memoized result for one site, or all of them."""
+        with self._lock:
+            if base_url is None:
+                self._memo.clear()
+            else:
+                self._memo.pop(registrable_domain(base_url), None)
+
+_PENDING = object()
+
+def _first_preferred(futures):
+    """The first hit in futures order, None if all finished empty, or _PENDING while an earlier lookup runs."""
+    for future in futures:
+        if not future.done():
+            return _PENDING
+        if future.exception() is None and future.result():
+            return future.result()
+    return None
+
+_resolver = CareersResolver()
+
+def get_careers_resolver():
+    return _resolver
+
+def resolve_careers_page(soup, base_url):
+    """Resolves a company's careers page through the shared CareersResolver."""
+    return _resolver.resolve(soup, base_url)
@@ -0,0 +1,207 @@
+"""
+Headless command line entry point for unattended research sweeps.
+
+Examples:
+    python -m cli run --queries-file queries.txt --output results.jsonl --workers 16
+    python -m cli run --time-budget 3600 --output sweep.csv
+    python -m cli runs
+    python -m cli run --resume 20250101-020000-ab12cd --output sweep.jsonl
+    python -m cli run --plan --credit-budget 50 --output sweep.jsonl
+    python -m cli queries
+
+Companies are written to the output file as soon as they are validated.
+Runs are journaled, so a sweep stopped by its time budget (or a crash) can be
+continued with --resume. Each query's yield is recorded, and --plan runs the
+most productive queries first and skips saturated ones.
+"""
+
+import argparse
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Load .env before the modules that read their settings at import time
+load_dotenv()
+
+from agent_logic import (
+    HIGH_INTENT_QUERIES, DomainRegistry, run_pipeline, resume_run,
+    configure_search_cache, cascade_stats, reset_cascade_stats, search_credits, search_is_cached
+)
+from fetcher import configure_page_cache
+from llm_utils import configure_llm_cache, LLM_BATCH_ENABLED
+from run_journal import configure_run_journal, get_run_journal
+from query_planner import configure_query_planner, get_query_planner
+from result_writers import open_writer, WRITERS
+from metrics import reset_metrics, write_metrics_report, write_prometheus, start_metrics_server
+
+def read_queries(paths):
+    """Reads queries from text files: one per line, blank lines and '#' comments ignored."""
+    queries = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    queries.append(line)
+    return queries
+
+def configure_storage(cache_dir=None, use_cache=True, journal=True, planner=True):
+    """Points the caches, run journal and query stats at cache_dir (or their defaults)."""
+    def path(name):
+        return os.path.join(cache_dir, name) if cache_dir else None
+    configure_page_cache(path("pages.sqlite"), enabled=use_cache)
+    configure_search_cache(path("search.sqlite"), enabled=use_cache)
+    configure_llm_cache(path("llm.sqlite"), enabled=use_cache)
+    configure_run_journal(path("runs.sqlite"), enabled=journal)
+    configure_query_planner(path("queries.sqlite"), enabled=planner)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Company research agent (headless)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run a research sweep")
+    run.add_argument("--query", action="append", default=[], help="Search query (repeatable)")
+    run.add_argument("--queries-file", action="append", default=[], help="File with one query per line (repeatable)")
+    run.add_argument("--num-results", type=int, default=5, help="Search results per query (default: 5)")
+    run.add_argument("--workers", type=int, default=None, help="Parallel validations (default: VALIDATION_WORKERS)")
+    run.add_argument("--batch-llm", action=argparse.BooleanOptionalAction, default=LLM_BATCH_ENABLED,
+                     help="Analyze several companies per LLM request")
+    run.add_argument("--batch-search", action=argparse.BooleanOptionalAction, default=None,
+                     help="Search several queries per request (default: SEARCH_BATCH_ENABLED)")
+    run.add_argument("--output", default="partner_results.jsonl", help="Output file (.jsonl, .csv or .parquet)")
+    run.add_argument("--format", choices=sorted(WRITERS), help="Output format (default: from the file extension)")
+    run.add_argument("--time-budget", type=float, default=None,
+                     help="Stop after this many seconds; the run can be continued with --resume")
+    run.add_argument("--plan", action="store_true",
+                     help="Run the queries with the best past yield first and skip saturated ones")
+    run.add_argument("--credit-budget", type=float, default=None,
+                     help="Search credits the run may spend; lower-yield queries beyond it are dropped (implies --plan)")
+    run.add_argument("--resume", metavar="RUN_ID", help="Continue a journaled run (its queries and settings are reused)")
+    run.add_argument("--cache-dir", help="Directory for the caches and run journal (default: CACHE_DIR)")
+    run.add_argument("--no-cache", action="store_true", help="Don't read or write the page, search and LLM caches")
+    run.add_argument("--no-journal", action="store_true", help="Don't journal the run (it can't be resumed)")
+    run.add_argument("--metrics-json", help="Write a JSON run report (stage timings and counters) to this file")
+    run.add_argument("--metrics-prom", help="Write metrics in the Prometheus text format to this file")
+    run.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics at http://HOST:PORT/metrics during the run")
+    run.add_argument("--metrics-host", default=None,
+                     help="Interface for --metrics-port (default: METRICS_HOST, localhost only; 0.0.0.0 for all)")
+
+    runs = commands.add_parser("runs", help="List journaled runs")
+    runs.add_argument("--cache-dir", help="Directory for the caches and run journal (default: CACHE_DIR)")
+    runs.add_argument("--limit", type=int, default=20)
+
+    queries = commands.add_parser("queries", help="Show recorded yield per query")
+    queries.add_argument("--cache-dir", help="Directory for the caches and run journal (default: CACHE_DIR)")
+    return parser
+
+def log(message):
+    # stdout carries the validation log; progress goes to stderr
+    print(message, file=sys.stderr, flush=True)
+
+def command_run(args):
+    if args.resume and args.no_journal:
+        log("--resume needs the run journal")
+        return 2
+    configure_storage(args.cache_dir, use_cache=not args.no_cache, journal=not args.no_journal)
+    journal = get_run_journal()
+    planner = get_query_planner()
+    registry = DomainRegistry()
+    reset_cascade_stats()
+    reset_metrics()
+
+    if args.resume:
+        run = journal.get_run(args.resume)
+        if run is None:
+            log(f"Unknown run: {args.resume}")
+            return 2
+        events = resume_run(journal, args.resume, max_workers=args.workers, registry=registry, planner=planner)
+        total = len(run["params"]["queries"])
+    else:
+        queries = args.query + read_queries(args.queries_file) or HIGH_INTENT_QUERIES
+        if (args.plan or args.credit_budget is not None) and planner is not None:
+            queries, skipped = planner.plan(queries, credits_per_query=search_credits(args.num_results),
+                                            credit_budget=args.credit_budget, time_budget=args.time_budget,
+                                            cached=[q for q in queries if search_is_cached(q, args.num_results)])
+            for query, reason in skipped.items():
+                log(f"Skipping {query}: {reason}")
+        events = run_pipeline(queries, num_results=args.num_results, max_workers=args.workers,
+                              registry=registry, batch_llm=args.batch_llm, journal=journal,
+                              batch_search=args.batch_search, planner=planner)
+        total = len(queries)
+
+    writer = open_writer(args.output, args.format)
+    metrics_server = start_metrics_server(args.metrics_port, args.metrics_host) if args.metrics_port else None
+    started = time.monotonic()
+    run_id = None
+    validated = written = 0
+    out_of_time = False
+    try:
+        for event in events:
+            kind = event["event"]
+            if kind == "run_started":
+                run_id = event["run_id"]
+                log(f"Run {run_id}" + (" (resumed)" if event["resumed"] else ""))
+            elif kind == "query_started":
+                log(f"[{event['index'] + 1}/{total}] {event['query']}")
+            elif kind == "query_failed":
+                log(f"  failed: {event['error']}")
+            elif kind == "validated":
+                validated += 1
+            elif kind == "company":
+                writer.write({"Query": event["query"], **event["record"]})
+                written += 1
+            if args.time_budget is not None and time.monotonic() - started > args.time_budget:
+                out_of_time = True
+                break
+    finally:
+        events.close()
+        writer.close()
+        if args.metrics_json:
+            write_metrics_report(args.metrics_json)
+        if args.metrics_prom:
+            write_prometheus(args.metrics_prom)
+        if metrics_server:
+            metrics_server.shutdown()
+
+    elapsed = time.monotonic() - started
+    tiers = cascade_stats()
+    log(
+        f"{written} companies written to {args.output}; {validated} candidates validated in {elapsed:.0f}s "
+        f"({validated / max(elapsed, 1e-6) * 60:.1f}/min, {tiers.get('llm', 0)} sent to the LLM)"
+    )
+    if out_of_time:
+        log("Time budget reached." + (f" Continue with: python -m cli run --resume {run_id}" if run_id else ""))
+    return 0
+
+def command_runs(args):
+    configure_storage(args.cache_dir)
+    journal = get_run_journal()
+    for run in journal.list_runs(args.limit):
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["created_at"]))
+        print(f"{run['run_id']}  {created}  {run['status']:<11}  "
+              f"{run['queries_done']}/{len(run['params']['queries'])} queries  {run['companies']} companies")
+    return 0
+
+def command_queries(args):
+    configure_storage(args.cache_dir)
+    planner = get_query_planner()
+    if planner is None:
+        log("Query stats are disabled (QUERY_PLANNER_ENABLED=0)")
+        return 2
+    stats = sorted(planner.stats().items(), key=lambda item: -item[1]["companies"] / max(item[1]["credits"], 1))
+    for query, s in stats:
+        print(f"{s['companies'] / max(s['credits'], 1):6.2f}/credit  {s['runs']:>3} runs  {s['companies']:>4} companies  "
+              f"{s['new_domains']:>4}/{s['hits']:<4} new domains  {'saturated  ' if planner.is_saturated(s) else ''}{query}")
+    return 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        return command_run(args)
+    if args.command == "queries":
+        return command_queries(args)
+    return command_runs(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Bounded per-company crawl frontier.
+
+Partner and positioning signals usually live on pages like /partners,
+/services or /case-studies rather than on the homepage. The frontier ranks a
+homepage's internal links by URL and anchor text, and the top few are fetched
+concurrently under a per-company page, byte and time budget.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from urllib.parse import urlparse
+from url_utils import registrable_domain, canonicalize_url
+
+# Crawl budget per company (the careers page is not counted against max pages)
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "3"))
+CRAWL_MAX_BYTES = int(os.getenv("CRAWL_MAX_BYTES", str(1024 * 1024)))  # Shared by the extra pages
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "10"))  # Seconds to wait for a company's pages together
+CRAWL_WORKERS = 32
+
+# Path segments (and anchor words) of pages likely to carry partner / positioning signals
+SIGNAL_SEGMENTS = {
+    "partners": 5, "partner": 5, "partnerships": 5, "alliances": 4, "ecosystem": 4,
+    "services": 4, "what-we-do": 4, "case-studies": 4, "case-study": 4, "solutions": 3,
+    "approach": 3, "capabilities": 3, "clients": 3, "customers": 3, "work": 2, "our-work": 3,
+    "about": 2, "about-us": 2, "company": 1, "industries": 1,
+}
+SIGNAL_WORDS = {
+    "partner": 3, "partners": 3, "alliances": 3, "ecosystem": 3, "services": 2, "case studies": 2,
+    "what we do": 2, "solutions": 1, "approach": 1, "clients": 1, "our work": 1, "about": 1,
+}
+# Pages that never carry signals, or are fetched separately
+SKIP_SEGMENTS = {
+    "blog", "news", "press", "events", "podcast", "tag", "category", "careers", "career", "jobs",
+    "login", "signin", "sign-in", "register", "cart", "privacy", "privacy-policy", "terms", "cookies",
+    "legal", "contact", "contact-us", "feed", "search",
+}
+SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".mp4", ".xml", ".doc", ".docx")
+MAX_PATH_DEPTH = 3
+
+_executor = ThreadPoolExecutor(max_workers=CRAWL_WORKERS, thread_name_prefix="crawl")
+
+def score_link(url, text):
+    """
+    Scores an internal link by how likely its page is to carry partner or positioning signals.
+
+    Returns:
+        Score (0 or less means the link is not worth fetching)
+    """
+    path = urlparse(url).path.lower()
+    segments = [s for s in path.split("/") if s]
+    if not segments or len(segments) > MAX_PATH_DEPTH:
+        return 0
+    if path.endswith(SKIP_EXTENSIONS) or SKIP_SEGMENTS.intersection(segments):
+        return 0
+    score = max((SIGNAL_SEGMENTS.get(s, 0) for s in segments), default=0)
+    text = " ".join(text.lower().split())
+    score += max((weight for word, weight in SIGNAL_WORDS.items() if word in text), default=0)
+    # Shallow pages are overview pages; deep ones are usually single articles
+    return score - (len(segments) - 1)
+
+def rank_frontier(doc, exclude=(), limit=None):
+    """
+    Ranks a homepage's internal links for crawling.
+
+    Args:
+        doc: Homepage PageDocument
+        exclude: URLs that are fetched anyway (homepage, careers page)
+        limit: Maximum number of URLs to return (defaults to CRAWL_MAX_PAGES)
+
+    Returns:
+        List of page URLs, most promising first
+    """
+    limit = CRAWL_MAX_PAGES if limit is None else limit
+    domain = registrable_domain(doc.url or "")
+    seen = {canonicalize_url(u) for u in exclude if u}
+    scored = {}
+    for url, text in doc.links:
+        if urlparse(url).scheme not in ("http", "https") or registrable_domain(url) != domain:
+            continue
+        key = canonicalize_url(url)
+        if key in seen:
+            continue
+        score = score_link(url, text)
+        if score > 0 and score > scored.get(key, (0, None))[0]:
+            scored[key] = (score, url.split("#")[0])
+    ranked = sorted(scored.values(), key=lambda item: -item[0])
+    return [url for _, url in ranked[:limit]]
+
+def fetch_pages(jobs, timeout=None):
+    """
+    Runs page fetches concurrently within one time budget.
+
+    Args:
+        jobs: Dict of {url: zero-argument callable returning the page HTML}
+        timeout: Seconds to wait for all of them (defaults to CRAWL_TIMEOUT)
+
+    Returns:
+        Dict of {url: HTML} for the pages that arrived in time
+    """
+    timeout = CRAWL_TIMEOUT if timeout is None else timeout
+    futures = {_executor.submit(job): url for url, job in jobs.items()}
+    pages = {}
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            try:
+                html = future.result()
+            except Exception as e:
+                print(f"Error fetching {futures[future]}: {e}")
+                continue
+            if html:
+                pages[futures[future]] = html
+    except FutureTimeout:
+        late = [url for future, url in futures.items() if not future.done()]
+        print(f"Crawl budget exceeded, skipping: {', '.join(late)}")
+        for future in futures:
+            future.cancel()
+    return pages
+
+def page_byte_budget(page_count, max_bytes=None):
+    """Splits the per-company byte budget between the extra pages."""
+    max_bytes = CRAWL_MAX_BYTES if max_bytes is None else max_bytes
+    return max(1, max_bytes // max(1, page_count))
@@ -0,0 +1,491 @@
+"""
+Shared HTTP fetcher for company websites.
+
+All page downloads go through one pooled requests.Session so that the homepage and
+careers fetches for the same host reuse keep-alive connections, and requests to any
+one host are capped at PER_DOMAIN_LIMIT. Bodies are streamed and cut off at a byte
+cap, and non-HTML responses are rejected before their body is read. Successful
+pages are kept in a persistent PageCache and revalidated with conditional requests
+once their TTL expires.
+
+Slow and dead hosts are contained: connects and reads have separate timeouts and
+a whole download has a deadline, transient errors (connection resets, 429/502/
+503/504) get a bounded number of quick retries, and a per-host circuit breaker
+fails fast once a host keeps erroring. Host name lookups go through a DnsCache
+shared by all workers.
+"""
+
+import ipaddress
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util import connection as urllib3_connection
+from urllib3.util import make_headers
+from cache_store import PageCache
+from url_utils import get_host
+from metrics import count, record_error
+from rate_limiter import parse_retry_after, backoff_delay
+
+# Fetcher configuration
+MAX_PAGE_BYTES = int(os.getenv("MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+POOL_HOSTS = int(os.getenv("FETCH_POOL_HOSTS", "64"))  # Number of per-host pools kept alive
+POOL_SIZE_PER_HOST = int(os.getenv("FETCH_POOL_SIZE", "4"))  # Keep-alive connections per host
+CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("FETCH_READ_TIMEOUT", "10"))  # Longest wait for the next bytes
+DOWNLOAD_DEADLINE = float(os.getenv("FETCH_DEADLINE", "30"))  # Seconds for a whole page, so trickling hosts can't stall a worker
+PROBE_TIMEOUT = 5  # HEAD requests that only check a URL exists
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "1"))  # Retries for transient errors only
+RETRY_BACKOFF = 0.5  # Seconds before the first retry, doubled for each further one
+MAX_RETRY_WAIT = 5.0  # A longer Retry-After is not waited for
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+BREAKER_THRESHOLD = int(os.getenv("FETCH_BREAKER_THRESHOLD", "3"))  # Consecutive failures that open a host's circuit
+BREAKER_COOLDOWN = float(os.getenv("FETCH_BREAKER_COOLDOWN", "120"))  # Seconds before an open host is tried again
+DNS_CACHE_TTL = float(os.getenv("FETCH_DNS_CACHE_TTL", "300"))  # 0 disables the DNS cache
+DNS_NEGATIVE_TTL = 60.0  # Failed lookups are remembered this long
+CHUNK_SIZE = 16 * 1024
+PER_DOMAIN_LIMIT = int(os.getenv("PER_DOMAIN_LIMIT", "2"))  # Concurrent requests allowed per host
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") != "0"
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.1',
+    # gzip/deflate always, plus br/zstd when urllib3 can decode them
+    'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+}
+
+_session = None
+_session_lock = threading.Lock()
+_page_cache = None
+_page_cache_configured = False
+_original_create_connection = urllib3_connection.create_connection
+
+def get_session():
+    """Get the shared, lazily created HTTP session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE_PER_HOST)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(HEADERS)
+                if DNS_CACHE_TTL > 0:
+                    install_dns_cache(DnsCache(DNS_CACHE_TTL, DNS_NEGATIVE_TTL))
+                _session = session
+    return _session
+
+class DnsCache:
+    """
+    Thread-safe cache of getaddrinfo results, shared by all fetch workers.
+    Concurrent lookups of the same host wait for a single resolution.
+
+    Args:
+        ttl: Seconds a successful lookup is reused
+        negative_ttl: Seconds a failed lookup is remembered
+    """
+
+    def __init__(self, ttl, negative_ttl):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._host_locks = {}
+
+    def resolve(self, host, port):
+        """
+        Returns:
+            getaddrinfo results for (host, port); raises socket.gaierror for unknown hosts
+        """
+        key = (host.lower(), port)
+        with self._lock:
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+        try:
+            with host_lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    count("dns_lookups", result="cached")
+                    if isinstance(entry[1], Exception):
+                        raise entry[1]
+                    return entry[1]
+                count("dns_lookups", result="resolved")
+                try:
+                    infos = socket.getaddrinfo(host, port, urllib3_connection.allowed_gai_family(), socket.SOCK_STREAM)
+                except socket.gaierror as e:
+                    self._entries[key] = (time.monotonic() + self.negative_ttl, e)
+                    raise
+                self._entries[key] = (time.monotonic() + self.ttl, infos)
+                return infos
+        finally:
+            # Only lookups racing this one need the lock; later ones find the entry
+            with self._lock:
+                if self._host_locks.get(key) is host_lock:
+                    del self._host_locks[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._host_locks.clear()
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+def install_dns_cache(cache):
+    """
+    Routes urllib3's connections (and so every requests call in the process)
+    through cache; pass None to restore plain lookups.
+    """
+    if cache is None:
+        urllib3_connection.create_connection = _original_create_connection
+        return
+
+    def create_connection(address, *args, **kwargs):
+        host, port = address
+        host = host.strip("[]")
+        if _is_ip(host):
+            return _original_create_connection(address, *args, **kwargs)
+        error = None
+        for _, _, _, _, sockaddr in cache.resolve(host, port):
+            try:
+                return _original_create_connection((sockaddr[0], port), *args, **kwargs)
+            except OSError as e:
+                error = e
+        raise error or OSError(f"No addresses for {host}")
+
+    urllib3_connection.create_connection = create_connection
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After threshold consecutive failures (or one failure that shows the host
+    is unreachable) a host's circuit opens and requests to it fail fast. Once
+    the cooldown has passed a single trial request is let through: success
+    closes the circuit, failure opens it again.
+
+    Args:
+        threshold: Consecutive failures that open the circuit
+        cooldown: Seconds the circuit stays open
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def allow(self, url):
+        """Whether a request to the URL's host may be sent now."""
+        host = get_host(url)
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state["open_until"] is None:
+                return True
+            if time.monotonic() < state["open_until"] or state["trial"]:
+                return False
+            state["trial"] = True
+            return True
+
+    def record_success(self, url):
+        with self._lock:
+            self._hosts.pop(get_host(url), None)
+
+    def record_failure(self, url, unreachable=False):
+        host = get_host(url)
+        with self._lock:
+            state = self._hosts.setdefault(host, {"failures": 0, "open_until": None, "trial": False})
+            state["failures"] += 1
+            if unreachable or state["trial"] or state["failures"] >= self.threshold:
+                if state["open_until"] is None or state["trial"]:
+                    print(f"Circuit open for {host} after {state['failures']} failure(s)")
+                state["open_until"] = time.monotonic() + self.cooldown
+                state["trial"] = False
+
+    def is_open(self, url):
+        with self._lock:
+            state = self._hosts.get(get_host(url))
+            return bool(state and state["open_until"] and time.monotonic() < state["open_until"])
+
+_breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+
+def configure_circuit_breaker(threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+    """Replaces the per-host circuit breaker (clearing all host state)."""
+    global _breaker
+    _breaker = CircuitBreaker(threshold, cooldown)
+    return _breaker
+
+def is_unreachable(error):
+    """Whether a requests exception means the host can't be reached at all (DNS failure, refused, connect timeout)."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", None), ConnectTimeoutError)
+    return False
+
+class DeadlineExceeded(requests.Timeout):
+    """The page body did not arrive within DOWNLOAD_DEADLINE."""
+
+def fetch_retry_info(error):
+    """
+    Classifies a page fetch error.
+
+    Only errors a quick second attempt can fix are retried: connection resets
+    and 429/502/503/504 (unless Retry-After asks for more than MAX_RETRY_WAIT).
+    DNS failures, refused connections, timeouts and other 4xx are not.
+
+    Returns:
+        Tuple of (should retry, Retry-After seconds or None, whether it counts as a host failure)
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        retry_after = parse_retry_after(error.response.headers.get("Retry-After"))
+        retry = status in RETRYABLE_STATUSES and (retry_after is None or retry_after <= MAX_RETRY_WAIT)
+        return retry, retry_after, status >= 500
+    if is_unreachable(error) or isinstance(error, requests.Timeout):
+        # Waiting on the same dead or stalling host again would just repeat the timeout
+        return False, None, True
+    if isinstance(error, (requests.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+        return True, None, True
+    return False, None, False
+
+class HostThrottle:
+    """
+    Caps the number of concurrent requests against the same host.
+    """
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore_for(self, url):
+        host = get_host(url)
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.limit)
+            return self._semaphores[host]
+
+    @contextmanager
+    def hold(self, url):
+        with self._semaphore_for(url):
+            yield
+
+_host_throttle = HostThrottle(PER_DOMAIN_LIMIT)
+
+def set_per_host_limit(limit):
+    """Changes how many requests may run against one host at once."""
+    global _host_throttle
+    _host_throttle = HostThrottle(limit)
+
+def configure_page_cache(path=None, ttl=None, enabled=True, max_age=None):
+    """
+    Replaces the page cache used by fetch_page.
+
+    Args:
+        path: SQLite file (defaults to CACHE_DIR/pages.sqlite)
+        ttl: Seconds before an entry is revalidated
+        enabled: Set to False to disable page caching entirely
+        max_age: Seconds before an unconfirmed entry is purged (defaults to PAGE_CACHE_MAX_AGE)
+    """
+    global _page_cache, _page_cache_configured
+    with _session_lock:
+        _page_cache = PageCache(path, ttl, max_age) if enabled else None
+        _page_cache_configured = True
+    return _page_cache
+
+def get_page_cache():
+    """Get the shared page cache, or None if caching is disabled."""
+    if not _page_cache_configured:
+        configure_page_cache(enabled=PAGE_CACHE_ENABLED)
+    return _page_cache
+
+def is_html_content_type(content_type):
+    """
+    Checks whether a Content-Type header describes a page worth parsing.
+    A missing header is given the benefit of the doubt.
+    """
+    return _accepts_content_type(content_type, HTML_CONTENT_TYPES)
+
+def _accepts_content_type(content_type, content_types):
+    if not content_type:
+        return True
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type in content_types
+
+def _charset_from_content_type(content_type):
+    for param in (content_type or "").split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"\'')
+    return None
+
+def read_capped(response, max_bytes, deadline=None):
+    """
+    Streams a response body, stopping once max_bytes have been read.
+
+    Args:
+        response: Streamed response
+        max_bytes: Byte cap
+        deadline: Optional time.monotonic() value; DeadlineExceeded is raised once it passes
+
+    Returns:
+        Tuple of (body bytes, truncated flag)
+    """
+    chunks = []
+    total = 0
+    truncated = False
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        if deadline is not None and time.monotonic() > deadline:
+            raise DeadlineExceeded(f"Download took longer than {DOWNLOAD_DEADLINE:.0f}s")
+        if not chunk:
+            continue
+        remaining = max_bytes - total
+        # A body of exactly max_bytes is complete; only data past the cap truncates it
+        if len(chunk) > remaining:
+            chunks.append(chunk[:remaining])
+            total += remaining
+            truncated = True
+            break
+        chunks.append(chunk)
+        total += len(chunk)
+    return b"".join(chunks), truncated
+
+def decode_body(body, content_type):
+    """Decodes a page body using the declared charset, defaulting to UTF-8."""
+    encoding = _charset_from_content_type(content_type) or "utf-8"
+    try:
+        return body.decode(encoding, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+def fetch_page(url, max_bytes=None, content_types=HTML_CONTENT_TYPES):
+    """
+    Fetches an HTML page through the shared session and page cache.
+
+    Fresh cache entries are returned without touching the network; stale ones
+    are revalidated with If-None-Match / If-Modified-Since. Transient errors are
+    retried up to FETCH_RETRIES times, and hosts whose circuit is open are
+    skipped without a request.
+
+    Args:
+        url: Page URL
+        max_bytes: Byte cap for the (decompressed) body, defaults to MAX_PAGE_BYTES
+        content_types: Media types to accept (HTML by default)
+
+    Returns:
+        Page text, or None on errors and responses of another content type
+    """
+    max_bytes = max_bytes or MAX_PAGE_BYTES
+    cache = get_page_cache()
+    cached = cache.get(url) if cache else None
+    if cached and cache.is_fresh(cached):
+        count("cache_requests", cache="page", result="hit")
+        return cached.body
+
+    headers = {}
+    if cached:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    breaker = _breaker
+    attempt = 0
+    while True:
+        if not breaker.allow(url):
+            print(f"Skipping {url}: {get_host(url)} is failing")
+            count("fetch_short_circuited")
+            return None
+        try:
+            with _host_throttle.hold(url), \
+                    get_session().get(url, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                                      stream=True) as response:
+                if response.status_code == 304 and cached:
+                    breaker.record_success(url)
+                    cache.touch(url)
+                    count("cache_requests", cache="page", result="revalidated")
+                    return cached.body
+                response.raise_for_status()
+
+                content_type = response.headers.get("Content-Type", "")
+                if not _accepts_content_type(content_type, content_types):
+                    breaker.record_success(url)
+                    print(f"Skipping {url}: unexpected content ({content_type})")
+                    return None
+
+                body, truncated = read_capped(response, max_bytes, time.monotonic() + DOWNLOAD_DEADLINE)
+                breaker.record_success(url)
+                count("bytes_fetched", len(body))
+                if truncated:
+                    print(f"Truncated {url} at {max_bytes} bytes")
+                text = decode_body(body, content_type)
+
+                if cache and not truncated:
+                    # A capped body must not be served later to callers that want the whole page
+                    count("cache_requests", cache="page", result="miss")
+                    cache.put(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                return text
+        except Exception as e:
+            retry, retry_after, host_failure = fetch_retry_info(e)
+            if host_failure:
+                breaker.record_failure(url, unreachable=is_unreachable(e))
+            else:
+                # The host answered; a 404 or 429 says nothing about its health
+                breaker.record_success(url)
+            if retry and attempt < FETCH_RETRIES:
+                delay = backoff_delay(attempt, retry_after, base=RETRY_BACKOFF)
+                print(f"Retrying {url} after error ({e}) in {delay:.1f}s")
+                count("fetch_retries")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            print(f"Error fetching {url}: {e}")
+            record_error("fetch")
+            return None
+
+def probe_url(url, timeout=None):
+    """
+    Checks whether a URL serves an HTML page without downloading its body.
+
+    Sends a HEAD request (following redirects), falling back to a streamed GET
+    that is closed before the body is read for servers that reject HEAD.
+
+    Args:
+        url: URL to check
+        timeout: Request timeout in seconds, defaults to PROBE_TIMEOUT
+
+    Returns:
+        Final URL after redirects, or None on errors, error statuses and non-HTML responses
+    """
+    timeout = (min(CONNECT_TIMEOUT, timeout or PROBE_TIMEOUT), timeout or PROBE_TIMEOUT)
+    if not _breaker.allow(url):
+        count("fetch_short_circuited")
+        return None
+    try:
+        with _host_throttle.hold(url):
+            response = get_session().head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code in (405, 501):
+                with get_session().get(url, timeout=timeout, stream=True) as response:
+                    pass
+    except Exception as e:
+        print(f"Error probing {url}: {e}")
+        _breaker.record_failure(url, unreachable=is_unreachable(e))
+        return None
+    if response.status_code >= 500:
+        _breaker.record_failure(url)
+    else:
+        _breaker.record_success(url)
+    if response.status_code >= 400 or not is_html_content_type(response.headers.get("Content-Type", "")):
+        return None
+    return response.url
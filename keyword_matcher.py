@@ -0,0 +1,105 @@
+"""
+Compiled multi-keyword matching.
+
+A KeywordMatcher compiles one or more named keyword groups into a single
+alternation regex, so a page is scanned once regardless of how many keywords
+are checked. Matches respect word boundaries ("partner" does not match
+"partnership", "roi" does not match "heroic") while still accepting simple
+plurals ("partners", "business outcomes").
+"""
+
+import re
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+KeywordMatch = namedtuple("KeywordMatch", ["keyword", "group", "start", "end"])
+
+def _normalize(phrase):
+    return " ".join(phrase.lower().split())
+
+def _keyword_pattern(keyword):
+    # Any run of whitespace may separate the words of a phrase
+    return r"\s+".join(re.escape(word) for word in keyword.split())
+
+class KeywordScan:
+    """
+    Result of scanning a text: every match with its group and offsets.
+    """
+
+    def __init__(self, text, matches):
+        self.text = text
+        self.matches = matches
+
+    def for_group(self, group=None):
+        return [m for m in self.matches if group is None or m.group == group]
+
+    def keywords(self, group=None):
+        """Distinct matched keywords in order of first appearance."""
+        return list(dict.fromkeys(m.keyword for m in self.for_group(group)))
+
+    def counts(self, group=None):
+        return Counter(m.keyword for m in self.for_group(group))
+
+    def snippet(self, match, width=60):
+        """Text surrounding a match, trimmed to whole words where possible."""
+        start = max(0, match.start - width)
+        end = min(len(self.text), match.end + width)
+        excerpt = self.text[start:end]
+        if start > 0 and " " in excerpt:
+            excerpt = excerpt.split(" ", 1)[1]
+        if end < len(self.text) and " " in excerpt:
+            excerpt = excerpt.rsplit(" ", 1)[0]
+        prefix = "..." if start > 0 else ""
+        suffix = "..." if end < len(self.text) else ""
+        return f"{prefix}{excerpt.strip()}{suffix}"
+
+class KeywordMatcher:
+    """
+    Matches several keyword groups in one pass over a text.
+
+    Args:
+        groups: Dict of group name -> keywords, or a plain list of keywords
+            (placed in a single "default" group)
+        allow_plural: Also match keywords followed by "s" / "es"
+    """
+
+    def __init__(self, groups, allow_plural=True):
+        if not isinstance(groups, dict):
+            groups = {"default": groups}
+        self.groups = {name: list(keywords) for name, keywords in groups.items()}
+        self._lookup = {}
+        for name, keywords in self.groups.items():
+            for keyword in keywords:
+                self._lookup.setdefault(_normalize(keyword), (keyword, name))
+
+        if not self._lookup:
+            self._regex = None
+            return
+        # Longest first so "client partner" wins over "partner" at the same position.
+        # Each keyword gets its own named group: case-insensitive matches such as
+        # "İ" or "ſ" don't lowercase back to the keyword, so the text can't be the lookup key.
+        ordered = sorted(self._lookup, key=len, reverse=True)
+        self._by_group = {f"k{i}": self._lookup[k] for i, k in enumerate(ordered)}
+        alternation = "|".join(f"(?P<k{i}>{_keyword_pattern(k)})" for i, k in enumerate(ordered))
+        plural = r"(?:e?s)?" if allow_plural else ""
+        self._regex = re.compile(rf"(?<!\w)(?:{alternation}){plural}(?!\w)", re.IGNORECASE)
+
+    def scan(self, text):
+        if not text or self._regex is None:
+            return KeywordScan(text or "", [])
+        matches = []
+        for m in self._regex.finditer(text):
+            keyword, group = self._by_group[m.lastgroup]
+            matches.append(KeywordMatch(keyword, group, m.start(), m.end()))
+        return KeywordScan(text, matches)
+
+@lru_cache(maxsize=128)
+def _cached_matcher(groups):
+    return KeywordMatcher({name: list(keywords) for name, keywords in groups})
+
+def get_matcher(groups):
+    """
+    Returns a compiled matcher for a dict of keyword groups, reusing
+    previously compiled ones for identical keyword sets.
+    """
+    return _cached_matcher(tuple((name, tuple(keywords)) for name, keywords in groups.items()))
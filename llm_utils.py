@@ -4,24 +4,157 @@ LLM utilities for enhanced company analysis using stepfun/step-3.5-flash:free vi
 
 import os
 import json
-from openai import OpenAI
+import asyncio
+import hashlib
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import openai
+from openai import OpenAI, AsyncOpenAI
+from cache_store import ResultCache, LLM_CACHE_TTL, LLM_CACHE_MAX_BYTES
+from rate_limiter import call_with_retries, acall_with_retries, is_retryable_status, parse_retry_after
+from prompt_budget import count_tokens, fit_text
+from metrics import span, count, record_error
 
 # OpenRouter configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 MODEL_NAME = "stepfun/step-3.5-flash:free"
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))  # In-flight async requests per event loop
+
+# Batched analysis: whether it is on by default, companies per request and token budget per request
+LLM_BATCH_ENABLED = os.getenv("LLM_BATCH_ENABLED", "0") == "1"
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "5"))
+LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "12000"))
+LLM_BATCH_WORKERS = 4  # Batch requests sent in parallel
+ANALYSIS_MAX_TOKENS = 800  # Completion tokens for one company's analysis
+BATCH_TOKENS_PER_ANSWER = ANALYSIS_MAX_TOKENS  # Reserved per company in a batch, so answers aren't cut off
+BATCH_ANSWER_SLACK = 200  # Completion tokens for the array around a batch's answers
+
+# Tokens of page text sent per company
+HOMEPAGE_TOKENS = int(os.getenv("LLM_HOMEPAGE_TOKENS", "600"))
+CAREERS_TOKENS = int(os.getenv("LLM_CAREERS_TOKENS", "300"))
+
+_client = None
+_client_lock = threading.Lock()
+# Async clients and semaphores are bound to the event loop that uses them
+_async_state = weakref.WeakKeyDictionary()
+
+_llm_cache = None
+_llm_cache_configured = False
+_llm_cache_lock = threading.Lock()
+# Failed LLM requests per thread, so callers can tell a failed analysis from a missing API key
+_failures = threading.local()
+
+def llm_failure_count():
+    """Number of LLM requests that failed (API errors, quota, rate limits after retries) on the calling thread."""
+    return getattr(_failures, "count", 0)
+
+def _record_llm_failure():
+    _failures.count = llm_failure_count() + 1
+    record_error("llm")
 
 def get_llm_client():
-    """Get OpenAI-compatible client configured for OpenRouter."""
+    """Get the shared OpenAI-compatible client configured for OpenRouter (created on first use)."""
+    global _client
     if not OPENROUTER_API_KEY:
         return None
     
-    return OpenAI(
-        api_key=OPENROUTER_API_KEY,
-        base_url=OPENROUTER_BASE_URL
-    )
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=OPENROUTER_API_KEY,
+                    base_url=OPENROUTER_BASE_URL,
+                    max_retries=0  # Retries are handled by rate_limiter.call_with_retries
+                )
+    return _client
+
+def configure_llm_client(base_url, api_key):
+    """
+    Points the shared sync and async clients at another OpenAI-compatible endpoint.
+    
+    Args:
+        base_url: API base URL
+        api_key: API key (None disables LLM calls, as when OPENROUTER_API_KEY is unset)
+    """
+    global _client, OPENROUTER_BASE_URL, OPENROUTER_API_KEY
+    with _client_lock:
+        OPENROUTER_BASE_URL = base_url
+        OPENROUTER_API_KEY = api_key
+        _client = None
+        _async_state.clear()
+
+def _get_async_state():
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+    if state is None:
+        state = {
+            "client": AsyncOpenAI(
+                api_key=OPENROUTER_API_KEY,
+                base_url=OPENROUTER_BASE_URL,
+                max_retries=0
+            ),
+            "semaphore": asyncio.Semaphore(LLM_MAX_CONCURRENCY),
+        }
+        _async_state[loop] = state
+    return state
+
+def get_async_llm_client():
+    """Get the async client for the running event loop, or None if no API key is set."""
+    if not OPENROUTER_API_KEY:
+        return None
+    return _get_async_state()["client"]
+
+def openai_retry_info(error):
+    """
+    Classifies an OpenAI client exception for call_with_retries.
+    
+    Returns:
+        Tuple of (should retry, Retry-After seconds or None)
+    """
+    if isinstance(error, openai.APIStatusError):
+        if is_retryable_status(error.status_code):
+            return True, parse_retry_after(error.response.headers.get("retry-after"))
+        return False, None
+    if isinstance(error, openai.APIConnectionError):  # Includes timeouts
+        return True, None
+    return False, None
+
+def configure_llm_cache(path=None, ttl=None, max_bytes=None, enabled=True):
+    """
+    Replaces the cache used by call_llm.
+    
+    Args:
+        path: SQLite file (defaults to CACHE_DIR/llm.sqlite)
+        ttl: Maximum entry age in seconds (defaults to LLM_CACHE_TTL)
+        max_bytes: Size cap; least recently used entries are evicted beyond it
+        enabled: Set to False to always call the model
+    """
+    global _llm_cache, _llm_cache_configured
+    with _llm_cache_lock:
+        _llm_cache = ResultCache(
+            "llm",
+            path,
+            ttl=LLM_CACHE_TTL if ttl is None else ttl,
+            max_bytes=LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        ) if enabled else None
+        _llm_cache_configured = True
+    return _llm_cache
+
+def get_llm_cache():
+    """Get the shared LLM result cache, or None if caching is disabled."""
+    if not _llm_cache_configured:
+        configure_llm_cache(enabled=LLM_CACHE_ENABLED)
+    return _llm_cache
 
-def call_llm(prompt, system_prompt="You are a helpful assistant.", max_tokens=1000):
+def llm_cache_key(prompt, system_prompt, max_tokens, temperature, model=MODEL_NAME):
+    """Content address of an LLM request: identical inputs share one cached response."""
+    payload = json.dumps([model, system_prompt, prompt, max_tokens, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def call_llm(prompt, system_prompt="You are a helpful assistant.", max_tokens=1000, temperature=0.3):
     """
     Generic LLM call wrapper.
     
@@ -29,44 +162,108 @@ def call_llm(prompt, system_prompt="You are a helpful assistant.", max_tokens=10
         prompt: User prompt
         system_prompt: System instructions
         max_tokens: Maximum response length
+        temperature: Sampling temperature (low for more consistent analysis)
         
     Returns:
         LLM response text or None if API unavailable
     """
+    cache = get_llm_cache()
+    cache_key = llm_cache_key(prompt, system_prompt, max_tokens, temperature)
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            count("cache_requests", cache="llm", result="hit")
+            return cached
+        count("cache_requests", cache="llm", result="miss")
+
     client = get_llm_client()
     if not client:
         print("Warning: OPENROUTER_API_KEY not set. Skipping LLM analysis.")
         return None
     
     try:
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=max_tokens,
-            temperature=0.3  # Lower temperature for more consistent analysis
-        )
-        return response.choices[0].message.content.strip()
+        with span("llm"):
+            response = call_with_retries("llm", lambda: client.chat.completions.create(
+                **_completion_request(prompt, system_prompt, max_tokens, temperature)
+            ), classify=openai_retry_info)
+        _record_usage(response)
+        content = response.choices[0].message.content.strip()
     except Exception as e:
         print(f"LLM API error: {e}")
+        _record_llm_failure()
         return None
 
-def analyze_company_content(company_name, url, text_content, careers_text=None):
+    if cache and content:
+        cache.put(cache_key, content)
+    return content
+
+async def acall_llm(prompt, system_prompt="You are a helpful assistant.", max_tokens=1000, temperature=0.3):
     """
-    Analyze company website content for partner readiness signals.
+    Async version of call_llm using the shared AsyncOpenAI client.
+    
+    At most LLM_MAX_CONCURRENCY requests are in flight per event loop; the
+    cache and rate limiter are shared with call_llm.
     
-    Args:
-        company_name: Company name
-        url: Company website URL
-        text_content: Scraped homepage text
-        careers_text: Optional careers page text
-        
     Returns:
-        Dict with analysis results or None
+        LLM response text or None if API unavailable
     """
-    system_prompt = """You are an expert at analyzing consulting firms and technology partners.
+    cache = get_llm_cache()
+    cache_key = llm_cache_key(prompt, system_prompt, max_tokens, temperature)
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            count("cache_requests", cache="llm", result="hit")
+            return cached
+        count("cache_requests", cache="llm", result="miss")
+
+    client = get_async_llm_client()
+    if not client:
+        print("Warning: OPENROUTER_API_KEY not set. Skipping LLM analysis.")
+        return None
+
+    try:
+        async with _get_async_state()["semaphore"]:
+            with span("llm"):
+                response = await acall_with_retries("llm", lambda: client.chat.completions.create(
+                    **_completion_request(prompt, system_prompt, max_tokens, temperature)
+                ), classify=openai_retry_info)
+        _record_usage(response)
+        content = response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"LLM API error: {e}")
+        _record_llm_failure()
+        return None
+
+    if cache and content:
+        cache.put(cache_key, content)
+    return content
+
+def _record_usage(response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        count("llm_tokens", getattr(usage, "prompt_tokens", 0) or 0, kind="prompt")
+        count("llm_tokens", getattr(usage, "completion_tokens", 0) or 0, kind="completion")
+
+def _completion_request(prompt, system_prompt, max_tokens, temperature):
+    return {
+        "model": MODEL_NAME,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }
+
+def _strip_code_fences(response):
+    """Extracts the payload from a markdown code block, if the model wrapped its answer in one."""
+    if "```json" in response:
+        return response.split("```json")[1].split("```")[0].strip()
+    if "```" in response:
+        return response.split("```")[1].split("```")[0].strip()
+    return response
+
+ANALYSIS_SYSTEM_PROMPT = """You are an expert at analyzing consulting firms and technology partners.
 Your job is to assess whether a company is partner-ready for SaaS, Cloud, AI/ML, and digital transformation work.
 
 Focus on:
@@ -76,59 +273,210 @@ Focus on:
 4. Quality signals (case studies, thought leadership, client focus)
 """
 
+ANALYSIS_FIELDS = """    "is_partner_ready": true/false,
+    "confidence": "high/medium/low",
+    "key_signals": ["signal1", "signal2", ...],
+    "red_flags": ["flag1", "flag2", ...],
+    "positioning": "consulting-first/engineering-first/balanced/unclear",
+    "partner_evidence": "brief description of partner/ecosystem mentions",
+    "outcome_focus": "brief description of outcome vs staffing language",
+    "reasoning": "1-2 sentence explanation of decision\""""
+
+def _analysis_prompts(company_name, url, text_content, careers_text=None):
+    system_prompt = ANALYSIS_SYSTEM_PROMPT
+
     prompt = f"""Analyze this company for partner readiness:
 
 Company: {company_name}
 URL: {url}
 
 Homepage Content:
-{text_content[:3000]}  # Limit to avoid token limits
+{fit_text(text_content, HOMEPAGE_TOKENS)}
 
 {"Careers Page Content:" if careers_text else ""}
-{careers_text[:1500] if careers_text else ""}
+{fit_text(careers_text, CAREERS_TOKENS)}
 
 Provide analysis in JSON format:
 {{
-    "is_partner_ready": true/false,
-    "confidence": "high/medium/low",
-    "key_signals": ["signal1", "signal2", ...],
-    "red_flags": ["flag1", "flag2", ...],
-    "positioning": "consulting-first/engineering-first/balanced/unclear",
-    "partner_evidence": "brief description of partner/ecosystem mentions",
-    "outcome_focus": "brief description of outcome vs staffing language",
-    "reasoning": "1-2 sentence explanation of decision"
+{ANALYSIS_FIELDS}
 }}
 """
+    return system_prompt, prompt
 
-    response = call_llm(prompt, system_prompt, max_tokens=800)
+def _parse_analysis(response):
     if not response:
         return None
     
     try:
         # Try to parse JSON response
         # Handle markdown code blocks if present
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0].strip()
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0].strip()
-        
-        return json.loads(response)
+        return json.loads(_strip_code_fences(response))
     except json.JSONDecodeError:
         print(f"Failed to parse LLM response as JSON: {response[:200]}")
         return None
 
-def generate_linkedin_searches(company_name, company_description, llm_analysis=None):
+def analyze_company_content(company_name, url, text_content, careers_text=None):
     """
-    Generate targeted LinkedIn search strings for key decision-maker roles.
+    Analyze company website content for partner readiness signals.
     
     Args:
         company_name: Company name
-        company_description: Brief company description
-        llm_analysis: Optional LLM analysis results
+        url: Company website URL
+        text_content: Homepage text (newline-separated blocks, capped at HOMEPAGE_TOKENS)
+        careers_text: Optional careers page text (capped at CAREERS_TOKENS)
         
     Returns:
-        List of LinkedIn search strings
+        Dict with analysis results or None
+    """
+    system_prompt, prompt = _analysis_prompts(company_name, url, text_content, careers_text)
+    return _parse_analysis(call_llm(prompt, system_prompt, max_tokens=ANALYSIS_MAX_TOKENS))
+
+async def aanalyze_company_content(company_name, url, text_content, careers_text=None):
+    """Async version of analyze_company_content."""
+    system_prompt, prompt = _analysis_prompts(company_name, url, text_content, careers_text)
+    return _parse_analysis(await acall_llm(prompt, system_prompt, max_tokens=ANALYSIS_MAX_TOKENS))
+
+def estimate_tokens(text):
+    """Token count for budgeting prompts (see prompt_budget.count_tokens)."""
+    return count_tokens(text) + 1
+
+def _batch_item_text(company):
+    careers_text = company.get("careers_text")
+    text = f"""=== Company id: {company['id']} ===
+Company: {company['name']}
+URL: {company['url']}
+
+Homepage Content:
+{fit_text(company.get('text_content'), HOMEPAGE_TOKENS)}
+"""
+    if careers_text:
+        text += f"""
+Careers Page Content:
+{fit_text(careers_text, CAREERS_TOKENS)}
+"""
+    return text
+
+def _batch_prompt(texts):
+    return f"""Analyze each of these {len(texts)} companies for partner readiness.
+
+{chr(10).join(texts)}
+Return a JSON array with one object per company, using the company id given above:
+[
+  {{
+    "id": "company id",
+{ANALYSIS_FIELDS}
+  }}
+]
+"""
+
+def _batch_overhead():
+    """Tokens every batched request spends on the system prompt, instructions and answer array."""
+    return estimate_tokens(ANALYSIS_SYSTEM_PROMPT) + estimate_tokens(_batch_prompt([])) + BATCH_ANSWER_SLACK
+
+def _pack_batches(items, token_budget, max_batch_size):
+    """Groups (company, text) pairs into batches that fit the token budget."""
+    token_budget -= _batch_overhead()
+    batches = []
+    current = []
+    used = 0
+    for item in items:
+        tokens = estimate_tokens(item[1]) + BATCH_TOKENS_PER_ANSWER
+        if current and (used + tokens > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+            used = 0
+        current.append(item)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _parse_batch_analysis(response):
+    """Maps company id -> analysis dict from a batched response; unparseable items are left out."""
+    if not response:
+        return {}
+    try:
+        items = json.loads(_strip_code_fences(response))
+    except json.JSONDecodeError:
+        print(f"Failed to parse batched LLM response as JSON: {response[:200]}")
+        return {}
+    if isinstance(items, dict):
+        items = items.get("companies", [items])
+    results = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and "id" in item and "is_partner_ready" in item:
+            results[str(item.pop("id"))] = item
+    return results
+
+def _analyze_single(company, failed):
+    failures = llm_failure_count()
+    analysis = analyze_company_content(
+        company["name"], company["url"], company.get("text_content") or "", company.get("careers_text")
+    )
+    if analysis is None and llm_failure_count() > failures:
+        failed.add(company["id"])
+    return analysis
+
+def _analyze_batch(batch, failed):
+    if len(batch) == 1:
+        company = batch[0][0]
+        return {company["id"]: _analyze_single(company, failed)}
+
+    prompt = _batch_prompt([text for _, text in batch])
+    max_tokens = BATCH_TOKENS_PER_ANSWER * len(batch) + BATCH_ANSWER_SLACK
+    parsed = _parse_batch_analysis(call_llm(prompt, ANALYSIS_SYSTEM_PROMPT, max_tokens=max_tokens))
+
+    results = {}
+    for company, _ in batch:
+        analysis = parsed.get(company["id"])
+        if analysis is None:
+            # Missing or malformed in the batch answer: fall back to a single-company call
+            analysis = _analyze_single(company, failed)
+        results[company["id"]] = analysis
+    return results
+
+def analyze_companies_batch(companies, token_budget=None, max_batch_size=None, failed=None):
     """
+    Analyze several companies with as few LLM requests as possible.
+    
+    Companies are packed into requests that fit the token budget; each
+    request returns a JSON array keyed by company id. Companies whose entry
+    is missing or fails to parse are retried with analyze_company_content.
+    
+    Args:
+        companies: List of dicts with 'id', 'name', 'url', 'text_content' and optional 'careers_text'
+        token_budget: Prompt + answer tokens per request (defaults to LLM_BATCH_TOKEN_BUDGET)
+        max_batch_size: Companies per request (defaults to LLM_BATCH_SIZE)
+        failed: Optional set that receives the ids whose analysis is None because
+            the LLM request failed (rather than because no LLM is configured)
+        
+    Returns:
+        Dict of company id -> analysis dict (or None)
+    """
+    if not companies:
+        return {}
+    failed = set() if failed is None else failed
+    token_budget = token_budget or LLM_BATCH_TOKEN_BUDGET
+    max_batch_size = max(1, max_batch_size or LLM_BATCH_SIZE)
+
+    items = [(dict(c, id=str(c["id"])), _batch_item_text(dict(c, id=str(c["id"])))) for c in companies]
+    batches = _pack_batches(items, token_budget, max_batch_size)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(LLM_BATCH_WORKERS, len(batches))) as executor:
+        for batch_results in executor.map(lambda batch: _analyze_batch(batch, failed), batches):
+            results.update(batch_results)
+    return results
+
+def linkedin_search_templates(company_name):
+    """Template LinkedIn search strings, used when no LLM is available."""
+    return [
+        f'site:linkedin.com/in/ "{company_name}" ("Client Partner" OR "Managing Director" OR "Practice Lead")',
+        f'site:linkedin.com/in/ "{company_name}" ("VP Partnerships" OR "Head of Alliances" OR "Delivery Lead")',
+        f'site:linkedin.com/in/ "{company_name}" ("Partner" OR "Director")'
+    ]
+
+def _linkedin_prompts(company_name, company_description, llm_analysis=None):
     system_prompt = """You are an expert at crafting LinkedIn search queries to find decision-makers at consulting and technology firms.
 Generate precise search strings that will find Client Partners, Managing Directors, Practice Leads, and Delivery Leads."""
 
@@ -144,28 +492,104 @@ Focus on roles like: Client Partner, Managing Director, Practice Lead, Delivery
 Return as JSON array:
 ["search string 1", "search string 2", "search string 3"]
 """
+    return system_prompt, prompt
 
-    response = call_llm(prompt, system_prompt, max_tokens=300)
+def _parse_linkedin_searches(company_name, response):
     if not response:
         # Fallback to basic search
-        return [
-            f'site:linkedin.com/in/ "{company_name}" ("Client Partner" OR "Managing Director" OR "Practice Lead")',
-            f'site:linkedin.com/in/ "{company_name}" ("VP Partnerships" OR "Head of Alliances" OR "Delivery Lead")',
-            f'site:linkedin.com/in/ "{company_name}" ("Partner" OR "Director")'
-        ]
+        return linkedin_search_templates(company_name)
     
     try:
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0].strip()
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0].strip()
-        
+        response = _strip_code_fences(response)
         searches = json.loads(response)
         return searches if isinstance(searches, list) else [response]
     except json.JSONDecodeError:
         # Return response as single search if not valid JSON
         return [response.strip()]
 
+def generate_linkedin_searches(company_name, company_description, llm_analysis=None):
+    """
+    Generate targeted LinkedIn search strings for key decision-maker roles.
+    
+    Args:
+        company_name: Company name
+        company_description: Brief company description
+        llm_analysis: Optional LLM analysis results
+        
+    Returns:
+        List of LinkedIn search strings
+    """
+    system_prompt, prompt = _linkedin_prompts(company_name, company_description, llm_analysis)
+    return _parse_linkedin_searches(company_name, call_llm(prompt, system_prompt, max_tokens=300))
+
+async def agenerate_linkedin_searches(company_name, company_description, llm_analysis=None):
+    """Async version of generate_linkedin_searches."""
+    system_prompt, prompt = _linkedin_prompts(company_name, company_description, llm_analysis)
+    return _parse_linkedin_searches(company_name, await acall_llm(prompt, system_prompt, max_tokens=300))
+
+def generate_linkedin_searches_batch(companies, max_batch_size=None):
+    """
+    Generate LinkedIn search strings for several companies, several per LLM request.
+    
+    Companies are sent in chunks of max_batch_size so each answer stays within
+    the model's output limit; a chunk whose answer fails only affects its own rows.
+    
+    Args:
+        companies: List of dicts with 'name', 'description' and optional 'llm_analysis'
+        max_batch_size: Companies per request (defaults to LLM_BATCH_SIZE)
+        
+    Returns:
+        List of search-string lists in input order; companies missing from the
+        answer (or all of them, without an LLM) get linkedin_search_templates
+    """
+    if not companies:
+        return []
+    max_batch_size = max(1, max_batch_size or LLM_BATCH_SIZE)
+    chunks = [companies[i:i + max_batch_size] for i in range(0, len(companies), max_batch_size)]
+
+    results = []
+    with ThreadPoolExecutor(max_workers=min(LLM_BATCH_WORKERS, len(chunks))) as executor:
+        for chunk_results in executor.map(_linkedin_searches_chunk, chunks):
+            results.extend(chunk_results)
+    return results
+
+def _linkedin_searches_chunk(companies):
+    system_prompt, _ = _linkedin_prompts("", "")
+    blocks = []
+    for i, c in enumerate(companies):
+        block = f"id: {i}\nCompany: {c['name']}\nDescription: {c.get('description', '')}"
+        if c.get("llm_analysis"):
+            block += f"\nPositioning: {c['llm_analysis'].get('positioning', 'unknown')}"
+        blocks.append(block)
+
+    prompt = f"""For each of these {len(companies)} companies, generate 3 LinkedIn search strings to find key decision-makers.
+Focus on roles like: Client Partner, Managing Director, Practice Lead, Delivery Lead, VP of Partnerships, Head of Alliances.
+
+{(chr(10) * 2).join(blocks)}
+
+Return a JSON object mapping each company id to its array of search strings:
+{{"0": ["search string 1", "search string 2", "search string 3"], ...}}
+"""
+
+    response = call_llm(prompt, system_prompt, max_tokens=150 * len(companies) + 100)
+    parsed = {}
+    if response:
+        try:
+            parsed = json.loads(_strip_code_fences(response))
+        except json.JSONDecodeError:
+            print(f"Failed to parse batched LinkedIn response as JSON: {response[:200]}")
+    if not isinstance(parsed, dict):
+        parsed = {}
+
+    results = []
+    for i, c in enumerate(companies):
+        searches = parsed.get(str(i))
+        if isinstance(searches, list) and searches and all(isinstance(x, str) for x in searches):
+            results.append(searches)
+        else:
+            results.append(linkedin_search_templates(c["name"]))
+    return results
+
 def summarize_companies(companies_data):
     """
     Generate strategic summary of validated companies with patterns and insights.
@@ -0,0 +1,243 @@
+"""
+Lightweight run instrumentation.
+
+Timing spans (search, fetch, parse, LLM calls, validation) and counters
+(bytes fetched, cache hits, LLM tokens, errors) are collected in-process and
+exported as a JSON run report or in the Prometheus text format, either to a
+file or from a small HTTP endpoint. With METRICS_ENABLED=0 every call returns
+immediately.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_PREFIX = "company_research"
+# Interface the metrics endpoint binds to; set 0.0.0.0 to expose it beyond this machine
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Histogram buckets (seconds) for the Prometheus export
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_SAMPLES = 2048  # Durations kept per span for percentiles
+
+_enabled = METRICS_ENABLED
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_NULL_SPAN = nullcontext()
+
+def configure_metrics(enabled=True):
+    """Turns collection on or off (collected values are kept)."""
+    global _enabled
+    _enabled = enabled
+
+def metrics_enabled():
+    return _enabled
+
+def reset_metrics():
+    """Clears all spans and counters, e.g. at the start of a run."""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+def observe(name, seconds, error=False):
+    """Records one timed operation for a span."""
+    if not _enabled:
+        return
+    with _lock:
+        span = _spans.get(name)
+        if span is None:
+            span = _spans[name] = {
+                "count": 0, "errors": 0, "total": 0.0, "max": 0.0,
+                "buckets": [0] * len(DURATION_BUCKETS), "recent": deque(maxlen=RECENT_SAMPLES),
+            }
+        span["count"] += 1
+        span["total"] += seconds
+        span["max"] = max(span["max"], seconds)
+        span["recent"].append(seconds)
+        if error:
+            span["errors"] += 1
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                span["buckets"][i] += 1
+                break
+
+@contextmanager
+def _timed_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        observe(name, time.perf_counter() - start, error=True)
+        raise
+    observe(name, time.perf_counter() - start)
+
+def span(name):
+    """
+    Context manager timing a block as one operation of the named span.
+    An exception escaping the block is counted as an error.
+    """
+    return _timed_span(name) if _enabled else _NULL_SPAN
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _timed_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, value=1, **labels):
+    """
+    Adds value to a counter.
+
+    Args:
+        name: Counter name (e.g. "bytes_fetched")
+        value: Amount to add
+        **labels: Label values distinguishing series (e.g. cache="llm", result="hit")
+    """
+    if not _enabled or not value:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def record_error(stage):
+    """Counts a handled error (one that was caught and logged rather than raised)."""
+    count("errors", stage=stage)
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+def _series_name(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+def metrics_report():
+    """
+    Snapshot of everything collected so far.
+
+    Returns:
+        Dict with 'spans' ({name: count, errors, total_s, mean_ms, p50_ms, p95_ms, max_ms})
+        and 'counters' ({"name{label=value,...}": value})
+    """
+    with _lock:
+        spans = {name: dict(s, recent=sorted(s["recent"])) for name, s in _spans.items()}
+        counters = dict(_counters)
+    return {
+        "spans": {
+            name: {
+                "count": s["count"],
+                "errors": s["errors"],
+                "total_s": s["total"],
+                "mean_ms": s["total"] / s["count"] * 1000 if s["count"] else 0.0,
+                "p50_ms": _percentile(s["recent"], 50) * 1000,
+                "p95_ms": _percentile(s["recent"], 95) * 1000,
+                "max_ms": s["max"] * 1000,
+            }
+            for name, s in spans.items()
+        },
+        "counters": {_series_name(name, labels): value for (name, labels), value in sorted(counters.items())},
+    }
+
+def write_metrics_report(path):
+    """Writes metrics_report() as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metrics_report(), f, indent=2)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def prometheus_text():
+    """Everything collected so far in the Prometheus text exposition format."""
+    with _lock:
+        spans = {name: dict(s, buckets=list(s["buckets"])) for name, s in _spans.items()}
+        counters = dict(_counters)
+
+    lines = []
+    metric = f"{METRICS_PREFIX}_stage_duration_seconds"
+    lines.append(f"# HELP {metric} Time spent per pipeline stage.")
+    lines.append(f"# TYPE {metric} histogram")
+    for name, s in sorted(spans.items()):
+        cumulative = 0
+        for bound, n in zip(DURATION_BUCKETS, s["buckets"]):
+            cumulative += n
+            lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {s["count"]}')
+        lines.append(f'{metric}_sum{{stage="{name}"}} {s["total"]}')
+        lines.append(f'{metric}_count{{stage="{name}"}} {s["count"]}')
+
+    metric = f"{METRICS_PREFIX}_stage_errors_total"
+    lines.append(f"# TYPE {metric} counter")
+    for name, s in sorted(spans.items()):
+        lines.append(f'{metric}{{stage="{name}"}} {s["errors"]}')
+
+    seen = set()
+    for (name, labels), value in sorted(counters.items()):
+        metric = f"{METRICS_PREFIX}_{name}_total"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        lines.append(f"{metric}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path):
+    """Writes prometheus_text() to a file (e.g. for the node exporter textfile collector)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_metrics_server(port, host=None):
+    """
+    Serves prometheus_text() at /metrics from a background thread.
+
+    Args:
+        port: TCP port (0 picks a free one)
+        host: Interface to bind (defaults to METRICS_HOST, i.e. localhost only)
+
+    Returns:
+        The HTTP server (call shutdown() to stop it)
+    """
+    server = ThreadingHTTPServer((host or METRICS_HOST, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,189 @@
+"""
+Parse-once document model for fetched pages.
+
+A PageDocument parses its HTML a single time and memoizes the derived views
+(plain text, lowercased text, links) so validation steps can share them
+instead of re-parsing and re-lowercasing the same page. The boilerplate-free
+content blocks used for LLM prompts are built on demand from a separate parse,
+so link discovery still sees the navigation and footer. A SiteDocument merges
+several crawled pages of one company.
+"""
+
+import os
+from functools import cached_property
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, FeatureNotFound
+from metrics import span
+
+# "auto" picks the fastest installed BeautifulSoup backend
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")
+PARSER_PREFERENCE = ["lxml", "html.parser"]
+
+# Elements that never carry page content
+NON_CONTENT_TAGS = ["script", "style", "noscript", "template", "svg", "iframe"]
+# Elements that usually hold page chrome rather than content
+BOILERPLATE_TAGS = ["form", "nav", "header", "footer", "aside"]
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "dialog"}
+# Whole class / id tokens marking menus, cookie banners and similar chrome. State
+# classes such as "has-sidebar" or "modal-open" often sit on page wrappers, so
+# tokens are matched whole rather than as substrings.
+BOILERPLATE_TOKENS = {
+    "nav", "navbar", "navigation", "main-nav", "site-nav", "top-nav", "menu", "main-menu", "site-menu",
+    "mobile-menu", "nav-menu", "menu-bar", "cookie", "cookies", "cookie-banner", "cookie-notice",
+    "cookie-consent", "cookie-bar", "consent", "consent-banner", "gdpr", "breadcrumb", "breadcrumbs",
+    "footer", "site-footer", "page-footer", "header", "site-header", "page-header", "masthead", "sidebar",
+    "newsletter", "newsletter-signup", "social", "social-links", "social-icons", "share", "share-buttons",
+    "sharing", "popup", "modal",
+}
+# Chrome candidates holding more than this share of the page text are kept anyway
+MAX_BOILERPLATE_SHARE = 0.5
+# Elements that start a new text block
+BLOCK_TAGS = [
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "figcaption", "pre", "br",
+]
+MIN_BLOCK_WORDS = 3  # Shorter fragments are mostly leftover labels and buttons
+
+_resolved_parsers = {}
+
+def _parser_available(name):
+    try:
+        BeautifulSoup("<p></p>", name)
+        return True
+    except FeatureNotFound:
+        return False
+
+def _is_boilerplate(tag):
+    if tag.name in ("html", "body", "main", "article"):
+        return False
+    if tag.name in BOILERPLATE_TAGS or tag.get("role") in BOILERPLATE_ROLES:
+        return True
+    tokens = list(tag.get("class") or []) + (tag.get("id") or "").split()
+    return any(token.lower() in BOILERPLATE_TOKENS for token in tokens)
+
+def _holds_content(tag, total_chars):
+    """Whether a boilerplate candidate wraps the page's main content and must be kept."""
+    if tag.find(("main", "article")) is not None:
+        return True
+    return total_chars > 0 and len(tag.get_text()) > MAX_BOILERPLATE_SHARE * total_chars
+
+def resolve_parser(name=None):
+    """
+    Resolves a parser setting to an installed BeautifulSoup backend.
+
+    Args:
+        name: "auto", "lxml", "html5lib" or "html.parser" (defaults to HTML_PARSER)
+
+    Returns:
+        Backend name, falling back to the stdlib html.parser if the requested one is missing
+    """
+    name = name or HTML_PARSER
+    if name not in _resolved_parsers:
+        candidates = PARSER_PREFERENCE if name == "auto" else [name, "html.parser"]
+        resolved = next((p for p in candidates if _parser_available(p)), "html.parser")
+        if name != "auto" and resolved != name:
+            print(f"Warning: HTML parser '{name}' is not installed, using {resolved}")
+        _resolved_parsers[name] = resolved
+    return _resolved_parsers[name]
+
+class PageDocument:
+    """
+    A fetched page, parsed once.
+
+    Args:
+        html: Raw page HTML
+        url: Page URL, used to resolve relative links
+        parser: Parser backend (see resolve_parser)
+    """
+
+    def __init__(self, html, url=None, parser=None):
+        self.html = html
+        self.url = url
+        self.parser = resolve_parser(parser)
+
+    @cached_property
+    def soup(self):
+        with span("parse"):
+            return BeautifulSoup(self.html, self.parser)
+
+    @cached_property
+    def text(self):
+        return self.soup.get_text(separator=' ', strip=True)
+
+    @cached_property
+    def lower_text(self):
+        return self.text.lower()
+
+    @cached_property
+    def links(self):
+        """List of (absolute URL, anchor text) for every anchor with an href."""
+        base = self.url or ""
+        return [
+            (urljoin(base, a['href']), a.get_text(strip=True))
+            for a in self.soup.find_all('a', href=True)
+        ]
+
+    @cached_property
+    def content_blocks(self):
+        """
+        Main-content text blocks in document order, with scripts, styles,
+        navigation, headers, footers and cookie/menu widgets removed.
+        """
+        with span("parse"):
+            soup = BeautifulSoup(self.html, self.parser)
+        for tag in soup.find_all(NON_CONTENT_TAGS):
+            tag.decompose()
+        total_chars = len(soup.get_text())
+        for tag in [t for t in soup.find_all(True) if _is_boilerplate(t)]:
+            if not tag.decomposed and not _holds_content(tag, total_chars):
+                tag.decompose()
+        for tag in soup.find_all(BLOCK_TAGS):
+            tag.insert_before("\n")
+            tag.insert_after("\n")
+
+        blocks = []
+        seen = set()
+        for line in soup.get_text().split("\n"):
+            block = " ".join(line.split())
+            if len(block.split()) < MIN_BLOCK_WORDS or block in seen:
+                continue
+            seen.add(block)
+            blocks.append(block)
+        return blocks
+
+class SiteDocument:
+    """
+    Several pages of one site merged into a single document for keyword and
+    LLM analysis. The first page (the homepage) comes first in the text and
+    in the content blocks.
+
+    Args:
+        pages: PageDocuments, homepage first
+    """
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+
+    @property
+    def urls(self):
+        return [page.url for page in self.pages]
+
+    @cached_property
+    def text(self):
+        return "\n".join(page.text for page in self.pages)
+
+    @cached_property
+    def lower_text(self):
+        return self.text.lower()
+
+    @cached_property
+    def content_blocks(self):
+        """Content blocks of all pages in page order, without blocks repeated across pages."""
+        blocks = []
+        seen = set()
+        for page in self.pages:
+            for block in page.content_blocks:
+                if block not in seen:
+                    seen.add(block)
+                    blocks.append(block)
+        return blocks
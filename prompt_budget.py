@@ -0,0 +1,95 @@
+"""
+Token-budgeted prompt content.
+
+Page text is measured with the model tokenizer (tiktoken, when installed)
+instead of a character count, and select_blocks fills a token budget with the
+content blocks that carry the most keyword signal, rather than whatever text
+happens to come first on the page.
+"""
+
+import os
+import threading
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character-based estimate
+    tiktoken = None
+
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+CHARS_PER_TOKEN = 4  # Estimate used when tiktoken is unavailable
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+def get_encoding():
+    """Returns the shared tiktoken encoding, or None if tiktoken can't be used."""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            if tiktoken is not None:
+                try:
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception as e:
+                    print(f"Tokenizer '{TOKENIZER_ENCODING}' unavailable, estimating tokens: {e}")
+        return _encoding
+
+def count_tokens(text):
+    """Number of tokens in text (estimated at ~4 characters per token without tiktoken)."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text, budget):
+    """Cuts text down to at most budget tokens."""
+    if not text or budget <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:budget * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= budget else encoding.decode(tokens[:budget])
+
+def select_blocks(blocks, budget, matcher=None):
+    """
+    Fills a token budget with whole text blocks.
+
+    Args:
+        blocks: Text blocks in document order
+        budget: Maximum tokens for the joined result
+        matcher: Optional KeywordMatcher; blocks with the most keyword matches
+            per token are chosen first, otherwise blocks are taken in order
+
+    Returns:
+        The chosen blocks joined by newlines, in document order
+    """
+    blocks = [b for b in blocks if b and b.strip()]
+    costs = [count_tokens(b) + 1 for b in blocks]  # +1 for the newline separator
+    if sum(costs) <= budget:
+        return "\n".join(blocks)
+
+    order = list(range(len(blocks)))
+    if matcher is not None:
+        density = [len(matcher.scan(b).matches) / costs[i] for i, b in enumerate(blocks)]
+        order.sort(key=lambda i: -density[i])
+
+    chosen = []
+    used = 0
+    for i in order:
+        if used + costs[i] <= budget:
+            chosen.append(i)
+            used += costs[i]
+    if not chosen:
+        # Even the best block is over budget on its own
+        return truncate_to_tokens(blocks[order[0]], budget) if order else ""
+    return "\n".join(blocks[i] for i in sorted(chosen))
+
+def fit_text(text, budget):
+    """Caps newline-separated text at budget tokens, keeping whole lines where possible."""
+    if not text:
+        return ""
+    return select_blocks(text.split("\n"), budget)
@@ -0,0 +1,225 @@
+"""
+Yield-aware query planning.
+
+Every finished query records its yield across runs: search hits, domains no
+other query has returned recently, validated companies, search credits and
+time. The planner orders a run's queries by expected companies per credit (or
+per second under a time budget), skips queries whose hits are saturated with
+other queries' domains, and drops what doesn't fit the budget. Skipped
+queries are run again once their stats are QUERY_REPROBE_DAYS old, so
+saturation is re-measured rather than permanent.
+"""
+
+import os
+import threading
+import time
+from cache_store import CACHE_DIR, connect
+from url_utils import registrable_domain
+
+QUERY_PLANNER_ENABLED = os.getenv("QUERY_PLANNER_ENABLED", "1") != "0"
+QUERY_STATS_PATH = os.getenv("QUERY_STATS_PATH", os.path.join(CACHE_DIR, "queries.sqlite"))
+# A query is saturated when fewer than this share of its last hits were new domains
+SATURATION_RATIO = float(os.getenv("QUERY_SATURATION_RATIO", "0.2"))
+# Domains another query returned within this many days don't count as new
+NOVELTY_WINDOW = float(os.getenv("QUERY_NOVELTY_WINDOW_DAYS", "30")) * 86400
+# Saturated queries are run again once their last search is this many days old
+REPROBE_AFTER = float(os.getenv("QUERY_REPROBE_DAYS", "7")) * 86400
+PRIOR_WEIGHT = 2  # Runs' worth of weight given to the average yield for little-used queries
+DEFAULT_QUERY_SECONDS = 30.0  # Time estimate before any query has been timed
+
+_planner = None
+_planner_configured = False
+_planner_lock = threading.Lock()
+
+def query_key(query):
+    # Whitespace differences don't change the search
+    return " ".join(query.split())
+
+class QueryPlanner:
+    """
+    SQLite record of per-query yield, and the planning built on it.
+
+    Args:
+        path: SQLite file (defaults to QUERY_STATS_PATH)
+    """
+
+    def __init__(self, path=None):
+        self.path = path or QUERY_STATS_PATH
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        with self._lock:
+            self._conn.executescript(
+                """CREATE TABLE IF NOT EXISTS query_stats (
+                    query TEXT PRIMARY KEY,
+                    runs INTEGER NOT NULL,
+                    hits INTEGER NOT NULL,
+                    new_domains INTEGER NOT NULL,
+                    companies INTEGER NOT NULL,
+                    credits REAL NOT NULL,
+                    seconds REAL NOT NULL,
+                    last_hits INTEGER NOT NULL,
+                    last_new_domains INTEGER NOT NULL,
+                    last_run REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS seen_domains (
+                    domain TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL
+                );"""
+            )
+            self._conn.commit()
+
+    def record(self, query, urls, companies, credits, seconds):
+        """
+        Records one finished search of a query.
+
+        Args:
+            query: Search query
+            urls: Candidate URLs the search returned
+            companies: Companies accepted from them
+            credits: Search credits the search cost
+            seconds: Time spent on the query
+
+        Returns:
+            Number of domains no other query had returned within NOVELTY_WINDOW
+        """
+        key = query_key(query)
+        domains = {registrable_domain(url) for url in urls if url}
+        domains.discard("")
+        now = time.time()
+        with self._lock:
+            new = []
+            for d in domains:
+                row = self._conn.execute("SELECT query, last_seen FROM seen_domains WHERE domain = ?", (d,)).fetchone()
+                # A query finding its own domains again isn't saturating; another query finding them is
+                if row is None or row[0] == key or now - row[1] >= NOVELTY_WINDOW:
+                    new.append(d)
+            self._conn.executemany(
+                """INSERT INTO seen_domains (domain, query, first_seen, last_seen) VALUES (?, ?, ?, ?)
+                ON CONFLICT(domain) DO UPDATE SET
+                    query = CASE WHEN excluded.last_seen - last_seen >= ? THEN excluded.query ELSE query END,
+                    first_seen = CASE WHEN excluded.last_seen - last_seen >= ? THEN excluded.first_seen ELSE first_seen END,
+                    last_seen = excluded.last_seen""",
+                [(d, key, now, now, NOVELTY_WINDOW, NOVELTY_WINDOW) for d in domains],
+            )
+            self._conn.execute(
+                """INSERT INTO query_stats
+                    (query, runs, hits, new_domains, companies, credits, seconds, last_hits, last_new_domains, last_run)
+                VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(query) DO UPDATE SET
+                    runs = runs + 1, hits = hits + excluded.hits, new_domains = new_domains + excluded.new_domains,
+                    companies = companies + excluded.companies, credits = credits + excluded.credits,
+                    seconds = seconds + excluded.seconds, last_hits = excluded.last_hits,
+                    last_new_domains = excluded.last_new_domains, last_run = excluded.last_run""",
+                (key, len(domains), len(new), companies, credits, seconds, len(domains), len(new), now),
+            )
+            self._conn.commit()
+        return len(new)
+
+    def stats(self):
+        """
+        Returns:
+            Dict of {query: dict with 'runs', 'hits', 'new_domains', 'companies', 'credits',
+            'seconds', 'last_hits', 'last_new_domains', 'last_run'}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT query, runs, hits, new_domains, companies, credits, seconds,
+                    last_hits, last_new_domains, last_run FROM query_stats"""
+            ).fetchall()
+        fields = ("runs", "hits", "new_domains", "companies", "credits", "seconds",
+                  "last_hits", "last_new_domains", "last_run")
+        return {row[0]: dict(zip(fields, row[1:])) for row in rows}
+
+    def is_saturated(self, stats):
+        """
+        Whether a query's last search mostly returned other queries' domains.
+        Stats older than REPROBE_AFTER never count as saturated, so the query is searched again.
+        """
+        return bool(stats and stats["last_hits"] and time.time() - stats["last_run"] < REPROBE_AFTER
+                    and stats["last_new_domains"] / stats["last_hits"] < SATURATION_RATIO)
+
+    def plan(self, queries, credits_per_query=1, credit_budget=None, time_budget=None, skip_saturated=True,
+             cached=()):
+        """
+        Orders and prunes a run's queries by their recorded yield.
+
+        Queries never run before are estimated at the average yield, so they
+        are tried ahead of known poor performers.
+
+        Args:
+            queries: Candidate queries
+            credits_per_query: Credits a fresh search costs (result pages per query)
+            credit_budget: Optional search credit budget for the run
+            time_budget: Optional time budget in seconds
+            skip_saturated: Skip queries whose last hits were mostly known domains
+            cached: Queries answered by the search cache, which cost no credits and are run first
+
+        Returns:
+            Tuple of (queries to run, best first, and {skipped query: reason})
+        """
+        all_stats = self.stats()
+        total_runs = sum(s["runs"] for s in all_stats.values())
+        avg_companies = sum(s["companies"] for s in all_stats.values()) / total_runs if total_runs else 1.0
+        avg_seconds = sum(s["seconds"] for s in all_stats.values()) / total_runs if total_runs else DEFAULT_QUERY_SECONDS
+
+        cached = {query_key(q) for q in cached}
+        skipped = {}
+        estimates = []
+        for position, query in enumerate(dict.fromkeys(queries)):
+            stats = all_stats.get(query_key(query))
+            if skip_saturated and self.is_saturated(stats):
+                skipped[query] = (f"saturated: {stats['last_new_domains']} of {stats['last_hits']} "
+                                  f"domains were new last time")
+                continue
+            runs = stats["runs"] if stats else 0
+            companies = ((stats["companies"] if stats else 0) + PRIOR_WEIGHT * avg_companies) / (runs + PRIOR_WEIGHT)
+            seconds = stats["seconds"] / runs if runs else avg_seconds
+            credits = 0 if query_key(query) in cached else credits_per_query
+            estimates.append((query, companies, max(seconds, 1e-3), credits, position))
+
+        # Rank by companies per unit of the budgeted resource; free queries first
+        per_time = time_budget is not None and credit_budget is None
+        estimates.sort(key=lambda e: (False, -e[1] / e[2], e[4]) if per_time else (e[3] > 0, -e[1] / (e[3] or 1), e[4]))
+
+        planned = []
+        credits_used = seconds_used = 0.0
+        for query, _, seconds, credits, _ in estimates:
+            if credit_budget is not None and credits_used + credits > credit_budget:
+                skipped[query] = "over the credit budget"
+                continue
+            if time_budget is not None and planned and seconds_used + seconds > time_budget:
+                skipped[query] = "over the time budget"
+                continue
+            planned.append(query)
+            credits_used += credits
+            seconds_used += seconds
+        return planned, skipped
+
+    def forget(self):
+        """Clears all recorded yield and seen domains."""
+        with self._lock:
+            self._conn.execute("DELETE FROM query_stats")
+            self._conn.execute("DELETE FROM seen_domains")
+            self._conn.commit()
+
+def configure_query_planner(path=None, enabled=True):
+    """
+    Replaces the shared query planner.
+
+    Args:
+        path: SQLite file (defaults to QUERY_STATS_PATH)
+        enabled: Set to False to neither record nor use query yield
+    """
+    global _planner, _planner_configured
+    with _planner_lock:
+        _planner = QueryPlanner(path) if enabled else None
+        _planner_configured = True
+    return _planner
+
+def get_query_planner():
+    """Get the shared query planner, or None if planning is disabled."""
+    if not _planner_configured:
+        configure_query_planner(enabled=QUERY_PLANNER_ENABLED)
+    return _planner
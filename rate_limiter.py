@@ -0,0 +1,190 @@
+"""
+Shared rate limiting and retry policy for external APIs.
+
+Each provider (Serper search, the LLM API) gets a token bucket that all worker
+threads draw from, so calls run as fast as the configured quota allows. Rate
+limit (429) and server (5xx) errors are retried with exponential backoff and
+jitter, and a Retry-After header pauses the whole provider, not just the caller.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+
+# Requests per second and burst size per provider
+RATE_LIMITS = {
+    "serper": (float(os.getenv("SERPER_RATE_PER_SEC", "5")), int(os.getenv("SERPER_BURST", "5"))),
+    "llm": (float(os.getenv("LLM_RATE_PER_SEC", "2")), int(os.getenv("LLM_BURST", "4"))),
+}
+DEFAULT_RATE_LIMIT = (5.0, 5)
+
+MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "4"))
+BACKOFF_BASE = 1.0  # Seconds before the first retry
+BACKOFF_MAX = 60.0
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Args:
+        rate: Tokens added per second (0 or less disables limiting)
+        capacity: Maximum burst size
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Takes tokens from the bucket and returns how long the caller must wait
+        before using them. Callers that can't block (async code) sleep themselves.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            if self.rate <= 0:
+                return wait
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def acquire(self, tokens=1):
+        """Blocks until tokens are available."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Holds back every caller for the given number of seconds (e.g. after Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(provider):
+    """Get the shared token bucket for a provider."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            rate, burst = RATE_LIMITS.get(provider, DEFAULT_RATE_LIMIT)
+            _limiters[provider] = TokenBucket(rate, burst)
+        return _limiters[provider]
+
+def configure_limiter(provider, rate, burst):
+    """Replaces the token bucket for a provider."""
+    with _limiters_lock:
+        _limiters[provider] = TokenBucket(rate, burst)
+        return _limiters[provider]
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header (delta seconds or HTTP date) into seconds.
+    Returns None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable_status(status_code):
+    return status_code == 429 or 500 <= status_code < 600
+
+def requests_retry_info(error):
+    """
+    Classifies an exception raised by requests.
+
+    Returns:
+        Tuple of (should retry, Retry-After seconds or None)
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        response = error.response
+        if is_retryable_status(response.status_code):
+            return True, parse_retry_after(response.headers.get("Retry-After"))
+        return False, None
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True, None
+    return False, None
+
+def backoff_delay(attempt, retry_after=None, base=None):
+    """
+    Delay before retry number attempt (0-based): Retry-After if given, else jittered exponential
+    starting from base seconds (defaults to BACKOFF_BASE).
+    """
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    ceiling = min(BACKOFF_MAX, (BACKOFF_BASE if base is None else base) * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling)
+
+def call_with_retries(provider, func, classify=requests_retry_info, max_retries=None):
+    """
+    Calls func under the provider's rate limit, retrying retryable failures.
+
+    Args:
+        provider: Rate limit bucket name ("serper", "llm", ...)
+        func: Zero-argument callable performing one attempt
+        classify: Maps an exception to (should retry, Retry-After seconds)
+        max_retries: Retries after the first attempt (defaults to MAX_RETRIES)
+
+    Returns:
+        func's return value; the last exception is re-raised once retries run out
+    """
+    limiter = get_limiter(provider)
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            return func()
+        except Exception as e:
+            retry, retry_after = classify(e)
+            if not retry or attempt >= max_retries:
+                raise
+            if retry_after is not None:
+                limiter.pause(retry_after)
+            delay = backoff_delay(attempt, retry_after)
+            print(f"{provider}: retrying after error ({e}) in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+async def acall_with_retries(provider, func, classify=requests_retry_info, max_retries=None):
+    """
+    Async counterpart of call_with_retries: func returns an awaitable, and
+    waits for the rate limit and backoff yield to the event loop instead of blocking.
+    """
+    limiter = get_limiter(provider)
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        wait = limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            return await func()
+        except Exception as e:
+            retry, retry_after = classify(e)
+            if not retry or attempt >= max_retries:
+                raise
+            if retry_after is not None:
+                limiter.pause(retry_after)
+            delay = backoff_delay(attempt, retry_after)
+            print(f"{provider}: retrying after error ({e}) in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,93 @@
+"""
+Streaming writers for validated companies.
+
+Each writer appends one record at a time and flushes as it goes, so long
+headless runs leave a usable file behind even if they are stopped early.
+JSONL keeps every field (including the nested LLM analysis); CSV and Parquet
+get the flat shortlist columns.
+"""
+
+import csv
+import json
+import os
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: only needed for Parquet output
+    pyarrow = None
+
+RESULT_COLUMNS = ["Query", "Company", "Website", "Why It Fits", "Evidence", "LinkedIn Search Strings", "Confidence"]
+PARQUET_ROW_GROUP = 500  # Rows buffered per Parquet row group
+
+class JsonlWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, record):
+        self._writer.writerow({col: record.get(col, "") for col in RESULT_COLUMNS})
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    def __init__(self, path):
+        if pyarrow is None:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        self._schema = pyarrow.schema([(col, pyarrow.string()) for col in RESULT_COLUMNS])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        self._rows = []
+
+    def write(self, record):
+        self._rows.append({col: str(record.get(col) or "") for col in RESULT_COLUMNS})
+        if len(self._rows) >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pyarrow.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+def output_format(path):
+    """Infers the output format from a file extension ('jsonl' if unknown)."""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return {"json": "jsonl", "ndjson": "jsonl", "pq": "parquet"}.get(ext, ext if ext in WRITERS else "jsonl")
+
+def open_writer(path, fmt=None):
+    """
+    Opens a streaming writer.
+
+    Args:
+        path: Output file (overwritten)
+        fmt: "jsonl", "csv" or "parquet" (inferred from the extension by default)
+
+    Returns:
+        Writer with write(record) and close()
+    """
+    fmt = fmt or output_format(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return WRITERS[fmt](path)
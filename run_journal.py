@@ -0,0 +1,188 @@
+"""
+Append-only journal of research runs.
+
+Every run gets an id; each validated company and each finished query is
+recorded as soon as it completes. Resuming a run replays the recorded
+companies and skips the work that is already done, so a crash, an API quota
+wall or a Streamlit rerun only costs the work that was in flight.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from cache_store import CACHE_DIR, connect
+from url_utils import registrable_domain
+
+RUN_JOURNAL_ENABLED = os.getenv("RUN_JOURNAL_ENABLED", "1") != "0"
+RUN_JOURNAL_PATH = os.getenv("RUN_JOURNAL_PATH", os.path.join(CACHE_DIR, "runs.sqlite"))
+
+_journal = None
+_journal_configured = False
+_journal_lock = threading.Lock()
+
+def new_run_id():
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+class RunJournal:
+    """
+    SQLite log of runs, their completed queries and validated companies.
+
+    Args:
+        path: SQLite file (defaults to RUN_JOURNAL_PATH)
+    """
+
+    def __init__(self, path=None):
+        self.path = path or RUN_JOURNAL_PATH
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        with self._lock:
+            self._conn.executescript(
+                """CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS queries (
+                    run_id TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    companies INTEGER NOT NULL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, query)
+                );
+                CREATE TABLE IF NOT EXISTS outcomes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    name TEXT,
+                    url TEXT,
+                    result TEXT,
+                    recorded_at REAL NOT NULL,
+                    UNIQUE (run_id, domain)
+                );"""
+            )
+            self._conn.commit()
+
+    def start_run(self, params, run_id=None):
+        """
+        Records a new run.
+
+        Args:
+            params: JSON-serializable run settings (queries, num_results, ...)
+            run_id: Optional id (a timestamped one is generated by default)
+
+        Returns:
+            The run id
+        """
+        run_id = run_id or new_run_id()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, params, status, created_at, updated_at) VALUES (?, ?, 'running', ?, ?)",
+                (run_id, json.dumps(params), now, now),
+            )
+            self._conn.commit()
+        return run_id
+
+    def set_status(self, run_id, status):
+        """Marks a run as 'running', 'completed' or 'interrupted'."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, time.time(), run_id)
+            )
+            self._conn.commit()
+
+    def get_run(self, run_id):
+        """Returns the run's summary dict (see list_runs), or None if it doesn't exist."""
+        runs = self._runs("WHERE r.run_id = ?", (run_id,))
+        return runs[0] if runs else None
+
+    def list_runs(self, limit=20):
+        """
+        Most recent runs first.
+
+        Returns:
+            List of dicts with 'run_id', 'params', 'status', 'created_at', 'updated_at',
+            'queries_done' and 'companies' (accepted so far)
+        """
+        return self._runs("ORDER BY r.created_at DESC LIMIT ?", (limit,))
+
+    def _runs(self, clause, args):
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT r.run_id, r.params, r.status, r.created_at, r.updated_at,
+                    (SELECT COUNT(*) FROM queries q WHERE q.run_id = r.run_id),
+                    (SELECT COUNT(*) FROM outcomes o WHERE o.run_id = r.run_id AND o.result IS NOT NULL)
+                FROM runs r {clause}""",
+                args,
+            ).fetchall()
+        return [
+            {"run_id": row[0], "params": json.loads(row[1]), "status": row[2], "created_at": row[3],
+             "updated_at": row[4], "queries_done": row[5], "companies": row[6]}
+            for row in rows
+        ]
+
+    def record_outcome(self, run_id, query, outcome):
+        """Records a settled validation outcome (accepted or rejected) for its domain."""
+        result = outcome.get("result")
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO outcomes (run_id, domain, query, name, url, result, recorded_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (run_id, registrable_domain(outcome["url"]), query, outcome.get("name"), outcome["url"],
+                 json.dumps(result, default=str) if result is not None else None, time.time()),
+            )
+            self._conn.commit()
+
+    def complete_query(self, run_id, query, companies):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO queries (run_id, query, companies, completed_at) VALUES (?, ?, ?, ?)",
+                (run_id, query, companies, time.time()),
+            )
+            self._conn.commit()
+
+    def completed_queries(self, run_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT query FROM queries WHERE run_id = ?", (run_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def outcomes(self, run_id):
+        """
+        Recorded outcomes in the order they completed.
+
+        Returns:
+            List of dicts with 'query', 'name', 'url' and 'result' (None for rejected companies)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT query, name, url, result FROM outcomes WHERE run_id = ? ORDER BY seq", (run_id,)
+            ).fetchall()
+        return [
+            {"query": row[0], "name": row[1], "url": row[2], "result": json.loads(row[3]) if row[3] else None}
+            for row in rows
+        ]
+
+def configure_run_journal(path=None, enabled=True):
+    """
+    Replaces the shared run journal.
+
+    Args:
+        path: SQLite file (defaults to RUN_JOURNAL_PATH)
+        enabled: Set to False to run without a journal
+    """
+    global _journal, _journal_configured
+    with _journal_lock:
+        _journal = RunJournal(path) if enabled else None
+        _journal_configured = True
+    return _journal
+
+def get_run_journal():
+    """Get the shared run journal, or None if journaling is disabled."""
+    if not _journal_configured:
+        configure_run_journal(enabled=RUN_JOURNAL_ENABLED)
+    return _journal
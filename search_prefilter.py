@@ -0,0 +1,147 @@
+"""
+Search result prefilter.
+
+Runs before any page is fetched. Hits on directories, social networks, job
+boards and news sites are dropped by registrable-domain suffix rules (allow
+rules win over deny rules, both extendable from the environment), and the
+remaining hits are scored on their URL, title and snippet so articles,
+listicles and job ads are skipped without a download or LLM call.
+"""
+
+import os
+import re
+from urllib.parse import urlparse
+from url_utils import get_host
+from careers_resolver import JOB_BOARD_DOMAINS
+from crawl_frontier import SKIP_EXTENSIONS
+
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "1") != "0"  # 0 applies the domain rules only
+# Hits scoring below this are skipped (hits without any evidence score 0)
+PREFILTER_MIN_SCORE = int(os.getenv("PREFILTER_MIN_SCORE", "0"))
+
+# Sites that list, review, employ or write about firms rather than being one
+DEFAULT_DENY_DOMAINS = {
+    "linkedin.com", "clutch.co", "upwork.com", "fiverr.com", "goodfirms.co", "designrush.com",
+    "themanifest.com", "sortlist.com", "g2.com", "capterra.com", "trustradius.com", "gartner.com",
+    "crunchbase.com", "zoominfo.com", "bloomberg.com", "forbes.com", "glassdoor.com", "indeed.com",
+    "builtin.com", "ziprecruiter.com", "wikipedia.org", "medium.com", "reddit.com", "quora.com",
+    "youtube.com", "facebook.com", "instagram.com", "twitter.com", "x.com",
+    "appexchange.salesforce.com", "partners.salesforce.com",
+} | JOB_BOARD_DOMAINS
+
+def _domain_list(value):
+    return {d.strip().lower().lstrip(".") for d in value.split(",") if d.strip()}
+
+PREFILTER_ALLOW_DOMAINS = _domain_list(os.getenv("PREFILTER_ALLOW_DOMAINS", ""))
+PREFILTER_DENY_DOMAINS = DEFAULT_DENY_DOMAINS | _domain_list(os.getenv("PREFILTER_DENY_DOMAINS", ""))
+
+# Title and snippet terms of firm sites, and of pages about firms
+FIRM_TERMS = {
+    "consulting": 2, "consultancy": 2, "consultants": 2, "advisory": 1, "implementation": 1,
+    "partner": 1, "agency": 1, "firm": 1, "services": 1, "solutions": 1, "we help": 1, "our clients": 1,
+}
+MAX_FIRM_SCORE = 3  # A listicle naming many firm terms is still a listicle
+NON_FIRM_PATTERNS = [(re.compile(pattern), weight) for pattern, weight in (
+    (r"\b(top|best) \d+\b", -4), (r"\blist of\b", -4), (r"\bdirectory\b", -3), (r"\branking", -3),
+    (r"\breviews?\b", -2), (r"\bcompare\b|\bvs\.?\b|\balternatives\b", -2), (r"\bsalar(y|ies)\b", -3),
+    (r"\bjobs?\b|\bjob openings\b", -2), (r"\bhow to\b|\bwhat is\b", -2), (r"\bnews\b|\bpress release\b", -2),
+    (r"\bwikipedia\b", -3), (r"\bpdf\b", -2),
+)]
+# Path segments of articles, listings and other pages that aren't a firm's own
+NON_FIRM_SEGMENTS = {
+    "blog", "news", "article", "articles", "post", "posts", "press", "insights", "wiki", "forum",
+    "questions", "tag", "category", "reviews", "jobs", "job", "careers", "profile", "profiles",
+    "directory", "list", "companies", "events", "podcast",
+}
+
+class DomainRules:
+    """
+    Compiled registrable-domain suffix rules.
+
+    A rule matches its domain and every subdomain of it ('salesforce.com'
+    matches 'appexchange.salesforce.com'). Allow rules override deny rules.
+
+    Args:
+        allow: Domain suffixes that are always kept
+        deny: Domain suffixes that are never fetched
+    """
+
+    def __init__(self, allow=(), deny=()):
+        self.allow = frozenset(d.lower().lstrip(".") for d in allow)
+        self.deny = frozenset(d.lower().lstrip(".") for d in deny)
+
+    def _match(self, host, rules):
+        # Check each label suffix of the host: O(labels) set lookups, however many rules
+        labels = host.split(".")
+        return any(".".join(labels[i:]) in rules for i in range(len(labels)))
+
+    def verdict(self, url):
+        """
+        Returns:
+            'allow', 'deny' or None when no rule matches
+        """
+        host = get_host(url)
+        if not host:
+            return "deny"
+        if self._match(host, self.allow):
+            return "allow"
+        if self._match(host, self.deny):
+            return "deny"
+        return None
+
+DEFAULT_RULES = DomainRules(PREFILTER_ALLOW_DOMAINS, PREFILTER_DENY_DOMAINS)
+
+def score_hit(result):
+    """
+    Scores a search hit by how much it looks like a firm's own site.
+
+    Args:
+        result: Search result dict with 'href', 'title' and 'body' (the snippet)
+
+    Returns:
+        Score: positive for firm sites, negative for articles, listicles, job ads and files
+    """
+    path = urlparse(result.get("href", "")).path.lower()
+    segments = [s for s in path.split("/") if s]
+    if path.endswith(SKIP_EXTENSIONS):
+        return -10
+    score = 1 if not segments else 0
+    if NON_FIRM_SEGMENTS.intersection(segments):
+        score -= 2
+    if len(segments) > 2:
+        score -= 1
+
+    text = " ".join(f"{result.get('title', '')} {result.get('body', '')}".lower().split())
+    score += min(MAX_FIRM_SCORE, sum(weight for term, weight in FIRM_TERMS.items() if term in text))
+    score += sum(weight for pattern, weight in NON_FIRM_PATTERNS if pattern.search(text))
+    return score
+
+def prefilter_results(results, rules=None, min_score=None):
+    """
+    Splits search hits into those worth fetching and those to skip.
+
+    Args:
+        results: Search results, in rank order
+        rules: DomainRules (defaults to the configured allow and deny lists)
+        min_score: Lowest score kept (defaults to PREFILTER_MIN_SCORE)
+
+    Returns:
+        Tuple of (kept results in their original order, {index of each skipped result: reason});
+        keyed by index so a URL returned twice is counted twice
+    """
+    rules = rules or DEFAULT_RULES
+    min_score = PREFILTER_MIN_SCORE if min_score is None else min_score
+    kept = []
+    skipped = {}
+    for index, r in enumerate(results):
+        verdict = rules.verdict(r.get("href", ""))
+        if verdict == "deny":
+            skipped[index] = "denied domain"
+            continue
+        if verdict != "allow" and PREFILTER_ENABLED:
+            score = score_hit(r)
+            if score < min_score:
+                skipped[index] = f"low score ({score})"
+                continue
+        kept.append(r)
+    return kept, skipped
@@ -2,7 +2,10 @@ import unittest
 from unittest.mock import patch, MagicMock
 from agent_logic import validate_company, find_careers_page
 from bs4 import BeautifulSoup
+from careers_resolver import get_careers_resolver
 
+# No probing of the (fictional) company sites for careers pages
+@patch.object(get_careers_resolver(), 'probe', False)
 class TestCompanyResearchAgent(unittest.TestCase):
 
     def test_find_careers_page(self):
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+from llm_utils import acall_llm, aanalyze_company_content, agenerate_linkedin_searches, configure_llm_cache, get_llm_client
+from rate_limiter import configure_limiter, RATE_LIMITS
+
+
+def completion(text):
+    return MagicMock(choices=[MagicMock(message=MagicMock(content=text))])
+
+
+class FakeAsyncClient:
+    """Stands in for AsyncOpenAI, tracking how many requests are in flight."""
+
+    def __init__(self, text, delay=0.01):
+        self.text = text
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self.chat = MagicMock()
+        self.chat.completions.create = self.create
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return completion(self.text)
+
+
+class TestAsyncLLM(unittest.TestCase):
+
+    def setUp(self):
+        configure_llm_cache(enabled=False)
+        configure_limiter("llm", 0, 1)
+
+    def tearDown(self):
+        configure_limiter("llm", *RATE_LIMITS["llm"])
+
+    def test_concurrency_bounded_by_semaphore(self):
+        client = FakeAsyncClient("ok")
+        state = {"client": client, "semaphore": None}
+
+        async def run():
+            state["semaphore"] = asyncio.Semaphore(3)
+            return await asyncio.gather(*(acall_llm(f"prompt {i}") for i in range(10)))
+
+        with patch('llm_utils.OPENROUTER_API_KEY', "key"), patch('llm_utils._get_async_state', return_value=state):
+            results = asyncio.run(run())
+
+        self.assertEqual(results, ["ok"] * 10)
+        self.assertEqual(client.calls, 10)
+        self.assertEqual(client.peak, 3)
+
+    def test_async_analysis_and_linkedin(self):
+        client = FakeAsyncClient('```json\n{"is_partner_ready": true, "positioning": "consulting-first"}\n```')
+        state = {"client": client, "semaphore": None}
+
+        async def run():
+            state["semaphore"] = asyncio.Semaphore(4)
+            analysis = await aanalyze_company_content("Acme", "https://acme.com", "Strategy consulting")
+            client.text = '["search a", "search b"]'
+            searches = await agenerate_linkedin_searches("Acme", "Consulting firm", analysis)
+            return analysis, searches
+
+        with patch('llm_utils.OPENROUTER_API_KEY', "key"), patch('llm_utils._get_async_state', return_value=state):
+            analysis, searches = asyncio.run(run())
+
+        self.assertTrue(analysis["is_partner_ready"])
+        self.assertEqual(searches, ["search a", "search b"])
+
+    def test_linkedin_falls_back_without_key(self):
+        with patch('llm_utils.OPENROUTER_API_KEY', None):
+            searches = asyncio.run(agenerate_linkedin_searches("Acme", "Consulting firm"))
+        self.assertEqual(len(searches), 3)
+        self.assertIn('"Acme"', searches[0])
+
+    def test_sync_client_is_shared(self):
+        with patch('llm_utils.OPENROUTER_API_KEY', "key"), patch('llm_utils._client', None):
+            self.assertIs(get_llm_client(), get_llm_client())
+
+
+if __name__ == '__main__':
+    unittest.main()
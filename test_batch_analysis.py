@@ -0,0 +1,87 @@
+import json
+import unittest
+from unittest.mock import patch
+from llm_utils import analyze_companies_batch, _pack_batches, _batch_overhead, estimate_tokens, BATCH_TOKENS_PER_ANSWER
+from agent_logic import validate_candidates
+from careers_resolver import get_careers_resolver
+
+
+def company(i, text="Strategy consulting and partner ecosystem."):
+    return {"id": i, "name": f"Firm {i}", "url": f"https://firm{i}.com", "text_content": text}
+
+
+# No probing of the (fictional) company sites for careers pages
+@patch.object(get_careers_resolver(), 'probe', False)
+class TestBatchAnalysis(unittest.TestCase):
+
+    def test_packing_respects_budget_and_size(self):
+        items = [(company(i), "x" * 4000) for i in range(5)]
+        per_item = estimate_tokens("x" * 4000) + BATCH_TOKENS_PER_ANSWER
+        batches = _pack_batches(items, token_budget=_batch_overhead() + 2 * per_item, max_batch_size=10)
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+        # The prompt and instructions count against the budget too
+        batches = _pack_batches(items, token_budget=2 * per_item, max_batch_size=10)
+        self.assertEqual([len(b) for b in batches], [1, 1, 1, 1, 1])
+        batches = _pack_batches(items, token_budget=100000, max_batch_size=3)
+        self.assertEqual([len(b) for b in batches], [3, 2])
+
+    @patch('llm_utils.analyze_company_content')
+    @patch('llm_utils.call_llm')
+    def test_one_request_with_fallback_for_missing_items(self, mock_call, mock_single):
+        mock_call.return_value = "```json\n" + json.dumps([
+            {"id": "a", "is_partner_ready": True, "positioning": "consulting-first"},
+            {"id": "b", "is_partner_ready": False},
+            {"id": "c", "oops": True},
+        ]) + "\n```"
+        mock_single.return_value = {"is_partner_ready": True, "positioning": "balanced"}
+
+        results = analyze_companies_batch([company("a"), company("b"), company("c")], max_batch_size=10)
+
+        self.assertEqual(mock_call.call_count, 1)
+        self.assertIn("Company id: c", mock_call.call_args.args[0])
+        self.assertEqual(results["a"]["positioning"], "consulting-first")
+        self.assertFalse(results["b"]["is_partner_ready"])
+        self.assertEqual(results["c"]["positioning"], "balanced")
+        mock_single.assert_called_once()
+        self.assertEqual(mock_single.call_args.args[0], "Firm c")
+
+    @patch('llm_utils.analyze_company_content')
+    @patch('llm_utils.call_llm')
+    def test_unparseable_batch_falls_back_to_single_calls(self, mock_call, mock_single):
+        mock_call.return_value = "Sorry, I can't do that."
+        mock_single.return_value = {"is_partner_ready": True}
+
+        results = analyze_companies_batch([company("a"), company("b")], max_batch_size=10)
+        self.assertEqual(mock_single.call_count, 2)
+        self.assertEqual(set(results), {"a", "b"})
+
+    @patch('agent_logic.analyze_company_content')
+    @patch('agent_logic.analyze_companies_batch')
+    @patch('agent_logic.get_page_content')
+    def test_validate_candidates_batch_mode(self, mock_get_content, mock_batch, mock_single):
+        pages = {
+            "https://good.com": "<html><body><p>We partner with SaaS vendors on transformation.</p></body></html>",
+            "https://other.com": "<html><body><p>Strategic advisory and roadmap work.</p></body></html>",
+        }
+        mock_get_content.side_effect = lambda url: pages.get(url)
+        mock_batch.side_effect = lambda companies, failed=None: {
+            c["id"]: {"is_partner_ready": True, "positioning": "consulting-first"} for c in companies
+        }
+
+        outcomes = validate_candidates([
+            {"title": "Good", "href": "https://good.com"},
+            {"title": "Dead", "href": "https://dead.com"},
+            {"title": "Other", "href": "https://other.com"},
+        ], max_workers=3, batch_llm=True)
+
+        self.assertEqual(mock_batch.call_count, 1)
+        self.assertEqual(len(mock_batch.call_args.args[0]), 2)
+        mock_single.assert_not_called()
+        self.assertEqual([o["name"] for o in outcomes], ["Good", "Dead", "Other"])
+        self.assertIn("LLM: consulting-first positioning", outcomes[0]["result"]["Why It Fits"])
+        self.assertIsNone(outcomes[1]["result"])
+        self.assertIsNotNone(outcomes[2]["result"])
+
+
+if __name__ == '__main__':
+    unittest.main()
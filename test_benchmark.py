@@ -0,0 +1,54 @@
+import unittest
+from benchmark import run_benchmark, compare_reports, percentile, SyntheticCorpus
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_offline_run_reports_every_stage(self):
+        report = run_benchmark(sites=8, queries=2, num_results=4, workers=4, page_kb=1,
+                               site_latency=0, search_latency=0, llm_latency=0)
+
+        validate = report["phases"]["validate"]["stages"]
+        self.assertEqual(validate["validate_company"]["count"], 8)
+        self.assertEqual(validate["fetch"]["errors"], 0)
+        # Only the ambiguous sites reach the stand-in LLM
+        self.assertEqual(validate["llm"]["count"], 2)
+
+        pipeline = report["phases"]["pipeline"]["stages"]
+        self.assertEqual(pipeline["search"]["count"], 2)
+        self.assertEqual(pipeline["process_query"]["count"], 2)
+        self.assertGreater(report["memory"]["max_rss_mb"], 0)
+
+    def test_batch_llm_sends_one_request_per_batch(self):
+        report = run_benchmark(sites=12, queries=0, num_results=4, workers=4, page_kb=1,
+                               site_latency=0, search_latency=0, llm_latency=0, batch_llm=True)
+        # The 3 ambiguous sites fit one batch; a parse failure would add a single call per site
+        self.assertEqual(report["phases"]["validate"]["stages"]["llm"]["count"], 1)
+
+    def test_error_rate(self):
+        report = run_benchmark(sites=4, queries=0, workers=2, page_kb=1, site_latency=0,
+                               search_latency=0, llm_latency=0, error_rate=1.0)
+        fetch = report["phases"]["validate"]["stages"]["fetch"]
+        self.assertEqual(fetch["errors"], fetch["count"])
+
+    def test_compare_reports(self):
+        def report(per_sec, p95):
+            return {"phases": {"validate": {"stages": {"fetch": {"per_sec": per_sec, "p95_ms": p95}}}}}
+        self.assertEqual(compare_reports(report(10, 100), report(10, 100)), [])
+        self.assertEqual(len(compare_reports(report(7, 100), report(10, 100), tolerance=0.2)), 1)
+        self.assertEqual(len(compare_reports(report(10, 130), report(10, 100), tolerance=0.2)), 1)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_corpus_search_is_deterministic(self):
+        corpus = SyntheticCorpus(sites=10)
+        self.assertEqual(corpus.search("q", 3), corpus.search("q", 3))
+        self.assertEqual(len({r["link"] for r in corpus.search("q", 20)}), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from bs4 import BeautifulSoup
+from careers_resolver import CareersResolver, rank_careers_links, find_careers_page
+from fetcher import configure_page_cache
+
+ROUTES = {}
+REQUEST_LOG = []
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    allow_head = True
+
+    def _respond(self, send_body):
+        REQUEST_LOG.append((self.command, self.path))
+        route = ROUTES.get(self.path)
+        if route is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if "redirect" in route:
+            self.send_response(301)
+            self.send_header("Location", route["redirect"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = route["body"].encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", route.get("type", "text/html"))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        if not SiteHandler.allow_head:
+            REQUEST_LOG.append((self.command, self.path))
+            self.send_response(405)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._respond(False)
+
+    def log_message(self, *args):
+        pass
+
+
+def soup(html):
+    return BeautifulSoup(html, "html.parser")
+
+
+class TestCareersLinkRanking(unittest.TestCase):
+
+    def test_nav_link_beats_blog_post(self):
+        page = soup(
+            '<a href="/blog/how-we-hire">Jobs to be done</a>'
+            '<a href="https://www.linkedin.com/company/acme/jobs">Jobs</a>'
+            '<a href="/company/careers">Careers</a>'
+        )
+        ranked = rank_careers_links(page, "https://acme.com")
+        self.assertEqual(ranked[0][1], "https://acme.com/company/careers")
+        self.assertNotIn("https://acme.com/blog/how-we-hire", [url for _, url in ranked])
+
+    def test_hosted_job_board_accepted(self):
+        page = soup('<a href="https://boards.greenhouse.io/acme">Open roles</a>')
+        self.assertEqual(find_careers_page(page, "https://acme.com"), "https://boards.greenhouse.io/acme")
+
+    def test_no_candidates(self):
+        page = soup('<a href="/about">About</a><a href="mailto:jobs@acme.com">Email</a>')
+        self.assertIsNone(find_careers_page(page, "https://acme.com"))
+
+
+class TestCareersResolver(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        configure_page_cache(enabled=False)
+        ROUTES.clear()
+        REQUEST_LOG.clear()
+        SiteHandler.allow_head = True
+        self.resolver = CareersResolver(probe=True, timeout=5)
+
+    @patch("careers_resolver.probe_url")
+    def test_confident_link_skips_probes(self, mock_probe):
+        page = soup('<a href="/careers">Careers</a>')
+        self.assertEqual(self.resolver.resolve(page, self.base), self.base + "/careers")
+        mock_probe.assert_not_called()
+
+    def test_probes_common_paths_and_memoizes(self):
+        ROUTES["/jobs"] = {"body": "<html><body>Open roles</body></html>"}
+        ROUTES["/join-us"] = {"redirect": "/"}
+        ROUTES["/"] = {"body": "<html><body>Home</body></html>"}
+
+        self.assertEqual(self.resolver.resolve(soup("<p>No links</p>"), self.base), self.base + "/jobs")
+        self.assertNotIn(("GET", "/jobs"), REQUEST_LOG)  # Checked with HEAD only
+
+        with patch.object(self.resolver, "discover") as mock_discover:
+            self.assertEqual(self.resolver.resolve(soup("<p>No links</p>"), self.base + "/about"), self.base + "/jobs")
+        mock_discover.assert_not_called()
+
+    def test_redirect_to_homepage_is_not_a_careers_page(self):
+        ROUTES["/careers"] = {"redirect": "/"}
+        ROUTES["/"] = {"body": "<html><body>Home</body></html>"}
+        self.assertIsNone(self.resolver.resolve(soup("<p>No links</p>"), self.base))
+
+    def test_sitemap_lookup(self):
+        ROUTES["/sitemap.xml"] = {
+            "type": "application/xml",
+            "body": (
+                "<?xml version='1.0'?><urlset>"
+                f"<url><loc>{self.base}/about</loc></url>"
+                f"<url><loc>{self.base}/company/work-with-us/senior-consultant</loc></url>"
+                f"<url><loc>{self.base}/company/work-with-us</loc></url>"
+                "</urlset>"
+            ),
+        }
+        self.assertEqual(self.resolver.resolve(soup("<p>No links</p>"), self.base),
+                         self.base + "/company/work-with-us")
+
+    def test_falls_back_to_get_when_head_is_rejected(self):
+        SiteHandler.allow_head = False
+        ROUTES["/careers"] = {"body": "<html><body>Careers</body></html>"}
+        self.assertEqual(self.resolver.resolve(soup("<p>No links</p>"), self.base), self.base + "/careers")
+        self.assertIn(("GET", "/careers"), REQUEST_LOG)
+
+    def test_hits_follow_path_preference(self):
+        def probe(url):
+            if url.endswith("/careers"):
+                time.sleep(0.2)  # Slower than /jobs, but preferred
+                return url
+            return url if url.endswith("/jobs") else None
+
+        with patch("careers_resolver.probe_url", side_effect=probe):
+            self.assertEqual(self.resolver.discover(self.base), (self.base + "/careers", True))
+
+    def test_remaining_lookups_stopped_after_a_hit(self):
+        stops = []
+
+        def sitemap(origin, stop):
+            stops.append(stop)
+            stop.wait(2)
+            return None
+
+        start = time.monotonic()
+        with patch("careers_resolver.probe_url", side_effect=lambda url: url if url.endswith("/careers") else None), \
+                patch("careers_resolver._careers_from_sitemap", side_effect=sitemap):
+            self.assertEqual(self.resolver.discover(self.base)[0], self.base + "/careers")
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(all(stop.is_set() for stop in stops))
+
+    def test_weak_link_used_when_probes_find_nothing(self):
+        page = soup('<a href="/team">Meet the team and join us</a>')
+        self.assertEqual(self.resolver.resolve(page, self.base), self.base + "/team")
+
+
+if __name__ == '__main__':
+    unittest.main()
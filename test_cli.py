@@ -0,0 +1,89 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import cli
+
+
+def fake_search(query, max_results=5):
+    return [{"title": f"{query} firm", "href": f"http://{query}.com"}]
+
+
+def fake_validate(name, url):
+    return {"Company": name, "Website": url, "Why It Fits": "Partner language", "Confidence": "High",
+            "llm_analysis": {"positioning": "consulting"}}
+
+
+@patch('agent_logic.SEARCH_BATCH_ENABLED', False)
+@patch('agent_logic.validate_company', side_effect=fake_validate)
+@patch('agent_logic.search_companies', side_effect=fake_search)
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        # Don't leave the shared caches pointing into the deleted directory
+        cli.configure_storage(use_cache=False, journal=False, planner=False)
+        self.tmp.cleanup()
+
+    def run_cli(self, *argv):
+        return cli.main(["run", "--cache-dir", self.cache_dir, *argv])
+
+    def test_jsonl_output_from_queries_file(self, mock_search, mock_validate):
+        queries = os.path.join(self.tmp.name, "queries.txt")
+        with open(queries, "w") as f:
+            f.write("# comment\nalpha\n\nbeta\n")
+        output = os.path.join(self.tmp.name, "out.jsonl")
+
+        self.assertEqual(self.run_cli("--queries-file", queries, "--query", "gamma", "--output", output), 0)
+        with open(output) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([r["Query"] for r in rows], ["gamma", "alpha", "beta"])
+        self.assertEqual(rows[0]["llm_analysis"], {"positioning": "consulting"})
+        self.assertEqual(mock_search.call_args_list[0].kwargs["max_results"], 5)
+
+    def test_csv_output(self, mock_search, mock_validate):
+        output = os.path.join(self.tmp.name, "out.csv")
+        self.run_cli("--query", "alpha", "--num-results", "3", "--output", output)
+        with open(output, newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0]["Company"], "alpha firm")
+        self.assertEqual(rows[0]["Evidence"], "")
+        self.assertNotIn("llm_analysis", rows[0])
+
+    def test_time_budget_then_resume(self, mock_search, mock_validate):
+        output = os.path.join(self.tmp.name, "out.jsonl")
+        self.run_cli("--query", "alpha", "--query", "beta", "--time-budget", "0", "--output", output)
+        self.assertEqual(mock_search.call_count, 0)
+
+        journal = cli.get_run_journal()
+        run = journal.list_runs()[0]
+        self.assertEqual(run["status"], "interrupted")
+
+        self.run_cli("--resume", run["run_id"], "--output", output)
+        with open(output) as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.assertEqual(journal.get_run(run["run_id"])["status"], "completed")
+
+    def test_unknown_resume(self, mock_search, mock_validate):
+        self.assertEqual(self.run_cli("--resume", "missing"), 2)
+
+    def test_plan_skips_saturated_queries(self, mock_search, mock_validate):
+        output = os.path.join(self.tmp.name, "out.jsonl")
+        mock_search.side_effect = lambda query, max_results=5: fake_search(query.split()[0], max_results)
+        # Repeating a query doesn't saturate it; returning another query's domains does
+        for _ in range(3):
+            self.run_cli("--query", "alpha", "--output", output)
+        self.run_cli("--query", "alpha firms", "--output", output)
+        mock_search.reset_mock()
+
+        self.run_cli("--query", "alpha", "--query", "alpha firms", "--query", "beta", "--plan", "--output", output)
+        self.assertEqual(sorted(c.args[0] for c in mock_search.call_args_list), ["alpha", "beta"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import time
+import unittest
+from unittest.mock import patch
+from agent_logic import validate_candidates, process_query, DomainRegistry
+
+
+class TestConcurrentValidation(unittest.TestCase):
+
+    @patch('agent_logic.validate_company')
+    def test_results_keep_search_order(self, mock_validate):
+        def slow_validate(name, url):
+            # Later candidates finish first
+            time.sleep(0.05 if name == "A" else 0.0)
+            return {"Company": name, "Website": url}
+        mock_validate.side_effect = slow_validate
+
+        candidates = [
+            {"title": "A", "href": "http://a.com"},
+            {"title": "B", "href": "http://b.com"},
+            {"title": "C", "href": "http://c.com"},
+        ]
+        outcomes = validate_candidates(candidates, max_workers=3)
+        self.assertEqual([o["name"] for o in outcomes], ["A", "B", "C"])
+        self.assertEqual(outcomes[0]["result"]["Website"], "http://a.com")
+
+    @patch('agent_logic.validate_company')
+    def test_errors_reported_per_company(self, mock_validate):
+        def flaky_validate(name, url):
+            if name == "Broken":
+                raise ValueError("boom")
+            return {"Company": name, "Website": url}
+        mock_validate.side_effect = flaky_validate
+
+        outcomes = validate_candidates([
+            {"title": "Broken", "href": "http://broken.com"},
+            {"title": "Fine", "href": "http://fine.com"},
+        ], max_workers=2)
+        self.assertEqual(outcomes[0]["error"], "boom")
+        self.assertIsNone(outcomes[0]["result"])
+        self.assertIsNone(outcomes[1]["error"])
+
+    @patch('agent_logic.validate_company')
+    def test_same_domain_validated_once(self, mock_validate):
+        mock_validate.side_effect = lambda name, url: {"Company": name, "Website": url}
+
+        candidates = [
+            {"title": "Acme", "href": "https://www.acme.com/about?utm_source=google"},
+            {"title": "Acme Careers", "href": "http://acme.com/careers/"},
+            {"title": "Other", "href": "https://other.co.uk"},
+        ]
+        outcomes = validate_candidates(candidates, max_workers=3)
+
+        self.assertEqual(mock_validate.call_count, 2)
+        duplicates = [o for o in outcomes if o["duplicate"]]
+        self.assertEqual(len(duplicates), 1)
+        # The duplicate shares the owner's result
+        self.assertEqual(duplicates[0]["result"]["Company"], "Acme")
+
+    @patch('agent_logic.validate_company')
+    @patch('agent_logic.search_companies')
+    def test_registry_shared_across_queries(self, mock_search, mock_validate):
+        mock_search.side_effect = [
+            [{"title": "Acme", "href": "https://acme.com"}],
+            [{"title": "Acme again", "href": "https://www.acme.com/services"},
+             {"title": "Beta", "href": "https://beta.io"}],
+        ]
+        mock_validate.side_effect = lambda name, url: {"Company": name}
+
+        registry = DomainRegistry()
+        first = process_query("query one", registry=registry)
+        second = process_query("query two", registry=registry)
+
+        self.assertEqual(first, [{"Company": "Acme"}])
+        self.assertEqual(second, [{"Company": "Beta"}])
+        self.assertEqual(mock_validate.call_count, 2)
+        self.assertEqual(registry.seen_domains(), {"acme.com", "beta.io"})
+
+    @patch('agent_logic.validate_company')
+    @patch('agent_logic.search_companies')
+    def test_process_query_filters_and_collects(self, mock_search, mock_validate):
+        mock_search.return_value = [
+            {"title": "Firm", "href": "http://firm.com"},
+            {"title": "Profile", "href": "https://www.linkedin.com/company/firm"},
+            {"title": "Rejected", "href": "http://rejected.com"},
+        ]
+        mock_validate.side_effect = lambda name, url: None if name == "Rejected" else {"Company": name}
+
+        companies = process_query("query", num_results=3)
+        self.assertEqual(companies, [{"Company": "Firm"}])
+        self.assertEqual(mock_validate.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import time
+import unittest
+from unittest.mock import patch
+from agent_logic import validate_company
+from crawl_frontier import rank_frontier, fetch_pages, score_link, page_byte_budget
+from page_document import PageDocument, SiteDocument
+
+HOMEPAGE = """
+<html><body>
+    <nav>
+        <a href="/">Home</a>
+        <a href="/about">About</a>
+        <a href="/partners">Partners</a>
+        <a href="/services/">Services</a>
+        <a href="/services">Services</a>
+        <a href="/case-studies">Case Studies</a>
+        <a href="/blog/partner-news">Partner news</a>
+        <a href="/careers">Careers</a>
+        <a href="/brochure.pdf">Brochure</a>
+        <a href="https://other.com/partners">Other partners</a>
+    </nav>
+    <p>We build software.</p>
+</body></html>
+"""
+
+
+class TestCrawlFrontier(unittest.TestCase):
+
+    def test_ranks_signal_pages_first(self):
+        doc = PageDocument(HOMEPAGE, "https://acme.com")
+        frontier = rank_frontier(doc, exclude=("https://acme.com", "https://acme.com/careers"), limit=10)
+        self.assertEqual(frontier[0], "https://acme.com/partners")
+        self.assertEqual(set(frontier), {
+            "https://acme.com/partners", "https://acme.com/services/",
+            "https://acme.com/case-studies", "https://acme.com/about",
+        })
+
+    def test_limit(self):
+        doc = PageDocument(HOMEPAGE, "https://acme.com")
+        self.assertEqual(len(rank_frontier(doc, limit=2)), 2)
+
+    def test_deep_pages_score_lower(self):
+        self.assertGreater(score_link("https://acme.com/services", "Services"),
+                           score_link("https://acme.com/services/cloud/aws", "AWS"))
+
+    def test_fetch_pages_respects_time_budget(self):
+        pages = fetch_pages({
+            "fast": lambda: "<p>fast</p>",
+            "failed": lambda: None,
+            "slow": lambda: time.sleep(0.5) or "<p>slow</p>",
+        }, timeout=0.2)
+        self.assertEqual(pages, {"fast": "<p>fast</p>"})
+
+    def test_byte_budget_is_shared(self):
+        self.assertEqual(page_byte_budget(4, max_bytes=1000), 250)
+        self.assertEqual(page_byte_budget(0, max_bytes=1000), 1000)
+
+    def test_site_document_merges_pages(self):
+        site = SiteDocument([
+            PageDocument("<p>Home page intro text here</p>", "https://acme.com"),
+            PageDocument("<p>Home page intro text here</p><p>We are an implementation partner</p>",
+                         "https://acme.com/partners"),
+        ])
+        self.assertIn("implementation partner", site.lower_text)
+        self.assertEqual(site.content_blocks, ["Home page intro text here", "We are an implementation partner"])
+
+
+class TestCrawledValidation(unittest.TestCase):
+
+    @patch('agent_logic.analyze_company_content', return_value=None)
+    @patch('agent_logic.get_page_content')
+    def test_signals_found_on_inner_pages(self, mock_get_content, mock_analyze):
+        pages = {
+            "http://crawled.com": HOMEPAGE,
+            "http://crawled.com/partners": "<p>A certified implementation partner in the SaaS ecosystem.</p>",
+            "http://crawled.com/case-studies": "<p>Digital transformation with measurable ROI and business outcomes.</p>",
+            "http://crawled.com/careers": "<p>Open roles: Strategy Consultant, Engagement Manager.</p>",
+        }
+        mock_get_content.side_effect = lambda url, max_bytes=None: pages.get(url)
+
+        result = validate_company("Crawled", "http://crawled.com")
+
+        self.assertIsNotNone(result)
+        self.assertIn("Partner/Ecosystem language detected", result["Why It Fits"])
+        self.assertIn("Outcome-based language detected", result["Why It Fits"])
+        fetched = {call.args[0] for call in mock_get_content.call_args_list}
+        self.assertNotIn("http://crawled.com/blog/partner-news", fetched)
+        self.assertLessEqual(len(fetched), 5)  # Homepage, careers page and at most three extra pages
+        extra_calls = [call for call in mock_get_content.call_args_list if call.kwargs.get("max_bytes")]
+        self.assertTrue(extra_calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,270 @@
+import gzip
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fetcher import (fetch_page, is_html_content_type, get_session, configure_page_cache, HostThrottle,
+                     CircuitBreaker, DnsCache, configure_circuit_breaker)
+from cache_store import PageCache
+
+PAGES = {
+    "/home": ("text/html; charset=utf-8", "<html><body>Strategy consulting café</body></html>".encode("utf-8")),
+    "/big": ("text/html", b"<p>" + b"x" * 50000 + b"</p>"),
+    "/report.pdf": ("application/pdf", b"%PDF-1.4 binary"),
+    "/compressed": ("text/html", b"<html><body>" + b"partner " * 1000 + b"</body></html>"),
+}
+
+REQUEST_LOG = []
+FLAKY_FAILURES = []
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        REQUEST_LOG.append(self.path)
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = b"<html><body>Versioned page</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path == "/down" or (self.path == "/flaky" and FLAKY_FAILURES and FLAKY_FAILURES.pop()):
+            self.send_error(503)
+            return
+        if self.path == "/flaky":
+            self.path = "/home"
+        if self.path not in PAGES:
+            self.send_error(404)
+            return
+        content_type, body = PAGES[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if self.path == "/compressed" and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFetcher(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        configure_page_cache(enabled=False)
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = configure_page_cache(os.path.join(self.tmpdir.name, "pages.sqlite"), ttl=3600)
+        configure_circuit_breaker()
+        REQUEST_LOG.clear()
+
+    def tearDown(self):
+        configure_page_cache(enabled=False)
+        configure_circuit_breaker()
+        self.tmpdir.cleanup()
+
+    def test_fetch_html(self):
+        self.assertIn("Strategy consulting café", fetch_page(self.base + "/home"))
+
+    def test_byte_cap_truncates(self):
+        text = fetch_page(self.base + "/big", max_bytes=1000)
+        self.assertEqual(len(text), 1000)
+
+    def test_non_html_rejected(self):
+        self.assertIsNone(fetch_page(self.base + "/report.pdf"))
+
+    def test_gzip_transfer_decoded(self):
+        text = fetch_page(self.base + "/compressed")
+        self.assertTrue(text.startswith("<html><body>partner"))
+
+    def test_truncated_body_not_cached(self):
+        fetch_page(self.base + "/big", max_bytes=1000)
+        self.assertIsNone(self.cache.get(self.base + "/big"))
+        self.assertEqual(len(fetch_page(self.base + "/big")), 50007)
+
+    def test_body_of_exactly_the_cap_is_complete(self):
+        self.assertEqual(len(fetch_page(self.base + "/big", max_bytes=50007)), 50007)
+        self.assertIsNotNone(self.cache.get(self.base + "/big"))
+
+    def test_http_error_returns_none(self):
+        self.assertIsNone(fetch_page(self.base + "/missing"))
+
+    @patch('fetcher.RETRY_BACKOFF', 0.01)
+    def test_transient_error_retried(self):
+        FLAKY_FAILURES[:] = [True]
+        self.assertIn("Strategy consulting", fetch_page(self.base + "/flaky"))
+        self.assertEqual(REQUEST_LOG, ["/flaky", "/flaky"])
+
+    def test_client_error_not_retried(self):
+        fetch_page(self.base + "/missing")
+        self.assertEqual(REQUEST_LOG, ["/missing"])
+
+    @patch('fetcher.RETRY_BACKOFF', 0.01)
+    def test_failing_host_short_circuited(self):
+        configure_circuit_breaker(threshold=2, cooldown=60)
+        self.assertIsNone(fetch_page(self.base + "/down"))
+        REQUEST_LOG.clear()
+        # The circuit is open for the whole host, not just the failing page
+        self.assertIsNone(fetch_page(self.base + "/home"))
+        self.assertEqual(REQUEST_LOG, [])
+
+    def test_session_is_shared(self):
+        self.assertIs(get_session(), get_session())
+
+    def test_fresh_cache_hit_skips_network(self):
+        first = fetch_page(self.base + "/home")
+        second = fetch_page(self.base + "/home/")
+        self.assertEqual(first, second)
+        self.assertEqual(REQUEST_LOG, ["/home"])
+
+    def test_stale_entry_revalidated_with_etag(self):
+        self.cache.ttl = 0
+        self.assertIn("Versioned page", fetch_page(self.base + "/etag"))
+        self.assertIn("Versioned page", fetch_page(self.base + "/etag"))
+        self.assertEqual(REQUEST_LOG, ["/etag", "/etag"])
+        entry = self.cache.get(self.base + "/etag")
+        self.assertEqual(entry.etag, '"v1"')
+
+    def test_is_html_content_type(self):
+        self.assertTrue(is_html_content_type("text/html; charset=UTF-8"))
+        self.assertTrue(is_html_content_type(""))
+        self.assertFalse(is_html_content_type("image/png"))
+
+
+class TestHostThrottle(unittest.TestCase):
+
+    def test_limits_concurrency_per_host(self):
+        throttle = HostThrottle(1)
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def request(url):
+            with throttle.hold(url):
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                time.sleep(0.02)
+                with lock:
+                    state["active"] -= 1
+
+        threads = [threading.Thread(target=request, args=(f"http://www.same.com/page{i}",)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(state["peak"], 1)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.record_failure("https://a.com/x")
+        self.assertTrue(breaker.allow("https://a.com/y"))
+        breaker.record_failure("https://a.com/y")
+        self.assertFalse(breaker.allow("https://a.com/z"))
+        self.assertTrue(breaker.allow("https://b.com"))
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.record_failure("https://a.com")
+        breaker.record_success("https://a.com")
+        breaker.record_failure("https://a.com")
+        self.assertTrue(breaker.allow("https://a.com"))
+
+    def test_unreachable_host_opens_at_once(self):
+        breaker = CircuitBreaker(threshold=5, cooldown=60)
+        breaker.record_failure("https://dead.com", unreachable=True)
+        self.assertTrue(breaker.is_open("https://dead.com"))
+
+    def test_single_trial_after_cooldown(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+        breaker.record_failure("https://a.com")
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow("https://a.com"))
+        self.assertFalse(breaker.allow("https://a.com"))  # Only one trial at a time
+        breaker.record_failure("https://a.com")
+        self.assertFalse(breaker.allow("https://a.com"))
+
+
+class TestDnsCache(unittest.TestCase):
+
+    @patch('fetcher.socket.getaddrinfo')
+    def test_lookups_are_cached(self, mock_getaddrinfo):
+        mock_getaddrinfo.return_value = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 443))]
+        cache = DnsCache(ttl=60, negative_ttl=60)
+        for _ in range(3):
+            self.assertEqual(cache.resolve("acme.com", 443)[0][4][0], "10.0.0.1")
+        self.assertEqual(mock_getaddrinfo.call_count, 1)
+        self.assertEqual(cache._host_locks, {})  # Per-host locks don't outlive the lookup
+
+    @patch('fetcher.socket.getaddrinfo', side_effect=socket.gaierror("Name or service not known"))
+    def test_failed_lookups_are_cached(self, mock_getaddrinfo):
+        cache = DnsCache(ttl=60, negative_ttl=60)
+        for _ in range(2):
+            with self.assertRaises(socket.gaierror):
+                cache.resolve("missing.example", 443)
+        self.assertEqual(mock_getaddrinfo.call_count, 1)
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = PageCache(os.path.join(self.tmpdir.name, "pages.sqlite"), ttl=60)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_keyed_by_normalized_url(self):
+        self.cache.put("HTTP://Example.com:80/About/#team", "<p>about</p>", etag='"a"')
+        entry = self.cache.get("http://example.com/About")
+        self.assertEqual(entry.body, "<p>about</p>")
+        self.assertEqual(entry.etag, '"a"')
+
+    def test_unconfirmed_entries_purged(self):
+        self.cache.put("http://example.com/old", "<p>old</p>")
+        self.cache._conn.execute("UPDATE pages SET fetched_at = 0")
+        self.cache._conn.commit()
+        self.cache.put("http://example.com/new", "<p>new</p>")
+        with patch('cache_store.PURGE_EVERY', 1):
+            self.cache.put("http://example.com/newer", "<p>newer</p>")
+        self.assertIsNone(self.cache.get("http://example.com/old"))
+        self.assertIsNotNone(self.cache.get("http://example.com/new"))
+
+    def test_ttl_expiry(self):
+        self.cache.put("http://example.com", "<p>home</p>")
+        entry = self.cache.get("http://example.com")
+        self.assertTrue(self.cache.is_fresh(entry))
+        self.cache.ttl = 0
+        time.sleep(0.01)
+        self.assertFalse(self.cache.is_fresh(entry))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from keyword_matcher import KeywordMatcher, get_matcher
+from agent_logic import analyze_text_for_keywords
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_word_boundaries(self):
+        matcher = KeywordMatcher(["partner", "roi"])
+        scan = matcher.scan("A heroic partnership.")
+        self.assertEqual(scan.matches, [])
+
+    def test_plurals_and_case(self):
+        matcher = KeywordMatcher(["partner", "business outcome"])
+        scan = matcher.scan("Our Partners deliver business\n outcomes.")
+        self.assertEqual(scan.keywords(), ["partner", "business outcome"])
+
+    def test_groups_counts_and_offsets(self):
+        matcher = KeywordMatcher({
+            "outcome": ["roi", "value"],
+            "hiring": ["staff augmentation"],
+        })
+        text = "ROI first. Value, then more ROI. No staff augmentation."
+        scan = matcher.scan(text)
+        self.assertEqual(scan.counts("outcome"), {"roi": 2, "value": 1})
+        self.assertEqual(scan.keywords("hiring"), ["staff augmentation"])
+        first = scan.matches[0]
+        self.assertEqual(text[first.start:first.end], "ROI")
+
+    def test_longest_keyword_wins(self):
+        scan = KeywordMatcher(["partner", "client partner"]).scan("Hiring a Client Partner")
+        self.assertEqual(scan.keywords(), ["client partner"])
+
+    def test_special_characters(self):
+        scan = KeywordMatcher(["100+ engineers"]).scan("We have 100+ engineers ready.")
+        self.assertEqual(scan.keywords(), ["100+ engineers"])
+
+    def test_unicode_case_folding(self):
+        # Case-insensitive matches whose lowercase isn't the keyword ("İ", long s "ſ")
+        matcher = KeywordMatcher({"partner": ["implementation partner"], "outcome": ["roi", "strategic roadmap"]})
+        scan = matcher.scan("IMPLEMENTATİON partner. ſtrategic roadmap. ROİ value.")
+        self.assertEqual(scan.keywords(), ["implementation partner", "strategic roadmap", "roi"])
+        self.assertEqual(scan.keywords("outcome"), ["strategic roadmap", "roi"])
+
+    def test_snippet(self):
+        text = "word " * 40 + "trusted partner in the ecosystem " + "word " * 40
+        scan = KeywordMatcher(["partner"]).scan(text)
+        snippet = scan.snippet(scan.matches[0], width=20)
+        self.assertIn("partner", snippet)
+        self.assertTrue(snippet.startswith("...") and snippet.endswith("..."))
+
+    def test_matchers_reused(self):
+        self.assertIs(get_matcher({"a": ["x", "y"]}), get_matcher({"a": ["x", "y"]}))
+
+    def test_analyze_text_for_keywords(self):
+        positive, negative = analyze_text_for_keywords(
+            "Strategic roadmap advisory; dedicated team available.",
+            ["strategic", "roadmap", "roi"],
+            ["dedicated team"],
+        )
+        self.assertEqual(positive, ["strategic", "roadmap"])
+        self.assertEqual(negative, ["dedicated team"])
+
+    def test_analyze_text_with_turkish_capitals(self):
+        positive, _ = analyze_text_for_keywords("ROİ VALUE", ["roi", "value"], [])
+        self.assertEqual(positive, ["roi", "value"])
+
+
+if __name__ == '__main__':
+    unittest.main()
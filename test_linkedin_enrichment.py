@@ -0,0 +1,91 @@
+import json
+import unittest
+from unittest.mock import patch
+from agent_logic import validate_company, enrich_linkedin_searches, enrich_linkedin_searches_async
+from llm_utils import generate_linkedin_searches_batch, linkedin_search_templates
+from careers_resolver import get_careers_resolver
+
+STRONG_HOMEPAGE = """
+<html><body>
+    <p>A strategy consulting firm and trusted implementation partner in the SaaS ecosystem.</p>
+    <p>We deliver business outcomes, ROI and transformation through advisory work.</p>
+</body></html>
+"""
+
+
+# No probing of the (fictional) company sites for careers pages
+@patch.object(get_careers_resolver(), 'probe', False)
+class TestLinkedInEnrichment(unittest.TestCase):
+
+    @patch('llm_utils.call_llm')
+    @patch('agent_logic.get_page_content')
+    def test_validation_uses_templates_without_llm(self, mock_get_content, mock_call_llm):
+        mock_get_content.side_effect = [STRONG_HOMEPAGE]
+        result = validate_company("Strong Firm", "http://strongfirm.com")
+
+        self.assertEqual(result["linkedin_source"], "template")
+        self.assertEqual(result["LinkedIn Search Strings"], " | ".join(linkedin_search_templates("Strong Firm")))
+        mock_call_llm.assert_not_called()
+
+    @patch('llm_utils.call_llm')
+    def test_batch_generation_is_one_call(self, mock_call_llm):
+        mock_call_llm.return_value = json.dumps({"0": ["a1", "a2", "a3"], "1": ["b1", "b2"]})
+        searches = generate_linkedin_searches_batch([
+            {"name": "Alpha", "description": "Consulting"},
+            {"name": "Beta", "description": "Studio"},
+            {"name": "Gamma", "description": "Boutique"},
+        ])
+
+        self.assertEqual(mock_call_llm.call_count, 1)
+        self.assertEqual(searches[0], ["a1", "a2", "a3"])
+        self.assertEqual(searches[1], ["b1", "b2"])
+        # Missing from the answer -> template fallback
+        self.assertEqual(searches[2], linkedin_search_templates("Gamma"))
+
+    @patch('llm_utils.call_llm')
+    def test_batch_generation_is_chunked(self, mock_call_llm):
+        def answer(prompt, system_prompt, max_tokens):
+            if "Broken" in prompt:
+                return "not json"
+            return json.dumps({str(i): [f"s{i}"] for i in range(2)})
+        mock_call_llm.side_effect = answer
+        companies = [{"name": n, "description": ""} for n in ("A", "B", "Broken", "C", "D")]
+
+        searches = generate_linkedin_searches_batch(companies, max_batch_size=2)
+
+        self.assertEqual(mock_call_llm.call_count, 3)
+        self.assertEqual(searches[0:2], [["s0"], ["s1"]])
+        # Only the failed chunk falls back to templates
+        self.assertEqual(searches[2], linkedin_search_templates("Broken"))
+        self.assertEqual(searches[3], linkedin_search_templates("C"))
+        self.assertEqual(searches[4], ["s0"])
+
+    @patch('llm_utils.call_llm')
+    def test_enrich_skips_already_enriched_rows(self, mock_call_llm):
+        mock_call_llm.return_value = json.dumps({"0": ["new1", "new2"]})
+        records = [
+            {"Company": "Done", "LinkedIn Search Strings": "old", "linkedin_source": "llm"},
+            {"Company": "Todo", "LinkedIn Search Strings": "template", "linkedin_source": "template"},
+        ]
+        enrich_linkedin_searches(records)
+
+        self.assertEqual(records[0]["LinkedIn Search Strings"], "old")
+        self.assertEqual(records[1]["LinkedIn Search Strings"], "new1 | new2")
+        self.assertEqual(records[1]["linkedin_source"], "llm")
+
+        mock_call_llm.reset_mock()
+        enrich_linkedin_searches(records)
+        mock_call_llm.assert_not_called()
+
+    @patch('llm_utils.call_llm')
+    def test_enrich_keeps_template_when_llm_unavailable(self, mock_call_llm):
+        mock_call_llm.return_value = None
+        records = [{"Company": "Acme", "LinkedIn Search Strings": "template", "linkedin_source": "template"}]
+        future = enrich_linkedin_searches_async(records)
+
+        self.assertIs(future.result(timeout=5), records)
+        self.assertEqual(records[0]["linkedin_source"], "template")
+
+
+if __name__ == '__main__':
+    unittest.main()
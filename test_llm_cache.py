@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from llm_utils import call_llm, configure_llm_cache, llm_cache_key
+from cache_store import ResultCache
+
+
+def fake_client(text):
+    client = MagicMock()
+    message = MagicMock()
+    message.content = text
+    client.chat.completions.create.return_value = MagicMock(choices=[MagicMock(message=message)])
+    return client
+
+
+class TestLLMCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        configure_llm_cache(os.path.join(self.tmpdir.name, "llm.sqlite"))
+
+    def tearDown(self):
+        configure_llm_cache(enabled=False)
+        self.tmpdir.cleanup()
+
+    @patch('llm_utils.get_llm_client')
+    def test_identical_request_served_from_cache(self, mock_get_client):
+        client = fake_client(' {"is_partner_ready": true} ')
+        mock_get_client.return_value = client
+
+        first = call_llm("Analyze Acme", "system", max_tokens=800)
+        second = call_llm("Analyze Acme", "system", max_tokens=800)
+
+        self.assertEqual(first, '{"is_partner_ready": true}')
+        self.assertEqual(first, second)
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+
+    @patch('llm_utils.get_llm_client')
+    def test_any_input_change_misses(self, mock_get_client):
+        client = fake_client("answer")
+        mock_get_client.return_value = client
+
+        call_llm("Analyze Acme", "system", max_tokens=800)
+        call_llm("Analyze Acme", "system", max_tokens=300)
+        call_llm("Analyze Acme", "other system", max_tokens=800)
+        call_llm("Analyze Acme", "system", max_tokens=800, temperature=0.0)
+        self.assertEqual(client.chat.completions.create.call_count, 4)
+
+    @patch('llm_utils.get_llm_client')
+    def test_failures_not_cached(self, mock_get_client):
+        client = fake_client("answer")
+        client.chat.completions.create.side_effect = [Exception("rate limited"), client.chat.completions.create.return_value]
+        mock_get_client.return_value = client
+
+        self.assertIsNone(call_llm("prompt"))
+        self.assertEqual(call_llm("prompt"), "answer")
+
+    def test_key_covers_model(self):
+        self.assertNotEqual(
+            llm_cache_key("p", "s", 100, 0.3, model="a"),
+            llm_cache_key("p", "s", 100, 0.3, model="b"),
+        )
+
+
+class TestResultCacheEviction(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lru_eviction_by_size(self):
+        cache = ResultCache("test", self.path, max_bytes=25)
+        cache.put("a", "x" * 10)
+        cache.put("b", "y" * 10)
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", "z" * 10)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_size_total_survives_reopen_and_replace(self):
+        cache = ResultCache("test", self.path, max_bytes=25)
+        cache.put("a", "x" * 10)
+        cache.put("a", "x" * 10)  # Replacing an entry doesn't count its size twice
+        cache = ResultCache("test", self.path, max_bytes=25)
+        cache.put("b", "y" * 10)
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache.put("c", "z" * 10)
+        self.assertIsNone(cache.get("a"))
+
+    def test_age_eviction(self):
+        cache = ResultCache("test", self.path, ttl=0)
+        cache.put("a", "value")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
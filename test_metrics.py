@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import patch
+import metrics
+from metrics import (
+    span, timed, count, observe, reset_metrics, metrics_report, prometheus_text,
+    configure_metrics, write_metrics_report, start_metrics_server
+)
+from agent_logic import validate_company
+from careers_resolver import get_careers_resolver
+
+HOMEPAGE = """
+<html><body>
+    <p>A strategy consulting firm and trusted implementation partner in the SaaS ecosystem.</p>
+    <p>We deliver business outcomes, ROI and transformation through advisory work.</p>
+</body></html>
+"""
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        configure_metrics(True)
+        reset_metrics()
+
+    def tearDown(self):
+        configure_metrics(metrics.METRICS_ENABLED)
+        reset_metrics()
+
+    def test_spans_and_counters(self):
+        with span("fetch"):
+            pass
+        with self.assertRaises(ValueError):
+            with span("fetch"):
+                raise ValueError("boom")
+        count("bytes_fetched", 100)
+        count("bytes_fetched", 50)
+        count("cache_requests", cache="llm", result="hit")
+
+        report = metrics_report()
+        self.assertEqual(report["spans"]["fetch"]["count"], 2)
+        self.assertEqual(report["spans"]["fetch"]["errors"], 1)
+        self.assertEqual(report["counters"]["bytes_fetched"], 150)
+        self.assertEqual(report["counters"]["cache_requests{cache=llm,result=hit}"], 1)
+
+    def test_disabled_records_nothing(self):
+        configure_metrics(False)
+
+        @timed("search")
+        def search():
+            return "ok"
+        self.assertEqual(search(), "ok")
+        with span("fetch"):
+            pass
+        count("bytes_fetched", 10)
+        self.assertEqual(metrics_report(), {"spans": {}, "counters": {}})
+
+    def test_prometheus_text(self):
+        observe("llm", 0.3)
+        observe("llm", 20.0)
+        count("llm_tokens", 42, kind="prompt")
+        text = prometheus_text()
+
+        self.assertIn('company_research_stage_duration_seconds_bucket{stage="llm",le="0.5"} 1', text)
+        self.assertIn('company_research_stage_duration_seconds_bucket{stage="llm",le="+Inf"} 2', text)
+        self.assertIn('company_research_stage_duration_seconds_count{stage="llm"} 2', text)
+        self.assertIn('company_research_llm_tokens_total{kind="prompt"} 42', text)
+
+    def test_exports(self):
+        count("errors", stage="fetch")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.json")
+            write_metrics_report(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["counters"], {"errors{stage=fetch}": 1})
+
+        server = start_metrics_server(0, host="127.0.0.1")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+                self.assertIn('company_research_errors_total{stage="fetch"} 1', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    @patch.object(get_careers_resolver(), 'probe', False)
+    @patch('agent_logic.get_page_content')
+    def test_validation_is_instrumented(self, mock_get_content):
+        mock_get_content.side_effect = [HOMEPAGE]
+        validate_company("Strong Firm", "http://strongfirm.com")
+
+        report = metrics_report()
+        self.assertEqual(report["spans"]["validate"]["count"], 1)
+        self.assertEqual(report["spans"]["collect_signals"]["count"], 1)
+        self.assertEqual(report["spans"]["parse"]["count"], 1)
+        self.assertEqual(report["counters"]["validation_tiers{tier=rules_accept}"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+from page_document import PageDocument, resolve_parser
+import page_document
+
+HTML = """
+<html><body>
+    <h1>Strategy Consulting</h1>
+    <p>We partner with SaaS vendors.</p>
+    <a href="/careers">Careers</a>
+    <a href="https://partners.example.org/program">Partner Program</a>
+</body></html>
+"""
+
+
+class TestPageDocument(unittest.TestCase):
+
+    def test_text_views(self):
+        doc = PageDocument(HTML, "https://acme.com/")
+        self.assertIn("Strategy Consulting We partner with SaaS vendors.", doc.text)
+        self.assertEqual(doc.lower_text, doc.text.lower())
+
+    def test_links_resolved_against_page_url(self):
+        doc = PageDocument(HTML, "https://acme.com/about/")
+        self.assertEqual(doc.links, [
+            ("https://acme.com/careers", "Careers"),
+            ("https://partners.example.org/program", "Partner Program"),
+        ])
+
+    def test_parses_once(self):
+        doc = PageDocument(HTML, "https://acme.com/")
+        with patch.object(page_document, "BeautifulSoup", wraps=page_document.BeautifulSoup) as mock_bs:
+            doc.text
+            doc.lower_text
+            doc.links
+            doc.soup
+        self.assertEqual(mock_bs.call_count, 1)
+
+    def test_content_blocks_drop_boilerplate(self):
+        html = """
+        <html><head><script>var tracking = 1;</script><style>p { color: red; }</style></head><body>
+            <nav><a href="/about">About our company</a></nav>
+            <div id="cookie-banner">We use cookies to improve your experience</div>
+            <div class="hero"><h1>Trusted implementation partner for SaaS</h1>
+                <p>We deliver <b>business outcomes</b> for clients.</p></div>
+            <p>We deliver <b>business outcomes</b> for clients.</p>
+            <footer>Copyright 2024 Acme, all rights reserved</footer>
+        </body></html>
+        """
+        doc = PageDocument(html, "https://acme.com/")
+        self.assertEqual(doc.content_blocks, [
+            "Trusted implementation partner for SaaS",
+            "We deliver business outcomes for clients.",
+        ])
+        # The shared soup still has the navigation for link discovery
+        self.assertIn(("https://acme.com/about", "About our company"), doc.links)
+
+    def test_state_classes_on_wrappers_keep_content(self):
+        html = """
+        <html><body class="has-sidebar menu-closed cookie-consent-pending">
+            <div class="page-wrapper modal-open">
+                <div class="sidebar">Recent posts and archive links here</div>
+                <main><p>We are a certified implementation partner for SaaS vendors.</p></main>
+            </div>
+        </body></html>
+        """
+        blocks = PageDocument(html, "https://acme.com/").content_blocks
+        self.assertEqual(blocks, ["We are a certified implementation partner for SaaS vendors."])
+
+    def test_chrome_wrapping_most_of_the_page_is_kept(self):
+        # e.g. ASP.NET pages wrap the whole body in a <form>
+        html = """<html><body><form id="aspnetForm">
+            <p>Strategy consulting and digital transformation for mid-market firms.</p>
+            <p>We deliver measurable business outcomes for our clients.</p>
+        </form></body></html>"""
+        self.assertEqual(len(PageDocument(html).content_blocks), 2)
+
+    def test_unknown_parser_falls_back(self):
+        self.assertEqual(resolve_parser("no-such-parser"), "html.parser")
+        self.assertIn(resolve_parser("auto"), page_document.PARSER_PREFERENCE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch
+from keyword_matcher import KeywordMatcher
+from prompt_budget import count_tokens, truncate_to_tokens, select_blocks, fit_text
+import prompt_budget
+
+MATCHER = KeywordMatcher(["partner", "outcome", "roi"])
+
+
+class TestPromptBudget(unittest.TestCase):
+
+    def test_fallback_estimate_without_tokenizer(self):
+        with patch.object(prompt_budget, "get_encoding", return_value=None):
+            self.assertEqual(count_tokens(""), 0)
+            self.assertEqual(count_tokens("a" * 40), 11)
+            self.assertEqual(truncate_to_tokens("a" * 40, 5), "a" * 20)
+
+    def test_everything_fits(self):
+        blocks = ["First block of text", "Second block of text"]
+        self.assertEqual(select_blocks(blocks, 1000, MATCHER), "First block of text\nSecond block of text")
+
+    def test_keyword_dense_blocks_win(self):
+        filler = "Lorem ipsum dolor sit amet consectetur adipiscing elit " * 3
+        blocks = [filler, "Your partner for business outcome and ROI", filler + "again"]
+        budget = count_tokens(blocks[1]) + count_tokens(filler) + 2
+        selected = select_blocks(blocks, budget, MATCHER)
+
+        self.assertIn("Your partner for business outcome and ROI", selected)
+        self.assertLessEqual(count_tokens(selected), budget)
+        # Chosen blocks keep document order
+        self.assertTrue(selected.startswith(filler.strip()[:20]))
+        self.assertNotIn("again", selected)
+
+    def test_oversized_block_is_truncated(self):
+        selected = select_blocks(["partner " * 500], 20, MATCHER)
+        self.assertGreater(len(selected), 0)
+        self.assertLessEqual(count_tokens(selected), 21)
+
+    def test_fit_text_keeps_leading_lines(self):
+        text = "\n".join(f"Line number {i} with some words" for i in range(100))
+        fitted = fit_text(text, 30)
+        self.assertTrue(fitted.startswith("Line number 0 "))
+        self.assertLessEqual(count_tokens(fitted), 30)
+        self.assertEqual(fit_text(None, 30), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
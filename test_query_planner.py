@@ -0,0 +1,129 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from agent_logic import run_pipeline, search_cache_key
+from cache_store import ResultCache
+from query_planner import QueryPlanner, NOVELTY_WINDOW, REPROBE_AFTER
+
+
+class TestQueryPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.planner = QueryPlanner(os.path.join(self.tmpdir.name, "queries.sqlite"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_counts_new_domains_across_queries(self):
+        self.assertEqual(self.planner.record("q1", ["https://a.com", "https://www.b.com/x"], 1, 1, 2.0), 2)
+        self.assertEqual(self.planner.record("q2", ["https://b.com", "https://c.com"], 1, 1, 2.0), 1)
+        stats = self.planner.stats()
+        self.assertEqual((stats["q2"]["hits"], stats["q2"]["new_domains"]), (2, 1))
+
+    def test_orders_by_yield(self):
+        self.planner.record("poor", ["https://p1.com"], 0, 1, 1.0)
+        self.planner.record("rich", ["https://r1.com", "https://r2.com"], 4, 1, 1.0)
+
+        planned, skipped = self.planner.plan(["poor", "new", "rich"])
+
+        # Untried queries are estimated at the average yield
+        self.assertEqual(planned, ["rich", "new", "poor"])
+        self.assertEqual(skipped, {})
+
+    def test_skips_saturated_queries(self):
+        self.planner.record("first", ["https://a.com", "https://b.com"], 2, 1, 1.0)
+        self.planner.record("repeat", ["https://a.com", "https://b.com"], 0, 1, 1.0)
+
+        planned, skipped = self.planner.plan(["first", "repeat"])
+        self.assertEqual(planned, ["first"])
+        self.assertIn("saturated", skipped["repeat"])
+
+        planned, _ = self.planner.plan(["first", "repeat"], skip_saturated=False)
+        self.assertEqual(planned, ["first", "repeat"])
+
+    def test_repeated_runs_are_not_saturated_by_their_own_domains(self):
+        hits = {"q1": ["https://a.com", "https://b.com"], "q2": ["https://c.com", "https://d.com"]}
+        for _ in range(3):
+            planned, skipped = self.planner.plan(["q1", "q2"])
+            self.assertEqual((sorted(planned), skipped), (["q1", "q2"], {}))
+            for query in planned:
+                self.planner.record(query, hits[query], 1, 1, 1.0)
+        self.assertEqual(self.planner.stats()["q1"]["last_new_domains"], 2)
+
+    def test_other_queries_domains_stop_counting_after_the_window(self):
+        self.planner.record("first", ["https://a.com"], 1, 1, 1.0)
+        self.assertEqual(self.planner.record("second", ["https://a.com"], 0, 1, 1.0), 0)
+        with patch('query_planner.time.time', return_value=time.time() + NOVELTY_WINDOW + 1):
+            self.assertEqual(self.planner.record("second", ["https://a.com"], 1, 1, 1.0), 1)
+
+    def test_reprobes_saturated_queries(self):
+        self.planner.record("first", ["https://a.com"], 1, 1, 1.0)
+        self.planner.record("repeat", ["https://a.com"], 0, 1, 1.0)
+        self.assertIn("repeat", self.planner.plan(["repeat"])[1])
+        with patch('query_planner.time.time', return_value=time.time() + REPROBE_AFTER + 1):
+            self.assertEqual(self.planner.plan(["repeat"]), (["repeat"], {}))
+
+    def test_cached_queries_cost_no_credits(self):
+        planned, skipped = self.planner.plan(["a", "b", "c"], credits_per_query=2, credit_budget=2, cached=["c"])
+        self.assertEqual(planned, ["c", "a"])
+        self.assertEqual(skipped, {"b": "over the credit budget"})
+
+    def test_credit_budget(self):
+        planned, skipped = self.planner.plan(["a", "b", "c"], credits_per_query=2, credit_budget=4)
+        self.assertEqual(planned, ["a", "b"])
+        self.assertEqual(skipped, {"c": "over the credit budget"})
+
+    def test_time_budget_prefers_fast_queries(self):
+        self.planner.record("slow", ["https://s.com"], 2, 1, 60.0)
+        self.planner.record("fast", ["https://f.com"], 1, 1, 5.0)
+
+        planned, skipped = self.planner.plan(["slow", "fast"], time_budget=30)
+        self.assertEqual(planned, ["fast"])
+        self.assertEqual(skipped, {"slow": "over the time budget"})
+
+    @patch('agent_logic.get_search_cache', return_value=None)
+    @patch('agent_logic.validate_company', side_effect=lambda name, url: {"Company": name} if name == "A" else None)
+    @patch('agent_logic.search_companies')
+    def test_pipeline_records_yield(self, mock_search, mock_validate, mock_cache):
+        mock_search.side_effect = lambda query, max_results: {
+            "q1": [{"title": "A", "href": "http://a.com"}, {"title": "B", "href": "http://b.com"}],
+            "q2": [],
+        }[query]
+
+        list(run_pipeline(["q1", "q2"], num_results=15, batch_search=False, planner=self.planner))
+
+        stats = self.planner.stats()
+        self.assertEqual(list(stats), ["q1"])  # Empty searches aren't recorded
+        self.assertEqual((stats["q1"]["companies"], stats["q1"]["new_domains"], stats["q1"]["credits"]), (1, 2, 2))
+
+    @patch('agent_logic.get_search_cache', return_value=None)
+    @patch('agent_logic.validate_company', return_value=None)
+    @patch('agent_logic.search_companies_batch')
+    def test_pipeline_splits_batch_search_time(self, mock_search, mock_validate, mock_cache):
+        def slow_batch(queries, max_results):
+            time.sleep(0.2)
+            return {q: [{"title": q, "href": f"http://{q}.com"}] for q in queries}
+        mock_search.side_effect = slow_batch
+
+        list(run_pipeline(["q1", "q2"], batch_search=True, planner=self.planner))
+
+        seconds = [s["seconds"] for s in self.planner.stats().values()]
+        self.assertEqual(len(seconds), 2)
+        for value in seconds:
+            self.assertGreaterEqual(value, 0.09)  # Half of the bulk search each
+
+    @patch('agent_logic.validate_company', return_value=None)
+    @patch('agent_logic.search_companies', return_value=[{"title": "A", "href": "http://a.com"}])
+    def test_pipeline_skips_cached_searches(self, mock_search, mock_validate):
+        cache = ResultCache(os.path.join(self.tmpdir.name, "search.sqlite"))
+        cache.put(search_cache_key("q1", 5), [{"title": "A", "href": "http://a.com"}])
+        with patch('agent_logic.get_search_cache', return_value=cache):
+            list(run_pipeline(["q1", "q2"], batch_search=False, planner=self.planner))
+        self.assertEqual(list(self.planner.stats()), ["q2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
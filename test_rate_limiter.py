@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from rate_limiter import TokenBucket, call_with_retries, configure_limiter, parse_retry_after, backoff_delay
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.02)
+
+    def test_unlimited(self):
+        bucket = TokenBucket(rate=0, capacity=1)
+        self.assertEqual(sum(bucket.reserve() for _ in range(100)), 0)
+
+    def test_pause_blocks_callers(self):
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.pause(5)
+        self.assertGreater(bucket.reserve(), 4.9)
+
+    def test_thread_safe_reservations(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        waits = []
+        lock = threading.Lock()
+
+        def reserve():
+            wait = bucket.reserve()
+            with lock:
+                waits.append(wait)
+
+        threads = [threading.Thread(target=reserve) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Every reservation gets its own slot: 20 tokens at 100/s take ~0.19s to hand out
+        self.assertAlmostEqual(max(waits), 0.19, delta=0.03)
+
+
+class TestCallWithRetries(unittest.TestCase):
+
+    def setUp(self):
+        configure_limiter("test", rate=0, burst=1)
+
+    @patch('rate_limiter.time.sleep')
+    def test_retries_429_honoring_retry_after(self, mock_sleep):
+        func = MagicMock(side_effect=[http_error(429, "7"), "ok"])
+        self.assertEqual(call_with_retries("test", func), "ok")
+        self.assertEqual(func.call_count, 2)
+        self.assertIn(7.0, [c.args[0] for c in mock_sleep.call_args_list])
+
+    @patch('rate_limiter.time.sleep')
+    def test_retries_server_errors_then_gives_up(self, mock_sleep):
+        func = MagicMock(side_effect=http_error(503))
+        with self.assertRaises(requests.HTTPError):
+            call_with_retries("test", func, max_retries=2)
+        self.assertEqual(func.call_count, 3)
+
+    @patch('rate_limiter.time.sleep')
+    def test_client_errors_not_retried(self, mock_sleep):
+        func = MagicMock(side_effect=http_error(401))
+        with self.assertRaises(requests.HTTPError):
+            call_with_retries("test", func)
+        self.assertEqual(func.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("12"), 12.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        future = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+        self.assertAlmostEqual(parse_retry_after(future), 30, delta=2)
+
+    def test_backoff_grows_with_jitter(self):
+        for attempt in range(4):
+            delay = backoff_delay(attempt)
+            self.assertGreaterEqual(delay, 2 ** attempt / 2)
+            self.assertLessEqual(delay, 2 ** attempt)
+
+
+if __name__ == '__main__':
+    unittest.main()
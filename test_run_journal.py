@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import llm_utils
+from agent_logic import run_pipeline, resume_run
+from run_journal import RunJournal
+
+
+def fake_validate(name, url):
+    if name == "Rejected":
+        return None
+    return {"Company": name, "Website": url}
+
+
+@patch('agent_logic.SEARCH_BATCH_ENABLED', False)
+class TestRunJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = RunJournal(os.path.join(self.tmp.name, "runs.sqlite"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch('agent_logic.validate_company')
+    @patch('agent_logic.search_companies')
+    def test_completed_run_is_journaled(self, mock_search, mock_validate):
+        mock_search.return_value = [{"title": "A", "href": "http://a.com"}, {"title": "Rejected", "href": "http://rejected.com"}]
+        mock_validate.side_effect = fake_validate
+
+        events = list(run_pipeline(["q1"], num_results=3, journal=self.journal))
+        run_id = events[0]["run_id"]
+
+        run = self.journal.get_run(run_id)
+        self.assertEqual(run["status"], "completed")
+        self.assertEqual(run["params"]["queries"], ["q1"])
+        self.assertEqual(run["queries_done"], 1)
+        self.assertEqual(run["companies"], 1)
+        self.assertEqual([o["name"] for o in self.journal.outcomes(run_id)], ["A", "Rejected"])
+        self.assertEqual(self.journal.list_runs()[0]["run_id"], run_id)
+
+    @patch('agent_logic.validate_company')
+    @patch('agent_logic.search_companies')
+    def test_resume_skips_finished_work(self, mock_search, mock_validate):
+        mock_search.side_effect = lambda query, max_results: {
+            "q1": [{"title": "A", "href": "http://a.com"}],
+            "q2": [{"title": "B", "href": "http://b.com"}, {"title": "C", "href": "http://c.com"}],
+        }[query]
+        mock_validate.side_effect = fake_validate
+
+        # Stop the run right after the first company of the second query
+        events = run_pipeline(["q1", "q2"], max_workers=1, journal=self.journal)
+        run_id = next(events)["run_id"]
+        for event in events:
+            if event["event"] == "company" and event["query"] == "q2":
+                break
+        events.close()
+        self.assertEqual(self.journal.get_run(run_id)["status"], "interrupted")
+
+        mock_search.reset_mock()
+        mock_validate.reset_mock()
+        resumed = list(resume_run(self.journal, run_id, max_workers=1))
+
+        # q1 is not searched again and already-validated companies are not revalidated
+        self.assertEqual([c.args[0] for c in mock_search.call_args_list], ["q2"])
+        # (C may have been in flight when the run stopped, so it is validated again)
+        self.assertEqual([c.args[0] for c in mock_validate.call_args_list], ["C"])
+        self.assertEqual([e["query"] for e in resumed if e["event"] == "query_skipped"], ["q1"])
+        companies = [e["record"]["Company"] for e in resumed if e["event"] == "company"]
+        self.assertEqual(sorted(companies), ["A", "B", "C"])
+        self.assertEqual(self.journal.get_run(run_id)["status"], "completed")
+
+    @patch('agent_logic.search_companies')
+    def test_empty_search_is_retried_on_resume(self, mock_search):
+        mock_search.return_value = []
+        run_id = next(e for e in run_pipeline(["q1"], journal=self.journal))["run_id"]
+        list(resume_run(self.journal, run_id))
+        self.assertEqual(self.journal.completed_queries(run_id), set())
+
+    @patch('agent_logic.validate_company')
+    @patch('agent_logic.search_companies')
+    def test_llm_failures_are_retried_on_resume(self, mock_search, mock_validate):
+        mock_search.return_value = [{"title": "A", "href": "http://a.com"}, {"title": "B", "href": "http://b.com"}]
+
+        def quota_exceeded_for_b(name, url):
+            if name == "B":
+                llm_utils._record_llm_failure()  # e.g. a 429 that outlasted the retries
+            return {"Company": name, "Website": url}
+        mock_validate.side_effect = quota_exceeded_for_b
+
+        run_id = list(run_pipeline(["q1"], max_workers=1, journal=self.journal))[0]["run_id"]
+        self.assertEqual([o["name"] for o in self.journal.outcomes(run_id)], ["A"])
+        self.assertEqual(self.journal.completed_queries(run_id), set())
+
+        mock_validate.reset_mock()
+        mock_validate.side_effect = fake_validate
+        list(resume_run(self.journal, run_id))
+        self.assertEqual([c.args[0] for c in mock_validate.call_args_list], ["B"])
+        self.assertEqual(self.journal.completed_queries(run_id), {"q1"})
+
+    @patch('agent_logic.validate_company')
+    @patch('agent_logic.search_companies')
+    def test_validation_errors_are_retried_on_resume(self, mock_search, mock_validate):
+        mock_search.return_value = [{"title": "A", "href": "http://a.com"}, {"title": "B", "href": "http://b.com"}]
+
+        def timeout_for_b(name, url):
+            if name == "B":
+                raise TimeoutError("read timed out")
+            return {"Company": name, "Website": url}
+        mock_validate.side_effect = timeout_for_b
+
+        run_id = list(run_pipeline(["q1"], max_workers=1, journal=self.journal))[0]["run_id"]
+        self.assertEqual(self.journal.completed_queries(run_id), set())
+
+        mock_validate.reset_mock()
+        mock_validate.side_effect = fake_validate
+        list(resume_run(self.journal, run_id))
+        self.assertEqual([c.args[0] for c in mock_validate.call_args_list], ["B"])
+        self.assertEqual(self.journal.completed_queries(run_id), {"q1"})
+
+    def test_unknown_run(self):
+        with self.assertRaises(ValueError):
+            resume_run(self.journal, "missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from agent_logic import search_companies, search_companies_batch, configure_search_cache, run_pipeline
+
+
+def organic(prefix, count, start=0):
+    return {"organic": [
+        {"title": f"{prefix} {i}", "link": f"https://{prefix}{i}.com", "snippet": ""}
+        for i in range(start, start + count)
+    ]}
+
+
+def bulk_response(payload):
+    """Answers a Serper request the way the API does: a list for a list payload."""
+    searches = payload if isinstance(payload, list) else [payload]
+    answers = []
+    for s in searches:
+        if s["q"] == "broken":
+            answers.append({"message": "Query not allowed", "statusCode": 400})
+        elif s["q"] == "garbled":
+            answers.append(None)
+        else:
+            page = s.get("page", 1)
+            answers.append(organic(s["q"], s["num"], start=(page - 1) * s["num"]))
+    return MagicMock(json=MagicMock(return_value=answers if isinstance(payload, list) else answers[0]))
+
+
+@patch.dict(os.environ, {"SERP_API_KEY": "test-key"})
+@patch('agent_logic.requests.post')
+class TestSearchBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        configure_search_cache(os.path.join(self.tmpdir.name, "search.sqlite"), ttl=3600)
+
+    def tearDown(self):
+        configure_search_cache(enabled=False)
+        self.tmpdir.cleanup()
+
+    def test_one_request_for_many_queries(self, mock_post):
+        mock_post.side_effect = lambda url, json, headers, timeout: bulk_response(json)
+
+        results = search_companies_batch(["alpha", "beta", "gamma"], max_results=3)
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(len(mock_post.call_args.kwargs["json"]), 3)
+        self.assertEqual(list(results), ["alpha", "beta", "gamma"])
+        self.assertEqual(results["beta"][0]["href"], "https://beta0.com")
+
+    def test_per_query_errors_are_isolated(self, mock_post):
+        mock_post.side_effect = lambda url, json, headers, timeout: bulk_response(json)
+
+        results = search_companies_batch(["alpha", "broken"], max_results=2)
+
+        self.assertEqual(len(results["alpha"]), 2)
+        self.assertIsInstance(results["broken"], Exception)
+        # Only the successful query is cached
+        mock_post.reset_mock()
+        search_companies_batch(["alpha", "broken"], max_results=2)
+        self.assertEqual(mock_post.call_args.kwargs["json"]["q"], "broken")
+
+    def test_malformed_item_fails_only_its_query(self, mock_post):
+        mock_post.side_effect = lambda url, json, headers, timeout: bulk_response(json)
+
+        results = search_companies_batch(["alpha", "garbled", "beta"], max_results=2)
+
+        self.assertIsInstance(results["garbled"], Exception)
+        self.assertEqual((len(results["alpha"]), len(results["beta"])), (2, 2))
+
+    def test_failed_request_fails_its_queries(self, mock_post):
+        mock_post.side_effect = Exception("quota exceeded")
+        results = search_companies_batch(["alpha", "beta"], max_results=2)
+        self.assertIsInstance(results["alpha"], Exception)
+        self.assertIsInstance(results["beta"], Exception)
+
+    def test_pagination(self, mock_post):
+        mock_post.side_effect = lambda url, json, headers, timeout: bulk_response(json)
+
+        results = search_companies("alpha", max_results=25)
+
+        payload = mock_post.call_args.kwargs["json"]
+        self.assertEqual([s["page"] for s in payload], [1, 2, 3])
+        self.assertEqual(len(results), 25)
+        self.assertEqual(results[24]["href"], "https://alpha24.com")
+
+    def test_pipeline_searches_in_batches(self, mock_post):
+        mock_post.side_effect = lambda url, json, headers, timeout: bulk_response(json)
+
+        with patch('agent_logic.validate_company', return_value=None):
+            events = list(run_pipeline(["alpha", "broken", "beta"], num_results=2, batch_search=True))
+
+        self.assertEqual(mock_post.call_count, 1)
+        failed = [e["query"] for e in events if e["event"] == "query_failed"]
+        searched = [e["query"] for e in events if e["event"] == "searched"]
+        self.assertEqual(failed, ["broken"])
+        self.assertEqual(searched, ["alpha", "beta"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from agent_logic import search_companies, configure_search_cache, search_cache_stats
+
+SERPER_RESPONSE = {
+    "organic": [
+        {"title": "Acme Consulting", "link": "https://acme.com", "snippet": "Strategy consulting"},
+        {"title": "Beta Studio", "link": "https://beta.io", "snippet": "Product studio"},
+    ]
+}
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        configure_search_cache(os.path.join(self.tmpdir.name, "search.sqlite"), ttl=3600)
+
+    def tearDown(self):
+        configure_search_cache(enabled=False)
+        self.tmpdir.cleanup()
+
+    @patch.dict(os.environ, {"SERP_API_KEY": "test-key"})
+    @patch('agent_logic.requests.post')
+    def test_cache_hit_skips_request(self, mock_post):
+        response = MagicMock()
+        response.json.return_value = SERPER_RESPONSE
+        mock_post.return_value = response
+
+        first = search_companies('"strategy consulting"', max_results=2)
+        second = search_companies('  "strategy consulting" ', max_results=2)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]["href"], "https://acme.com")
+        self.assertEqual(mock_post.call_count, 1)
+        stats = search_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    @patch.dict(os.environ, {"SERP_API_KEY": "test-key"})
+    @patch('agent_logic.requests.post')
+    def test_keyed_by_result_count(self, mock_post):
+        response = MagicMock()
+        response.json.return_value = SERPER_RESPONSE
+        mock_post.return_value = response
+
+        search_companies("query", max_results=2)
+        search_companies("query", max_results=5)
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch.dict(os.environ, {"SERP_API_KEY": "test-key"})
+    @patch('agent_logic.requests.post')
+    def test_errors_are_not_cached(self, mock_post):
+        mock_post.side_effect = [Exception("quota exceeded"), MagicMock(json=MagicMock(return_value=SERPER_RESPONSE))]
+
+        self.assertEqual(search_companies("query", max_results=2), [])
+        self.assertEqual(len(search_companies("query", max_results=2)), 2)
+
+    @patch.dict(os.environ, {"SERP_API_KEY": "test-key"})
+    @patch('agent_logic.requests.post')
+    def test_expired_entries_refetched(self, mock_post):
+        configure_search_cache(os.path.join(self.tmpdir.name, "search.sqlite"), ttl=0)
+        mock_post.return_value = MagicMock(json=MagicMock(return_value=SERPER_RESPONSE))
+
+        search_companies("query", max_results=2)
+        search_companies("query", max_results=2)
+        self.assertEqual(mock_post.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
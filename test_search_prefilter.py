@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import patch
+from agent_logic import filter_candidates
+from search_prefilter import DomainRules, prefilter_results, score_hit
+
+
+def hit(href, title="", body=""):
+    return {"href": href, "title": title, "body": body}
+
+
+class TestDomainRules(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = DomainRules(allow=["careers.acme.com"], deny=["acme.com", "linkedin.com"])
+
+    def test_suffix_match(self):
+        self.assertEqual(self.rules.verdict("https://uk.linkedin.com/company/x"), "deny")
+        self.assertEqual(self.rules.verdict("https://www.acme.com"), "deny")
+        self.assertIsNone(self.rules.verdict("https://notlinkedin.com"))
+
+    def test_substring_is_not_a_match(self):
+        # The old filter dropped any URL merely containing "linkedin.com"
+        self.assertIsNone(self.rules.verdict("https://partner.io/linkedin.com-integration"))
+
+    def test_allow_overrides_deny(self):
+        self.assertEqual(self.rules.verdict("https://careers.acme.com/jobs"), "allow")
+
+
+class TestScoring(unittest.TestCase):
+
+    def test_firm_homepage_beats_listicle(self):
+        firm = score_hit(hit("https://northwind.io/", "Northwind | Salesforce Consulting Partner",
+                             "We help enterprises with implementation services."))
+        listicle = score_hit(hit("https://example.com/blog/top-10-salesforce-partners",
+                                 "Top 10 Salesforce Consulting Partners in 2024", "Our ranking of the best firms"))
+        self.assertGreater(firm, 0)
+        self.assertLess(listicle, 0)
+
+    def test_files_score_lowest(self):
+        self.assertLess(score_hit(hit("https://firm.com/brochure.pdf", "Consulting services")), -5)
+
+    def test_hits_without_evidence_are_neutral(self):
+        self.assertEqual(score_hit(hit("https://acme.com/about")), 0)
+
+
+class TestPrefilter(unittest.TestCase):
+
+    def test_keeps_order_and_reports_reasons(self):
+        results = [
+            hit("https://a.com", "A Consulting"),
+            hit("https://www.linkedin.com/company/a", "A | LinkedIn"),
+            hit("https://news.example/article/x", "How to choose a consulting partner"),
+            hit("https://b.com", "B Advisory"),
+        ]
+        kept, skipped = prefilter_results(results, rules=DomainRules(deny=["linkedin.com"]))
+        self.assertEqual([r["href"] for r in kept], ["https://a.com", "https://b.com"])
+        self.assertEqual(skipped[1], "denied domain")
+        self.assertTrue(skipped[2].startswith("low score"))
+
+    def test_repeated_urls_are_skipped_once_each(self):
+        results = [hit("https://clutch.co/profile/a"), hit("https://clutch.co/profile/a")]
+        _, skipped = prefilter_results(results, rules=DomainRules(deny=["clutch.co"]))
+        self.assertEqual(skipped, {0: "denied domain", 1: "denied domain"})
+
+    def test_allowed_domains_skip_scoring(self):
+        kept, _ = prefilter_results([hit("https://acme.com/blog/news", "Acme news")],
+                                    rules=DomainRules(allow=["acme.com"]))
+        self.assertEqual(len(kept), 1)
+
+    @patch('search_prefilter.PREFILTER_ENABLED', False)
+    def test_disabled_applies_domain_rules_only(self):
+        results = [hit("https://clutch.co/profile/a"), hit("https://rankings.example/blog/top-10-firms", "Top 10 firms")]
+        kept, _ = prefilter_results(results, rules=DomainRules(deny=["clutch.co"]))
+        self.assertEqual([r["href"] for r in kept], ["https://rankings.example/blog/top-10-firms"])
+
+    def test_default_rules(self):
+        kept = filter_candidates([
+            hit("https://clutch.co/profile/a"), hit("https://boards.greenhouse.io/acme"),
+            hit("https://en.wikipedia.org/wiki/Acme"), hit("https://acme.com", "Acme Consulting"),
+        ])
+        self.assertEqual([r["href"] for r in kept], ["https://acme.com"])
+
+
+if __name__ == '__main__':
+    unittest.main()
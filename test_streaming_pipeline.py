@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+from agent_logic import iter_validate_candidates, run_pipeline, arun_pipeline, DomainRegistry
+
+
+@patch('agent_logic.SEARCH_BATCH_ENABLED', False)
+class TestStreamingPipeline(unittest.TestCase):
+
+    @patch('agent_logic.validate_company')
+    def test_outcomes_stream_before_slow_candidates_finish(self, mock_validate):
+        release = threading.Event()
+
+        def validate(name, url):
+            if name == "Slow":
+                # Only finishes once the fast result has reached the consumer
+                self.assertTrue(release.wait(5))
+            return {"Company": name, "Website": url}
+        mock_validate.side_effect = validate
+
+        outcomes = iter_validate_candidates([
+            {"title": "Slow", "href": "http://slow.com"},
+            {"title": "Fast", "href": "http://fast.com"},
+        ], max_workers=2)
+        first = next(outcomes)
+        self.assertEqual(first["name"], "Fast")
+        self.assertEqual(first["index"], 1)
+        release.set()
+        self.assertEqual([o["name"] for o in outcomes], ["Slow"])
+
+    @patch('agent_logic.validate_company')
+    @patch('agent_logic.search_companies')
+    def test_pipeline_events(self, mock_search, mock_validate):
+        mock_search.side_effect = [
+            [{"title": "A", "href": "http://a.com"}, {"title": "Rejected", "href": "http://rejected.com"}],
+            [{"title": "A again", "href": "https://www.a.com/"}],
+        ]
+        mock_validate.side_effect = lambda name, url: None if name == "Rejected" else {"Company": name, "Website": url}
+
+        events = list(run_pipeline(["q1", "q2"], registry=DomainRegistry()))
+        kinds = [e["event"] for e in events]
+
+        self.assertEqual(kinds[:2], ["query_started", "searched"])
+        self.assertEqual(kinds.count("validated"), 3)
+        # The second query's hit is a duplicate domain, so only one company record
+        self.assertEqual([e["record"]["Company"] for e in events if e["event"] == "company"], ["A"])
+        self.assertEqual([e["companies"] for e in events if e["event"] == "query_done"], [1, 0])
+        self.assertEqual(mock_validate.call_count, 2)
+
+    @patch('agent_logic.search_candidates')
+    def test_failed_query_does_not_stop_run(self, mock_search):
+        mock_search.side_effect = [RuntimeError("quota"), []]
+        events = list(run_pipeline(["bad", "good"]))
+
+        self.assertIn({"event": "query_failed", "query": "bad", "error": "quota"}, events)
+        self.assertEqual([e["query"] for e in events if e["event"] == "query_done"], ["bad", "good"])
+
+    @patch('agent_logic.validate_company')
+    @patch('agent_logic.search_companies')
+    def test_async_iterator(self, mock_search, mock_validate):
+        mock_search.return_value = [{"title": "A", "href": "http://a.com"}]
+        mock_validate.side_effect = lambda name, url: {"Company": name, "Website": url}
+
+        async def collect():
+            return [e async for e in arun_pipeline(["q"])]
+        events = asyncio.run(collect())
+
+        self.assertEqual(events[0]["event"], "query_started")
+        self.assertEqual(events[-1]["event"], "query_done")
+        self.assertIn("company", [e["event"] for e in events])
+
+
+class TestAsyncPipelineCancellation(unittest.TestCase):
+
+    def test_cancelled_consumer_still_closes_the_pipeline(self):
+        started = threading.Event()
+        closed = threading.Event()
+
+        def slow_pipeline(queries, **kwargs):
+            try:
+                yield {"event": "query_started", "query": queries[0]}
+                started.set()
+                threading.Event().wait(0.3)  # A search in flight when the consumer is cancelled
+                yield {"event": "query_done", "query": queries[0]}
+            finally:
+                closed.set()
+
+        async def consume():
+            async for _ in arun_pipeline(["q"]):
+                pass
+
+        async def cancel_mid_run():
+            task = asyncio.create_task(consume())
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with patch('agent_logic.run_pipeline', side_effect=slow_pipeline):
+            asyncio.run(cancel_mid_run())
+        self.assertTrue(closed.wait(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
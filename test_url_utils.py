@@ -0,0 +1,35 @@
+import unittest
+from url_utils import normalize_url, canonicalize_url, registrable_domain
+
+
+class TestURLUtils(unittest.TestCase):
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url("HTTPS://Example.com:443/About/#team"), "https://example.com/About")
+        self.assertEqual(normalize_url("http://example.com"), "http://example.com/")
+
+    def test_canonicalize_strips_tracking_and_www(self):
+        self.assertEqual(
+            canonicalize_url("https://www.acme.com/services/?utm_source=google&page=2&gclid=abc"),
+            "https://acme.com/services?page=2",
+        )
+
+    def test_registrable_domain(self):
+        self.assertEqual(registrable_domain("https://www.acme.com/about?utm_campaign=x"), "acme.com")
+        self.assertEqual(registrable_domain("http://blog.acme.com"), "acme.com")
+        self.assertEqual(registrable_domain("https://www.studio.co.uk/work"), "studio.co.uk")
+        self.assertEqual(registrable_domain("acme.io"), "acme.io")
+        self.assertEqual(registrable_domain("http://127.0.0.1:8000/"), "127.0.0.1")
+        self.assertEqual(registrable_domain(""), "")
+
+    def test_hosting_platform_sites_are_separate(self):
+        self.assertEqual(registrable_domain("https://acme.webflow.io/about"), "acme.webflow.io")
+        self.assertNotEqual(registrable_domain("https://acme.webflow.io"), registrable_domain("https://beta.webflow.io"))
+        self.assertEqual(registrable_domain("https://www.studio.wixsite.com/home"), "studio.wixsite.com")
+        self.assertEqual(registrable_domain("https://acme.github.io/site"), "acme.github.io")
+        self.assertEqual(registrable_domain("https://acme-web.azurewebsites.net"), "acme-web.azurewebsites.net")
+        self.assertEqual(registrable_domain("https://blog.acme.herokuapp.com"), "acme.herokuapp.com")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import patch
+from agent_logic import validate_company, cascade_stats, reset_cascade_stats, rule_score
+from careers_resolver import get_careers_resolver
+
+STRONG_HOMEPAGE = """
+<html><body>
+    <p>A strategy consulting firm and trusted implementation partner in the SaaS ecosystem.</p>
+    <p>We deliver business outcomes, ROI and transformation through advisory work.</p>
+</body></html>
+"""
+
+EMPTY_HOMEPAGE = "<html><body><p>Welcome to our website.</p></body></html>"
+
+AMBIGUOUS_HOMEPAGE = "<html><body><p>We create value for our partners.</p></body></html>"
+
+
+# No probing of the (fictional) company sites for careers pages
+@patch.object(get_careers_resolver(), 'probe', False)
+class TestValidationCascade(unittest.TestCase):
+
+    def setUp(self):
+        reset_cascade_stats()
+
+    @patch('agent_logic.analyze_company_content')
+    @patch('agent_logic.get_page_content')
+    def test_strong_signals_skip_llm(self, mock_get_content, mock_analyze):
+        mock_get_content.side_effect = [STRONG_HOMEPAGE]
+        result = validate_company("Strong Firm", "http://strongfirm.com")
+
+        self.assertIsNotNone(result)
+        self.assertIn("Partner/Ecosystem language detected", result["Why It Fits"])
+        mock_analyze.assert_not_called()
+        self.assertEqual(cascade_stats(), {"rules_accept": 1})
+
+    @patch('agent_logic.analyze_company_content')
+    @patch('agent_logic.get_page_content')
+    def test_no_signals_rejected_without_llm(self, mock_get_content, mock_analyze):
+        mock_get_content.side_effect = [EMPTY_HOMEPAGE]
+        self.assertIsNone(validate_company("Nothing Inc", "http://nothing.com"))
+        mock_analyze.assert_not_called()
+        self.assertEqual(cascade_stats(), {"rules_reject": 1})
+
+    @patch('agent_logic.analyze_company_content')
+    @patch('agent_logic.get_page_content')
+    def test_ambiguous_goes_to_llm(self, mock_get_content, mock_analyze):
+        mock_get_content.side_effect = [AMBIGUOUS_HOMEPAGE]
+        mock_analyze.return_value = {"is_partner_ready": True, "confidence": "high", "positioning": "balanced"}
+
+        result = validate_company("Maybe Co", "http://maybe.com")
+        mock_analyze.assert_called_once()
+        self.assertEqual(result["Confidence"], "high")
+        self.assertEqual(cascade_stats(), {"llm": 1})
+
+    @patch('agent_logic.CASCADE_ENABLED', False)
+    @patch('agent_logic.analyze_company_content')
+    @patch('agent_logic.get_page_content')
+    def test_disabled_cascade_always_calls_llm(self, mock_get_content, mock_analyze):
+        mock_get_content.side_effect = [STRONG_HOMEPAGE]
+        mock_analyze.return_value = None
+        validate_company("Strong Firm", "http://strongfirm.com")
+        mock_analyze.assert_called_once()
+
+    def test_staffing_language_lowers_score(self):
+        base = {"p_matches": ["partner"], "o_matches": ["value"], "h_matches": [], "c_matches": [],
+                "e_matches": [], "positions_as_consulting": False}
+        self.assertEqual(rule_score(base), 2)
+        self.assertEqual(rule_score(dict(base, h_matches=["staff augmentation"])), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+URL helpers shared by the fetcher, caches and validation pipeline.
+"""
+
+import ipaddress
+import threading
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+try:
+    import tldextract
+except ImportError:  # Optional: fall back to the suffix lists below
+    tldextract = None
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only carry campaign/click tracking
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "dclid", "yclid", "mc_cid", "mc_eid", "ref", "_hsenc", "_hsmi", "igshid"}
+TRACKING_PREFIXES = ("utm_",)
+
+# Public suffixes with two labels that are common in search results; the
+# registrable domain sits one label further left for these.
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "me.uk",
+    "com.au", "net.au", "org.au", "co.nz", "org.nz",
+    "co.in", "net.in", "org.in", "co.jp", "or.jp", "ne.jp",
+    "com.br", "com.mx", "com.ar", "com.co", "co.za", "com.sg", "com.my",
+    "com.cn", "com.hk", "com.tw", "co.kr", "com.tr", "com.ua", "co.il",
+    "com.pl", "com.es", "com.pt",
+}
+# Private suffixes (hosting platforms) under which every subdomain is a separate site
+PRIVATE_SUFFIXES = {
+    "github.io", "gitlab.io", "webflow.io", "wixsite.com", "squarespace.com", "wordpress.com",
+    "blogspot.com", "herokuapp.com", "azurewebsites.net", "cloudfront.net", "netlify.app",
+    "vercel.app", "pages.dev", "workers.dev", "web.app", "firebaseapp.com", "appspot.com",
+    "framer.website", "framer.app", "carrd.co", "notion.site", "hubspotpagebuilder.com",
+    "myshopify.com", "weebly.com", "godaddysites.com", "business.site", "onrender.com",
+    "fly.dev", "glitch.me", "bubbleapps.io", "strikingly.com", "jimdosite.com", "webnode.page",
+    "s3.amazonaws.com", "elasticbeanstalk.com", "azurestaticapps.net",
+}
+
+_extractor = None
+_extractor_loaded = False
+_extractor_lock = threading.Lock()
+
+def normalize_url(url):
+    """
+    Normalizes a URL for use as a cache key.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    trailing slashes, so trivially different spellings share one entry.
+    """
+    parsed = urlparse(url.strip())
+    scheme = (parsed.scheme or "http").lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    path = parsed.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return urlunparse((scheme, host, path, "", parsed.query, ""))
+
+def strip_tracking_params(query):
+    """Removes campaign/click tracking parameters from a query string."""
+    kept = [
+        (key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    return urlencode(kept)
+
+def get_host(url):
+    """Returns the lowercased host of a URL without a leading 'www.'."""
+    if "://" not in url:
+        url = "http://" + url.strip()
+    host = (urlparse(url.strip()).hostname or "").lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+def get_extractor():
+    """Returns the shared tldextract extractor (bundled Public Suffix List, no network), or None."""
+    global _extractor, _extractor_loaded
+    with _extractor_lock:
+        if not _extractor_loaded:
+            _extractor_loaded = True
+            if tldextract is not None:
+                try:
+                    _extractor = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None,
+                                                       include_psl_private_domains=True)
+                except Exception as e:
+                    print(f"Public Suffix List unavailable, using built-in suffixes: {e}")
+        return _extractor
+
+def registrable_domain(url):
+    """
+    Reduces a URL to its registrable domain, e.g.
+    'https://www.blog.acme.co.uk/about?utm_source=x' -> 'acme.co.uk' and
+    'https://acme.webflow.io' -> 'acme.webflow.io'.
+
+    Uses the Public Suffix List (private suffixes included) when tldextract is
+    installed, and MULTI_LABEL_SUFFIXES / PRIVATE_SUFFIXES otherwise.
+    """
+    host = get_host(url)
+    if not host:
+        return ""
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    extractor = get_extractor()
+    if extractor is not None:
+        domain = extractor(host).registered_domain
+        if domain:
+            return domain
+    labels = host.split(".")
+    # Longest known suffix first: 's3.amazonaws.com' before 'amazonaws.com'
+    for size in (3, 2):
+        suffix = ".".join(labels[-size:])
+        if len(labels) > size and (suffix in PRIVATE_SUFFIXES or suffix in MULTI_LABEL_SUFFIXES):
+            return ".".join(labels[-size - 1:])
+    return ".".join(labels[-2:])
+
+def canonicalize_url(url):
+    """
+    Canonical form of a page URL: normalized, with tracking parameters and a leading 'www.' removed.
+    """
+    parsed = urlparse(normalize_url(url))
+    host = parsed.netloc[4:] if parsed.netloc.startswith("www.") else parsed.netloc
+    return urlunparse((parsed.scheme, host, parsed.path, "", strip_tracking_params(parsed.query), ""))